@@ -0,0 +1,100 @@
+"""
+Ignisyl Alert Paging
+Server-side filter, sort and paging for alert lists, plus the Streamlit
+controls that drive them. Only the rows of the visible page are returned,
+so dashboards create widgets for that page alone.
+"""
+
+import math
+
+import numpy as np
+import streamlit as st
+
+PAGE_SIZE_OPTIONS = [10, 25, 50, 100]
+
+
+# --- Data Layer ---
+def query_alerts(df, mask=None, search="", search_columns=("user", "pc"),
+                 sort_by="risk_score", ascending=False, page=0, page_size=25):
+    """
+    Filter, sort and slice one page of alerts
+    Returns: (page_df, total_matches, page) with page clamped to the valid range
+    """
+    if mask is not None:
+        df = df[mask]
+
+    search = search.strip()
+    if search:
+        search_mask = None
+        for column in search_columns:
+            column_mask = df[column].astype(str).str.contains(search, case=False, regex=False)
+            search_mask = column_mask if search_mask is None else (search_mask | column_mask)
+        df = df[search_mask]
+
+    total = len(df)
+    page_count = max(1, math.ceil(total / page_size))
+    page = min(max(int(page), 0), page_count - 1)
+    start = page * page_size
+    stop = start + page_size
+
+    # Ties on the sort key keep row order, the same on every page, so no
+    # alert repeats or goes missing across page boundaries
+    positions = np.arange(total)
+    order = df[[sort_by]].assign(_position=positions).sort_values(
+        by=[sort_by, '_position'], ascending=[ascending, True], kind="mergesort")['_position'].to_numpy()
+    return df.iloc[order[start:stop]], total, page
+
+
+# --- Streamlit Controls ---
+def alert_filter_controls(key, sort_options, default_page_size=25):
+    """
+    Render search / sort / page-size controls for an alert list
+    sort_options maps a label to (column, ascending)
+    Returns: (search, sort_by, ascending, page_size)
+    """
+    col1, col2, col3 = st.columns([2, 2, 1])
+    with col1:
+        search = st.text_input("🔍 Filter by user or PC", key=f"{key}_search")
+    with col2:
+        sort_label = st.selectbox("Sort by", list(sort_options), key=f"{key}_sort")
+    with col3:
+        page_size = st.selectbox("Per page", PAGE_SIZE_OPTIONS,
+                                 index=PAGE_SIZE_OPTIONS.index(default_page_size),
+                                 key=f"{key}_page_size")
+
+    sort_by, ascending = sort_options[sort_label]
+
+    # Changing the query sends the cursor back to the first page
+    signature = (search, sort_label, page_size)
+    if st.session_state.get(f"{key}_signature") != signature:
+        st.session_state[f"{key}_signature"] = signature
+        st.session_state[f"{key}_page"] = 0
+
+    return search, sort_by, ascending, page_size
+
+
+def current_page(key):
+    """Page cursor for an alert list"""
+    return st.session_state.get(f"{key}_page", 0)
+
+
+def page_navigation(key, page, total, page_size):
+    """
+    Render previous / next navigation and move the page cursor
+    """
+    page_count = max(1, math.ceil(total / page_size))
+    st.session_state[f"{key}_page"] = page
+
+    col1, col2, col3 = st.columns([1, 3, 1])
+    with col1:
+        if st.button("◀ Previous", key=f"{key}_prev", disabled=page <= 0):
+            st.session_state[f"{key}_page"] = page - 1
+            st.rerun()
+    with col2:
+        first = page * page_size + 1 if total else 0
+        last = min((page + 1) * page_size, total)
+        st.caption(f"Page {page + 1} of {page_count} · showing {first}-{last} of {total:,} alerts")
+    with col3:
+        if st.button("Next ▶", key=f"{key}_next", disabled=page >= page_count - 1):
+            st.session_state[f"{key}_page"] = page + 1
+            st.rerun()
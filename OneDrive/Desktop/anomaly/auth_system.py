@@ -4,7 +4,6 @@ Complete user management with role-based access control
 """
 
 import streamlit as st
-import pandas as pd
 import hashlib
 import sqlite3
 from datetime import datetime
@@ -339,6 +338,8 @@ class AuthenticationSystem:
     
     def get_audit_logs(self, limit=100):
         """Get recent audit logs"""
+        import pandas as pd  # only admin views need it; keeps the login page light
+        
         conn = sqlite3.connect(self.db_path)
         df = pd.read_sql_query(f'''
             SELECT * FROM audit_log 
@@ -370,6 +371,8 @@ class AuthenticationSystem:
     
     def get_all_users(self):
         """Get all users (Admin only)"""
+        import pandas as pd
+        
         conn = sqlite3.connect(self.db_path)
         df = pd.read_sql_query('''
             SELECT username, full_name, email, role, 
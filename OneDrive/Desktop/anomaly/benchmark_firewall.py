@@ -0,0 +1,136 @@
+"""
+Ignisyl Firewall Benchmark
+Replays scored logs through the firewall controllers against the simulator
+and reports throughput, rule-table size and simulated lookup cost
+
+Usage:
+    python benchmark_firewall.py --data logon.csv --repeat 10
+    python benchmark_firewall.py --controller module --strategies iptables ipset
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+import pandas as pd
+
+from firewall_simulator import SimulatedRuleTable, STRATEGIES
+from ignisyl_core import score_logs
+
+COMMON_PORTS = [22, 23, 80, 443, 445, 3389, 8080]
+
+
+def load_scored_logs(file_path, contamination=0.01):
+    """
+    Load a log file; score it with Isolation Forest if it has no risk_level column
+    """
+    df = pd.read_csv(file_path)
+    if 'risk_level' in df.columns:
+        return df
+
+    df['date'] = pd.to_datetime(df['date'])
+    return score_logs(df, contamination=contamination)
+
+
+def generate_packets(count, seed=42):
+    """
+    Synthetic inbound packets: half from the monitored PC range, half external
+    """
+    rng = random.Random(seed)
+    packets = []
+    for _ in range(count):
+        if rng.random() < 0.5:
+            src_ip = f"192.168.1.{rng.randint(100, 108)}"
+        else:
+            src_ip = f"10.0.{rng.randint(0, 255)}.{rng.randint(1, 254)}"
+        packets.append((src_ip, rng.choice(COMMON_PORTS), "tcp"))
+    return packets
+
+
+def build_controller(kind, simulator, log_dir):
+    """
+    Create the controller under test wired to the simulator
+    - module: firewall_controller.FirewallController.apply_threat_response
+    - app:    dashboard_firewall.FirewallController.apply_firewall_action (test mode),
+              the controller behind the ignisyl_firewall.py dashboard
+    """
+    if kind == "module":
+        from firewall_controller import FirewallController
+        controller = FirewallController(simulator=simulator, log_file=os.path.join(log_dir, "firewall_actions.log"))
+        return controller.apply_threat_response
+
+    from dashboard_firewall import FirewallController
+    controller = FirewallController(simulator=simulator)
+    controller.test_mode = True
+    return controller.apply_firewall_action
+
+
+def run_benchmark(events, strategy, kind, packets, log_dir):
+    """
+    Replay High/Medium events for one backend strategy and controller
+    """
+    simulator = SimulatedRuleTable(strategy)
+    apply_action = build_controller(kind, simulator, log_dir)
+
+    start = time.perf_counter()
+    for user, pc, risk_level in events:
+        apply_action(user, pc, risk_level)
+    elapsed = time.perf_counter() - start
+
+    avg_evaluations, avg_ns = simulator.lookup_cost(packets)
+    return {
+        "strategy": strategy,
+        "controller": kind,
+        "actions": len(events),
+        "commands": simulator.commands_executed,
+        "actions_per_sec": len(events) / elapsed if elapsed > 0 else float("inf"),
+        "rule_count": simulator.rule_count,
+        "peak_rule_count": simulator.peak_rule_count,
+        "evaluations_per_packet": avg_evaluations,
+        "ns_per_packet": avg_ns
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Ignisyl firewall backends against the simulator")
+    parser.add_argument("--data", default="logon.csv", help="Scored or raw logon CSV")
+    parser.add_argument("--strategies", nargs="+", default=STRATEGIES, choices=STRATEGIES)
+    parser.add_argument("--controller", choices=["module", "app", "both"], default="both")
+    parser.add_argument("--repeat", type=int, default=1, help="Replay the scored events this many times")
+    parser.add_argument("--packets", type=int, default=10000, help="Packets used to measure lookup cost")
+    parser.add_argument("--contamination", type=float, default=0.01)
+    args = parser.parse_args()
+
+    df = load_scored_logs(args.data, args.contamination)
+    threats = df[df['risk_level'].isin(['High', 'Medium'])]
+    events = list(zip(threats['user'], threats['pc'], threats['risk_level'])) * args.repeat
+    packets = generate_packets(args.packets)
+    kinds = ["module", "app"] if args.controller == "both" else [args.controller]
+
+    print("=" * 100)
+    print(f"IGNISYL FIREWALL BENCHMARK - {len(df):,} logs, {len(events):,} High/Medium events replayed")
+    print("=" * 100)
+    print(f"{'Backend':<10}{'Controller':<12}{'Actions':>9}{'Commands':>10}{'Actions/s':>12}"
+          f"{'Rules':>8}{'Peak':>8}{'Evals/pkt':>11}{'ns/pkt':>10}")
+    print("-" * 100)
+
+    with tempfile.TemporaryDirectory() as log_dir:
+        for strategy in args.strategies:
+            for kind in kinds:
+                r = run_benchmark(events, strategy, kind, packets, log_dir)
+                print(f"{r['strategy']:<10}{r['controller']:<12}{r['actions']:>9,}{r['commands']:>10,}"
+                      f"{r['actions_per_sec']:>12,.0f}{r['rule_count']:>8,}{r['peak_rule_count']:>8,}"
+                      f"{r['evaluations_per_packet']:>11.1f}{r['ns_per_packet']:>10.0f}")
+
+        if "module" in kinds:
+            from firewall_controller import shutdown_action_logger
+            shutdown_action_logger()
+
+    print("-" * 100)
+    print("Evals/pkt and ns/pkt are simulated: linear chains pay per rule, ipset pays two set lookups.")
+
+
+if __name__ == "__main__":
+    main()
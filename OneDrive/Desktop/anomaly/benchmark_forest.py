@@ -0,0 +1,71 @@
+"""
+Ignisyl Forest Scoring Benchmark
+Per-call latency of IsolationForest.decision_function against the compiled
+NumPy forest across batch sizes, with a check that scores are identical
+and the size of each form on disk
+
+Usage:
+    python benchmark_forest.py --data logon.csv
+    python benchmark_forest.py --rows 200000 --features extended
+"""
+
+import argparse
+import os
+import pickle
+import tempfile
+import time
+
+import numpy as np
+
+from benchmark_training import generate_habitual_logs
+from ignisyl_core.features import FEATURE_SETS, build_feature_matrix
+from ignisyl_core.forest import COMPILED_MAX_ROWS, CompiledForest
+from ignisyl_core.ingestion import read_activity_log
+from ignisyl_core.models import train_isolation_forest
+
+
+def per_call(function, X, budget=1.0):
+    """Mean seconds per call, repeating for about budget seconds"""
+    function(X)
+    calls, started = 0, time.perf_counter()
+    while time.perf_counter() - started < budget:
+        function(X)
+        calls += 1
+    return (time.perf_counter() - started) / calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark compiled Isolation Forest scoring")
+    parser.add_argument("--data", default=None, help="Log file to train on (default: generated habitual logs)")
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--features", choices=list(FEATURE_SETS), default="base")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 16, 256, 1024, 4096, 16384])
+    args = parser.parse_args()
+
+    df = read_activity_log(args.data) if args.data else generate_habitual_logs(args.rows, args.users)
+    X, _ = build_feature_matrix(df, args.features)
+    model, _ = train_isolation_forest(X)
+    compiled = CompiledForest.from_isolation_forest(model)
+
+    identical = np.array_equal(model.decision_function(X), compiled.decision_function(X))
+    print(f"{len(X):,} rows, {len(model.estimators_)} trees, {len(compiled.thresholds):,} nodes, "
+          f"scores identical: {identical}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        compiled_path = compiled.save(os.path.join(directory, "forest.npz"))
+        print(f"Size: pickled estimator {len(pickle.dumps(model)) / 1e6:.2f} MB, "
+              f"arrays {compiled.nbytes / 1e6:.2f} MB in memory, {os.path.getsize(compiled_path) / 1e6:.2f} MB saved\n")
+
+    print(f"{'Rows':>7} {'sklearn ms':>11} {'compiled ms':>12} {'Speedup':>8}")
+    for size in args.batch_sizes:
+        batch = X.iloc[:size]
+        sklearn_time = per_call(model.decision_function, batch)
+        compiled_time = per_call(compiled.decision_function, batch.to_numpy())
+        used = "  <- detector uses compiled" if size <= COMPILED_MAX_ROWS else ""
+        print(f"{len(batch):>7} {sklearn_time * 1e3:>11.3f} {compiled_time * 1e3:>12.3f} "
+              f"{sklearn_time / compiled_time:>7.1f}x{used}")
+
+
+if __name__ == "__main__":
+    main()
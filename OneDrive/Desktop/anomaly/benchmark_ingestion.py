@@ -0,0 +1,140 @@
+"""
+Ignisyl Ingestion Benchmark
+Parse throughput for a directory of daily logs: the typed parser against
+the schema-inferring read_csv + to_datetime path it replaced, then
+sequential against process-pool reads, with and without gzip compression
+
+Usage:
+    python benchmark_ingestion.py --files 8 --rows-per-file 500000
+    python benchmark_ingestion.py --files 16 --gzip --workers 1 2 4 8 --engine pyarrow
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from ignisyl_core.ingestion import CSV_ENGINES, LOG_COLUMNS, load_activity_logs, read_activity_log
+
+ACTIVITIES = ["Logon", "Logoff", "File_Access", "Email_Sent", "USB_Insert", "File_Download",
+              "File_Transfer", "Database_Access", "Admin_Access"]
+
+
+def generate_logs(directory, files, rows_per_file, compress, seed=42):
+    """
+    One log per day, each in time order, like a rotated export
+    Returns: total rows written
+    """
+    rng = random.Random(seed)
+    users = [f"user_{i:04d}" for i in range(500)]
+    pcs = [f"PC-{i:04d}" for i in range(300)]
+    start = datetime(2024, 10, 1)
+    extension = ".csv.gz" if compress else ".csv"
+
+    for day in range(files):
+        day_start = start + timedelta(days=day)
+        seconds = sorted(rng.randrange(86400) for _ in range(rows_per_file))
+        df = pd.DataFrame({
+            'date': [day_start + timedelta(seconds=s) for s in seconds],
+            'user': [rng.choice(users) for _ in range(rows_per_file)],
+            'pc': [rng.choice(pcs) for _ in range(rows_per_file)],
+            'activity': [rng.choice(ACTIVITIES) for _ in range(rows_per_file)]
+        }, columns=LOG_COLUMNS)
+        df['date'] = df['date'].dt.strftime('%Y-%m-%d %H:%M:%S')
+        df.to_csv(os.path.join(directory, f"logon_{day_start:%Y%m%d}{extension}"), index=False)
+    return files * rows_per_file
+
+
+def read_inferred(file_path):
+    """The previous path: every column read, dtypes and date format inferred"""
+    df = pd.read_csv(file_path)
+    df['date'] = pd.to_datetime(df['date'])
+    return df
+
+
+def available_parsers():
+    parsers = {"inferred (read_csv + to_datetime)": read_inferred}
+    for engine in CSV_ENGINES:
+        if engine == "pyarrow":
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                continue
+        parsers[f"typed, {engine} engine"] = lambda file_path, engine=engine: read_activity_log(file_path, engine)
+    return parsers
+
+
+def compare_parsers(file_path, repeat):
+    """Best-of-repeat parse time and resulting frame size for each parser on one file"""
+    print(f"{'Parser':<36} {'Seconds':>9} {'Rows/s':>12} {'Memory MB':>10} {'Speedup':>8}")
+    baseline = None
+    for name, parse in available_parsers().items():
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            df = parse(file_path)
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        baseline = baseline or best
+        memory_mb = df.memory_usage(index=True, deep=True).sum() / 1e6
+        print(f"{name:<36} {best:>9.2f} {len(df) / best:>12,.0f} {memory_mb:>10.1f} {baseline / best:>7.2f}x")
+
+
+def run(directory, workers, repeat, engine):
+    """Best-of-repeat wall time for loading the whole directory"""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        df, file_stats = load_activity_logs(directory, workers=workers, engine=engine)
+        elapsed = time.perf_counter() - started
+        if best is None or elapsed < best[0]:
+            best = (elapsed, df, file_stats)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark multi-file log ingestion")
+    parser.add_argument("--files", type=int, default=8)
+    parser.add_argument("--rows-per-file", type=int, default=250000)
+    parser.add_argument("--gzip", action="store_true", help="Write the logs as .csv.gz")
+    parser.add_argument("--workers", type=int, nargs="+", default=None,
+                        help="Pool sizes to compare (default: 1, 2, 4 ... up to the core count)")
+    parser.add_argument("--engine", choices=CSV_ENGINES, default="c", help="CSV parser for the pool runs")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    cores = os.cpu_count() or 1
+    worker_counts = args.workers or sorted({1, *[2 ** i for i in range(1, 6) if 2 ** i <= cores], cores})
+
+    with tempfile.TemporaryDirectory() as directory:
+        print(f"Generating {args.files} x {args.rows_per_file:,} rows "
+              f"({'gzip' if args.gzip else 'plain'} CSV)...")
+        total_rows = generate_logs(directory, args.files, args.rows_per_file, args.gzip)
+        total_mb = sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory)) / 1e6
+        print(f"{total_rows:,} rows, {total_mb:,.1f} MB on disk, {cores} core(s)\n")
+
+        first_file = os.path.join(directory, sorted(os.listdir(directory))[0])
+        print(f"Parsing one file ({args.rows_per_file:,} rows):")
+        compare_parsers(first_file, args.repeat)
+
+        print(f"\nParsing all {args.files} files ({args.engine} engine):")
+        baseline = None
+        print(f"{'Workers':>8} {'Seconds':>9} {'Rows/s':>12} {'MB/s':>8} {'Speedup':>8}")
+        for workers in worker_counts:
+            elapsed, df, file_stats = run(directory, workers, args.repeat, args.engine)
+            assert len(df) == total_rows and df['date'].is_monotonic_increasing
+            baseline = baseline or elapsed
+            print(f"{workers:>8} {elapsed:>9.2f} {total_rows / elapsed:>12,.0f} {total_mb / elapsed:>8.1f} "
+                  f"{baseline / elapsed:>7.2f}x")
+
+        print("\nPer file (last run):")
+        for stats in file_stats:
+            print(f"  {stats.summary()}")
+
+
+if __name__ == "__main__":
+    main()
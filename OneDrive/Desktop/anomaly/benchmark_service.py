@@ -0,0 +1,153 @@
+"""
+Ignisyl Scoring Service Load Test
+Fires concurrent single-event requests at the local scoring service and
+reports throughput, client-side latency and the server's batch sizes
+
+Usage:
+    python -m ignisyl_core serve --train logon.csv &
+    python benchmark_service.py --requests 5000 --concurrency 32
+
+    # or start a service just for the run
+    python benchmark_service.py --spawn --max-batch-size 1 --max-wait-ms 0
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import pandas as pd
+
+
+def http_json(url, payload=None, timeout=30):
+    data = json.dumps(payload).encode("utf-8") if payload is not None else None
+    request = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return json.loads(response.read())
+
+
+def wait_for_service(base_url, timeout=60):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            return http_json(f"{base_url}/health", timeout=2)
+        except (urllib.error.URLError, ConnectionError):
+            time.sleep(0.2)
+    raise RuntimeError(f"Scoring service at {base_url} did not come up within {timeout}s")
+
+
+def spawn_service(args):
+    """Start `python -m ignisyl_core serve` in the background"""
+    command = [
+        sys.executable, "-m", "ignisyl_core", "serve",
+        "--train", args.data, "--port", str(args.port),
+        "--max-batch-size", str(args.max_batch_size), "--max-wait-ms", str(args.max_wait_ms)
+    ]
+    cwd = os.path.dirname(os.path.abspath(__file__))
+    return subprocess.Popen(command, cwd=cwd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def sample_events(file_path, count, seed=42):
+    """Events drawn from a real log so scores resemble production traffic"""
+    df = pd.read_csv(file_path)
+    rng = random.Random(seed)
+    records = df[['date', 'user', 'pc', 'activity']].astype(str).to_dict("records")
+    return [rng.choice(records) for _ in range(count)]
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def run_load(base_url, events, concurrency):
+    """
+    Send each event as its own request from `concurrency` client threads
+    Returns: (latencies in seconds, failures, elapsed seconds)
+    """
+    latencies = []
+    failures = []
+    lock = threading.Lock()
+    cursor = iter(events)
+
+    def client():
+        while True:
+            with lock:
+                event = next(cursor, None)
+            if event is None:
+                return
+            started = time.perf_counter()
+            try:
+                http_json(f"{base_url}/score", event)
+                elapsed = time.perf_counter() - started
+                with lock:
+                    latencies.append(elapsed)
+            except (urllib.error.URLError, ConnectionError) as e:
+                with lock:
+                    failures.append(str(e))
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, failures, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the Ignisyl scoring service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--data", default="logon.csv", help="Log file to sample events from")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--spawn", action="store_true", help="Start a service for the run")
+    parser.add_argument("--max-batch-size", type=int, default=64, help="With --spawn")
+    parser.add_argument("--max-wait-ms", type=float, default=5.0, help="With --spawn")
+    args = parser.parse_args()
+
+    base_url = f"http://{args.host}:{args.port}"
+    process = spawn_service(args) if args.spawn else None
+    try:
+        health = wait_for_service(base_url)
+        before = http_json(f"{base_url}/metrics")
+        print(f"Service: {health['detector']['model']} trained on {health['detector']['trained_rows']:,} events")
+
+        events = sample_events(args.data, args.requests)
+        latencies, failures, elapsed = run_load(base_url, events, args.concurrency)
+        after = http_json(f"{base_url}/metrics")
+    finally:
+        if process:
+            process.terminate()
+            process.wait(timeout=10)
+
+    latencies.sort()
+    batches = after["batches"] - before["batches"]
+    print(f"\n{len(latencies):,} requests in {elapsed:.2f}s with {args.concurrency} clients "
+          f"-> {len(latencies) / elapsed:,.0f} req/s ({len(failures)} failed)")
+    print(f"Client latency (ms): p50 {percentile(latencies, 0.50) * 1000:.1f} · "
+          f"p95 {percentile(latencies, 0.95) * 1000:.1f} · p99 {percentile(latencies, 0.99) * 1000:.1f} · "
+          f"max {latencies[-1] * 1000 if latencies else 0:.1f}")
+    if batches:
+        print(f"Server batches: {batches:,} (mean {len(latencies) / batches:.1f} events/batch, "
+              f"max batch {after['max_batch_size']}, max wait {after['max_wait_ms']}ms)")
+
+    print("\nServer latency histograms (cumulative since start):")
+    for name, snapshot in after["latency"].items():
+        print(f"  {name:<14} n={snapshot['count']:<7,} p50 {snapshot['p50_ms']}ms · "
+              f"p95 {snapshot['p95_ms']}ms · p99 {snapshot['p99_ms']}ms · mean {snapshot['mean_ms']}ms")
+    print("  batch sizes   " + " ".join(f"{bucket}:{count}" for bucket, count in after["batch_sizes"].items() if count))
+
+
+if __name__ == "__main__":
+    main()
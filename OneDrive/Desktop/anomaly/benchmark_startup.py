@@ -0,0 +1,112 @@
+"""
+Ignisyl Startup Benchmark
+Cold-start time of each entry point, measured in fresh interpreters, and
+which heavy modules (scikit-learn, plotly, pandas) each one pulls in
+
+Usage:
+    python benchmark_startup.py --repeat 5
+    python benchmark_startup.py login_page cli --history startup_history.csv
+"""
+
+import argparse
+import csv
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+HEAVY_MODULES = ["sklearn", "scipy", "plotly", "pandas", "numpy"]
+
+# name -> (script or module, function to call after loading)
+ENTRY_POINTS = {
+    "streamlit": ("streamlit", None),
+    "demo": ("demo.py", None),
+    "demo_with_whitelist": ("demo_with_whitelist.py", None),
+    "ignisyl_firewall": ("ignisyl_firewall.py", None),
+    "ignisyl_complete": ("ignisyl_complete.py", None),
+    "ignisyl_with_auth": ("ignisyl_with_auth.py", None),
+    "login_page": ("ignisyl_with_auth.py", "show_login_page"),
+    "auth_system": ("auth_system.py", None),
+    "cli": ("ignisyl_core.cli", None),
+}
+
+# Runs in the child interpreter: load the target, optionally call one
+# function, report the elapsed time and which heavy modules got imported
+CHILD = """
+import importlib, json, runpy, sys, time
+start = time.perf_counter()
+target, function, heavy = sys.argv[1], sys.argv[2], sys.argv[3].split(",")
+if target.endswith(".py"):
+    namespace = runpy.run_path(target, run_name="__startup_benchmark__")
+else:
+    namespace = vars(importlib.import_module(target))
+if function:
+    namespace[function]()
+elapsed = time.perf_counter() - start
+print(json.dumps({"seconds": elapsed, "loaded": [m for m in heavy if m in sys.modules]}))
+"""
+
+
+def measure(target, function, cwd):
+    """
+    Load one entry point in a fresh interpreter
+    Returns: (load seconds, process wall seconds, heavy modules loaded)
+    """
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-c", CHILD, target, function or "", ",".join(HEAVY_MODULES)],
+        cwd=cwd, capture_output=True, text=True
+    )
+    wall = time.perf_counter() - started
+    if result.returncode != 0:
+        raise RuntimeError(f"{target} failed to load:\n{result.stderr.strip()[-2000:]}")
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    return report["seconds"], wall, report["loaded"]
+
+
+def append_history(path, rows):
+    """Append results to a CSV so cold-start time can be tracked across changes"""
+    new_file = not os.path.exists(path)
+    with open(path, "a", newline="") as f:
+        writer = csv.writer(f)
+        if new_file:
+            writer.writerow(["recorded_at", "entry_point", "load_s", "wall_s", "heavy_modules"])
+        writer.writerows(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ignisyl cold-start benchmark")
+    parser.add_argument("entry_points", nargs="*",
+                        help=f"Entry points to measure (default: all of {', '.join(ENTRY_POINTS)})")
+    parser.add_argument("--repeat", type=int, default=3, help="Fresh interpreters per entry point")
+    parser.add_argument("--history", default=None, help="CSV file to append results to")
+    args = parser.parse_args()
+
+    cwd = os.path.dirname(os.path.abspath(__file__))
+    names = args.entry_points or list(ENTRY_POINTS)
+    unknown = [name for name in names if name not in ENTRY_POINTS]
+    if unknown:
+        parser.error(f"unknown entry point(s): {', '.join(unknown)}")
+    recorded_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    rows = []
+
+    print(f"{'entry point':<22}{'load (s)':>10}{'wall (s)':>10}  heavy modules loaded")
+    for name in names:
+        target, function = ENTRY_POINTS[name]
+        runs = [measure(target, function, cwd) for _ in range(args.repeat)]
+        load = statistics.median(run[0] for run in runs)
+        wall = statistics.median(run[1] for run in runs)
+        loaded = runs[-1][2]
+        print(f"{name:<22}{load:>10.3f}{wall:>10.3f}  {', '.join(loaded) or '-'}")
+        rows.append([recorded_at, name, f"{load:.4f}", f"{wall:.4f}", " ".join(loaded)])
+
+    if args.history:
+        append_history(args.history, rows)
+        print(f"\nAppended {len(rows)} result(s) to {args.history}")
+
+
+if __name__ == "__main__":
+    main()
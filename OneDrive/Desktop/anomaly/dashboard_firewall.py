@@ -0,0 +1,149 @@
+"""
+Ignisyl Dashboard Firewall Controller
+Turns High and Medium risk events into firewall rules for the firewall
+dashboard (ignisyl_firewall.py), with a bounded log of the actions taken.
+Kept free of Streamlit so benchmarks and scripts can import it.
+"""
+
+import platform
+import subprocess
+from collections import deque
+from datetime import datetime
+
+import pandas as pd
+
+from firewall_simulator import SimulatedRuleTable
+
+ACTION_LOG_CAPACITY = 500  # Most recent actions kept for the UI view
+
+
+class FirewallController:
+    """Real firewall integration"""
+    
+    def __init__(self, log_capacity=ACTION_LOG_CAPACITY, simulator=None):
+        self.os_type = platform.system()
+        self.test_mode = True  # Set to False for production
+        # Test mode replays the real commands against an in-process rule table
+        self.simulator = simulator or SimulatedRuleTable("netsh" if self.os_type == "Windows" else "iptables")
+        self.action_log = deque(maxlen=log_capacity)  # Ring buffer: oldest entries drop off
+        self.log_version = 0
+        self._log_frame = None
+        self._log_frame_version = -1
+    
+    def record_action(self, entry):
+        """Append an entry to the bounded action log"""
+        self.action_log.append(entry)
+        self.log_version += 1
+    
+    def action_log_frame(self):
+        """DataFrame view of the action log, rebuilt only when new actions arrive"""
+        if self._log_frame_version != self.log_version:
+            self._log_frame = pd.DataFrame(list(reversed(self.action_log)))
+            self._log_frame_version = self.log_version
+        return self._log_frame
+    
+    def _run_command(self, cmd):
+        """Run a firewall command; test mode applies it to the simulated rule table"""
+        if self.test_mode:
+            return self.simulator.execute(cmd)
+        return subprocess.run(cmd, shell=True, capture_output=True, text=True)
+    
+    def block_ip_address(self, ip_address, rule_name="Ignisyl_Block", event_ids=None):
+        """Block an IP address using system firewall"""
+        try:
+            os_type = self.simulator.os_type if self.test_mode else self.os_type
+            if os_type == "Windows":
+                cmd = f'netsh advfirewall firewall add rule name="{rule_name}_{ip_address}" dir=in action=block remoteip={ip_address}'
+            elif os_type == "Linux":
+                cmd = f'sudo iptables -A INPUT -s {ip_address} -j DROP'
+            else:
+                return False, f"Unsupported OS: {os_type}"
+            
+            result = self._run_command(cmd)
+            if self.test_mode:
+                self.record_action({
+                    "action": "BLOCK_IP",
+                    "target": ip_address,
+                    "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                    "status": "SIMULATED",
+                    "event_ids": list(event_ids or []),
+                    "rule_count": self.simulator.rule_count
+                })
+                return result.returncode == 0, f"[TEST MODE] Would block IP: {ip_address}"
+            return result.returncode == 0, result.stdout or result.stderr
+                
+        except Exception as e:
+            return False, str(e)
+    
+    def restrict_port_access(self, port, protocol="TCP", event_ids=None):
+        """Restrict access to specific port"""
+        try:
+            os_type = self.simulator.os_type if self.test_mode else self.os_type
+            if os_type == "Windows":
+                cmd = f'netsh advfirewall firewall add rule name="Ignisyl_RestrictPort_{port}" dir=in action=block protocol={protocol} localport={port}'
+            elif os_type == "Linux":
+                cmd = f'sudo iptables -A INPUT -p {protocol.lower()} --dport {port} -j DROP'
+            else:
+                return False, f"Unsupported OS: {os_type}"
+            
+            result = self._run_command(cmd)
+            if self.test_mode:
+                self.record_action({
+                    "action": "RESTRICT_PORT",
+                    "target": f"{port}/{protocol}",
+                    "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                    "status": "SIMULATED",
+                    "event_ids": list(event_ids or []),
+                    "rule_count": self.simulator.rule_count
+                })
+                return result.returncode == 0, f"[TEST MODE] Would restrict port: {port}/{protocol}"
+            return result.returncode == 0, result.stdout or result.stderr
+                
+        except Exception as e:
+            return False, str(e)
+    
+    def get_user_ip(self, pc_name):
+        """Get IP address for PC (simulated mapping)"""
+        ip_mapping = {
+            "PC-001": "192.168.1.101", "PC-002": "192.168.1.102",
+            "PC-003": "192.168.1.103", "PC-004": "192.168.1.104",
+            "PC-005": "192.168.1.105", "PC-006": "192.168.1.106",
+            "PC-007": "192.168.1.107", "PC-008": "192.168.1.108",
+        }
+        return ip_mapping.get(pc_name, "192.168.1.100")
+    
+    def apply_firewall_action(self, user, pc, risk_level, event_ids=None):
+        """Apply firewall rules based on risk level"""
+        actions = []
+        user_ip = self.get_user_ip(pc)
+        event_ids = list(event_ids or [])
+        
+        if risk_level == "High":
+            # BLOCK: Complete isolation
+            success, msg = self.block_ip_address(user_ip, f"Ignisyl_HighRisk_{user}", event_ids)
+            actions.append({
+                "type": "BLOCK IP",
+                "target": user_ip,
+                "success": success,
+                "message": msg,
+                "user": user,
+                "pc": pc,
+                "event_ids": event_ids
+            })
+            
+        elif risk_level == "Medium":
+            # RESTRICT: Block high-risk ports
+            high_risk_ports = [445, 3389, 22]  # SMB, RDP, SSH
+            for port in high_risk_ports:
+                success, msg = self.restrict_port_access(port, event_ids=event_ids)
+                actions.append({
+                    "type": "RESTRICT PORT",
+                    "target": port,
+                    "success": success,
+                    "message": msg,
+                    "user": user,
+                    "pc": pc,
+                    "event_ids": event_ids
+                })
+        
+        return actions
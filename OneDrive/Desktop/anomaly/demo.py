@@ -1,8 +1,5 @@
 import streamlit as st
-import pandas as pd
-import numpy as np
-from sklearn.ensemble import IsolationForest
-from sklearn.preprocessing import LabelEncoder, MinMaxScaler
+from ignisyl_core import get_pipeline_cache, score_file
 
 # --- Main Function to Run the Streamlit App ---
 def main():
@@ -15,66 +12,23 @@ def main():
 
     # --- 1. Load and Cache Data ---
     # Caching the data loading and processing helps the app run faster.
-    @st.cache_data
+    # Results are keyed by the file's contents in the shared pipeline cache.
     def load_and_process_data(file_path):
         """
-        Loads data, preprocesses it, trains the model, and returns a full dataframe.
+        Returns the processed dataframe for a log file, computing it on a cache miss.
         """
-        # A. Load the dataset
         try:
-            df = pd.read_csv(file_path)
+            return get_pipeline_cache().get_or_compute("demo", file_path, (), lambda: process_data(file_path))
         except FileNotFoundError:
             st.error(f"Error: '{file_path}' not found. Please make sure the dataset is in the correct directory.")
             return None
 
-        # B. Preprocessing and Feature Engineering
-        df['date'] = pd.to_datetime(df['date'])
-        df['hour_of_day'] = df['date'].dt.hour
-        df['day_of_week'] = df['date'].dt.dayofweek # Monday=0, Sunday=6
-        
-        le_user = LabelEncoder()
-        le_pc = LabelEncoder()
-        le_activity = LabelEncoder()
-        df['user_encoded'] = le_user.fit_transform(df['user'])
-        df['pc_encoded'] = le_pc.fit_transform(df['pc'])
-        df['activity_encoded'] = le_activity.fit_transform(df['activity'])
-
-        features_for_model = ['user_encoded', 'pc_encoded', 'activity_encoded', 'hour_of_day', 'day_of_week']
-        X = df[features_for_model]
-
-        # C. Train the Isolation Forest Model
-        model = IsolationForest(contamination=0.01, random_state=42)
-        model.fit(X)
-        df['anomaly_score'] = model.decision_function(X)
-        
-        # D. Develop the Dynamic Risk Score (0-100)
-        scaler = MinMaxScaler(feature_range=(0, 100))
-        scores = df['anomaly_score'].values.reshape(-1, 1)
-        # Invert scores: lower anomaly score (more anomalous) -> higher risk score
-        inverted_scores = -scores + max(scores)
-        df['risk_score'] = scaler.fit_transform(inverted_scores).round(2)
-
-        # E. Assign Risk Level
-        def assign_risk_level(score):
-            if score > 85:
-                return 'High'
-            elif score > 60:
-                return 'Medium'
-            else:
-                return 'Low'
-        df['risk_level'] = df['risk_score'].apply(assign_risk_level)
-
-        # F. Simulate Adaptive Firewall Action
-        def adaptive_firewall_action(risk_level):
-            if risk_level == 'High':
-                return "BLOCK"
-            elif risk_level == 'Medium':
-                return "RESTRICT"
-            else:
-                return "ALLOW"
-        df['firewall_action'] = df['risk_level'].apply(adaptive_firewall_action)
-        
-        return df
+    def process_data(file_path):
+        """
+        Loads data, trains the Isolation Forest, and returns a full dataframe
+        with dynamic risk scores (0-100), risk levels and firewall actions.
+        """
+        return score_file(file_path, contamination=0.01, precision=2)
 
     # --- 2. Run Analysis and Display Dashboard ---
     df_processed = load_and_process_data("logon.csv")
@@ -107,6 +61,8 @@ def main():
         if st.checkbox("Show all analyzed logs"):
             st.dataframe(df_processed)
 
+        st.caption(get_pipeline_cache().summary())
+
 # --- Script Entry Point ---
 if __name__ == '__main__':
     main()
@@ -1,12 +1,10 @@
 import streamlit as st
-import pandas as pd
-import numpy as np
-from sklearn.ensemble import IsolationForest
-from sklearn.preprocessing import LabelEncoder, MinMaxScaler
 from datetime import datetime
 import json
 import os
-import time
+from alert_paging import alert_filter_controls, current_page, page_navigation, query_alerts
+from warmup import PipelineWarmup, run_splash
+from ignisyl_core import WHITELIST_FILE, get_pipeline_cache, load_whitelist, save_whitelist, score_file
 
 # --- Page Configuration ---
 st.set_page_config(
@@ -142,6 +140,10 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # --- Welcome/Loading Page ---
+WELCOME_MIN_SECONDS = 3.5
+DEFAULT_DATA_FILE = "logon.csv"
+DEFAULT_CONTAMINATION = 0.01
+
 def show_welcome_page():
     """Display animated welcome page with heartbeat"""
     st.markdown("""
@@ -189,40 +191,20 @@ def show_welcome_page():
         </div>
     """, unsafe_allow_html=True)
     
-    # Simulate loading with progress
-    progress_placeholder = st.empty()
-    
-    loading_steps = [
-        "Loading AI Models...",
-        "Scanning Activity Logs...",
-        "Analyzing Patterns...",
-        "Initializing Firewall...",
-        "System Ready!"
-    ]
-    
-    for i, step in enumerate(loading_steps):
-        time.sleep(0.6)
-        progress = (i + 1) / len(loading_steps)
+    # Score the default log file in the background while the splash is up
+    if 'warmup' not in st.session_state:
+        st.session_state.warmup = PipelineWarmup(
+            cached_score_activity_logs, (DEFAULT_DATA_FILE, DEFAULT_CONTAMINATION)
+        ).start()
     
-    time.sleep(0.5)
+    progress_bar = st.progress(0.0)
+    status_text = st.empty()
+    run_splash(st.session_state.warmup, progress_bar, status_text, min_duration=WELCOME_MIN_SECONDS)
     return True
 
 # --- Whitelist Management Functions ---
-WHITELIST_FILE = "whitelist.json"
 FEEDBACK_FILE = "analyst_feedback.json"
 
-def load_whitelist():
-    """Load whitelist from JSON file"""
-    if os.path.exists(WHITELIST_FILE):
-        with open(WHITELIST_FILE, 'r') as f:
-            return json.load(f)
-    return {"users": [], "activities": [], "user_activity_pairs": [], "user_pc_pairs": []}
-
-def save_whitelist(whitelist):
-    """Save whitelist to JSON file"""
-    with open(WHITELIST_FILE, 'w') as f:
-        json.dump(whitelist, f, indent=4)
-
 def load_feedback():
     """Load analyst feedback history"""
     if os.path.exists(FEEDBACK_FILE):
@@ -274,23 +256,62 @@ def remove_from_whitelist(whitelist_type, value):
         return True
     return False
 
-def is_whitelisted(row, whitelist):
-    """Check if an activity should be whitelisted"""
-    user = row['user']
-    activity = row['activity']
-    pc = row['pc']
+# --- Scoring Pipeline ---
+WHITELIST_ACTION_LABELS = {
+    "High": "🚫 BLOCKED",
+    "Medium": "⚠️ RESTRICTED",
+    "Low": "✅ ALLOWED",
+    "whitelisted": "✅ ALLOWED (Whitelisted)"
+}
+
+def score_activity_logs(file_path, contamination_level, progress=None):
+    """
+    Load, score and whitelist-check a log file with the core pipeline
+    Streamlit-free so it can run on the warm-up thread; raises on bad input
+    """
+    return score_file(
+        file_path, whitelist=load_whitelist(), action_labels=WHITELIST_ACTION_LABELS,
+        contamination=contamination_level, precision=2, progress=progress
+    )
+
+def cached_score_activity_logs(file_path, contamination_level, progress=None):
+    """Scoring pipeline behind the shared content-addressed cache (log + whitelist contents)"""
+    return get_pipeline_cache().get_or_compute(
+        "demo_with_whitelist", file_path, (contamination_level,),
+        lambda: score_activity_logs(file_path, contamination_level, progress),
+        depends_on=(WHITELIST_FILE,)
+    )
+
+def load_and_process_data(file_path, contamination_level):
+    try:
+        return cached_score_activity_logs(file_path, contamination_level)
+    except FileNotFoundError:
+        st.error(f"❌ Error: File '{file_path}' not found!")
+        st.info("Please check the file path in the sidebar.")
+        return None
+    except Exception as e:
+        st.error(f"❌ Error loading file: {str(e)}")
+        return None
+
+def _load_scored_logs(file_path, contamination_level):
+    """Run (or fetch from cache) the scoring pipeline"""
+    with st.spinner("🔄 Loading and analyzing data..."):
+        return load_and_process_data(file_path, contamination_level)
+
+# --- Lazy Data Context ---
+class DataContext:
+    """
+    Data shared by pages, built on first request and reused for the rest of the run
+    """
     
-    # Check individual whitelists
-    if any(item["value"] == user for item in whitelist.get("users", [])):
-        return True
-    if any(item["value"] == activity for item in whitelist.get("activities", [])):
-        return True
-    if any(item["value"] == f"{user}|{activity}" for item in whitelist.get("user_activity_pairs", [])):
-        return True
-    if any(item["value"] == f"{user}|{pc}" for item in whitelist.get("user_pc_pairs", [])):
-        return True
+    def __init__(self, loaders):
+        self._loaders = loaders
+        self._values = {}
     
-    return False
+    def get(self, name):
+        if name not in self._values:
+            self._values[name] = self._loaders[name]()
+        return self._values[name]
 
 # --- Main Function ---
 def main():
@@ -328,7 +349,7 @@ def main():
         st.divider()
         
         st.subheader("📁 Data Source")
-        data_file = st.text_input("Log File Path", value="logon.csv", help="Path to your CSV log file")
+        data_file = st.text_input("Log File Path", value=DEFAULT_DATA_FILE, help="A CSV log file (optionally .gz), a folder of logs, or a glob such as logs/*.csv")
         
         st.divider()
         
@@ -337,7 +358,7 @@ def main():
             "Anomaly Detection Sensitivity", 
             min_value=0.01, 
             max_value=0.10, 
-            value=0.01, 
+            value=DEFAULT_CONTAMINATION, 
             step=0.01,
             help="Lower = More sensitive (more alerts)"
         )
@@ -356,96 +377,33 @@ def main():
         st.subheader("📋 Navigation")
         page = st.radio("Go to:", ["🏠 Dashboard", "✅ Whitelist Manager", "📊 Feedback History"])
 
-    # Load whitelist
-    whitelist = load_whitelist()
-
-    # --- Load and Process Data ---
-    @st.cache_data
-    def load_and_process_data(file_path, contamination_level):
-        try:
-            df = pd.read_csv(file_path)
-        except FileNotFoundError:
-            st.error(f"❌ Error: File '{file_path}' not found!")
-            st.info("Please check the file path in the sidebar.")
-            return None
-        except Exception as e:
-            st.error(f"❌ Error loading file: {str(e)}")
-            return None
-
-        # Preprocessing
-        df['date'] = pd.to_datetime(df['date'])
-        df['hour_of_day'] = df['date'].dt.hour
-        df['day_of_week'] = df['date'].dt.dayofweek
-        
-        # Encoding
-        le_user = LabelEncoder()
-        le_pc = LabelEncoder()
-        le_activity = LabelEncoder()
-        df['user_encoded'] = le_user.fit_transform(df['user'])
-        df['pc_encoded'] = le_pc.fit_transform(df['pc'])
-        df['activity_encoded'] = le_activity.fit_transform(df['activity'])
-
-        # Model Training
-        features_for_model = ['user_encoded', 'pc_encoded', 'activity_encoded', 'hour_of_day', 'day_of_week']
-        X = df[features_for_model]
-        
-        model = IsolationForest(contamination=contamination_level, random_state=42)
-        model.fit(X)
-        df['anomaly_score'] = model.decision_function(X)
-        
-        # Risk Score Calculation
-        scaler = MinMaxScaler(feature_range=(0, 100))
-        scores = df['anomaly_score'].values.reshape(-1, 1)
-        inverted_scores = -scores + max(scores)
-        df['risk_score'] = scaler.fit_transform(inverted_scores).round(2)
-
-        # Risk Level Assignment
-        def assign_risk_level(score):
-            if score > 85:
-                return 'High'
-            elif score > 60:
-                return 'Medium'
-            else:
-                return 'Low'
-        
-        df['risk_level'] = df['risk_score'].apply(assign_risk_level)
-
-        # Check whitelist status
-        df['is_whitelisted'] = df.apply(lambda row: is_whitelisted(row, whitelist), axis=1)
-
-        # Firewall Action
-        def adaptive_firewall_action(row):
-            if row['is_whitelisted']:
-                return "✅ ALLOWED (Whitelisted)"
-            elif row['risk_level'] == 'High':
-                return "🚫 BLOCKED"
-            elif row['risk_level'] == 'Medium':
-                return "⚠️ RESTRICTED"
-            else:
-                return "✅ ALLOWED"
-        
-        df['firewall_action'] = df.apply(adaptive_firewall_action, axis=1)
-        
-        # Format date for display
-        df['timestamp'] = df['date'].dt.strftime('%Y-%m-%d %H:%M:%S')
-        
-        return df
-
-    # Load Data
-    with st.spinner("🔄 Loading and analyzing data..."):
-        df_processed = load_and_process_data(data_file, contamination)
+    # --- Lazy Data Context ---
+    # Nothing is loaded up front; the page router asks for what the page declares
+    context = DataContext({
+        "scored_logs": lambda: _load_scored_logs(data_file, contamination),
+        "whitelist": load_whitelist,
+        "feedback": load_feedback,
+    })
+    settings = {
+        "analyst_name": analyst_name,
+        "apply_whitelist": apply_whitelist,
+        "show_high_only": show_high_only,
+        "show_medium_only": show_medium_only,
+    }
 
-    if df_processed is not None:
-        
-        # --- PAGE ROUTING ---
-        if page == "🏠 Dashboard":
-            show_dashboard(df_processed, whitelist, apply_whitelist, show_high_only, show_medium_only, analyst_name)
-        elif page == "✅ Whitelist Manager":
-            show_whitelist_manager(df_processed, analyst_name)
-        elif page == "📊 Feedback History":
-            show_feedback_history()
+    # --- PAGE ROUTING ---
+    render_page(page, context, settings)
+    st.sidebar.caption(get_pipeline_cache().summary())
 
 # --- Dashboard Page ---
+ALERT_SORT_OPTIONS = {
+    "Risk score (high → low)": ("risk_score", False),
+    "Risk score (low → high)": ("risk_score", True),
+    "Newest first": ("date", False),
+    "Oldest first": ("date", True),
+    "User (A → Z)": ("user", True),
+}
+
 def show_dashboard(df_processed, whitelist, apply_whitelist, show_high_only, show_medium_only, analyst_name):
     # Filter out whitelisted items if enabled
     if apply_whitelist:
@@ -513,12 +471,20 @@ def show_dashboard(df_processed, whitelist, apply_whitelist, show_high_only, sho
         st.header("🔴 Critical Threat Alerts")
         st.markdown("**Review and take action on these activities**")
         
-        high_risk_df = df_display[
-            (df_display['risk_level'] == 'High') & (~df_display['is_whitelisted'])
-        ].sort_values(by='risk_score', ascending=False).reset_index(drop=True)
+        search, sort_by, ascending, page_size = alert_filter_controls("high_alerts", ALERT_SORT_OPTIONS)
+        high_risk_page, total_alerts, page = query_alerts(
+            df_display,
+            mask=(df_display['risk_level'] == 'High') & (~df_display['is_whitelisted']),
+            search=search,
+            sort_by=sort_by,
+            ascending=ascending,
+            page=current_page("high_alerts"),
+            page_size=page_size
+        )
         
-        for idx, row in high_risk_df.iterrows():
-            with st.expander(f"🔴 Alert #{idx+1}: {row['user']} - {row['activity']} (Risk: {row['risk_score']})"):
+        # Widgets are created for the visible page only; keys use the stable event ID
+        for position, (idx, row) in enumerate(high_risk_page.iterrows(), start=page * page_size + 1):
+            with st.expander(f"🔴 Alert #{position}: {row['user']} - {row['activity']} (Risk: {row['risk_score']})"):
                 col1, col2 = st.columns([2, 1])
                 
                 with col1:
@@ -574,6 +540,8 @@ def show_dashboard(df_processed, whitelist, apply_whitelist, show_high_only, sho
                             else:
                                 st.error("Please provide a reason for whitelisting.")
         
+        page_navigation("high_alerts", page, total_alerts, page_size)
+        
         st.divider()
 
     # --- Medium-Risk Alerts with Whitelist Option ---
@@ -648,12 +616,10 @@ def show_dashboard(df_processed, whitelist, apply_whitelist, show_high_only, sho
         st.divider()
 
 # --- Whitelist Manager Page ---
-def show_whitelist_manager(df_processed, analyst_name):
+def show_whitelist_manager(whitelist, analyst_name):
     st.header("✅ Whitelist Management")
     st.markdown("**Manage trusted users, activities, and combinations**")
     
-    whitelist = load_whitelist()
-    
     tabs = st.tabs(["👤 Users", "📋 Activities", "🔗 User+Activity Pairs", "💻 User+PC Pairs"])
     
     # Users Tab
@@ -733,12 +699,10 @@ def show_whitelist_manager(df_processed, analyst_name):
             st.info("No user+PC pairs whitelisted yet.")
 
 # --- Feedback History Page ---
-def show_feedback_history():
+def show_feedback_history(feedback):
     st.header("📊 Analyst Feedback History")
     st.markdown("**Audit trail of all whitelist decisions**")
     
-    feedback = load_feedback()
-    
     if feedback:
         # Reverse to show newest first
         for idx, entry in enumerate(reversed(feedback)):
@@ -754,5 +718,35 @@ def show_feedback_history():
     else:
         st.info("No feedback history yet.")
 
+# --- Page Registry ---
+# Each page declares the data it needs; only those loaders run. The scoring
+# pipeline (CSV read + model fit) is skipped for pages that don't ask for it.
+def _render_dashboard(data, settings):
+    show_dashboard(data["scored_logs"], data["whitelist"], settings["apply_whitelist"],
+                   settings["show_high_only"], settings["show_medium_only"], settings["analyst_name"])
+
+def _render_whitelist_manager(data, settings):
+    show_whitelist_manager(data["whitelist"], settings["analyst_name"])
+
+def _render_feedback_history(data, settings):
+    show_feedback_history(data["feedback"])
+
+PAGES = {
+    "🏠 Dashboard": {"needs": ["scored_logs", "whitelist"], "render": _render_dashboard},
+    "✅ Whitelist Manager": {"needs": ["whitelist"], "render": _render_whitelist_manager},
+    "📊 Feedback History": {"needs": ["feedback"], "render": _render_feedback_history},
+}
+
+def render_page(page, context, settings):
+    """Resolve the page's declared data, then render it"""
+    spec = PAGES[page]
+    data = {}
+    for name in spec["needs"]:
+        data[name] = context.get(name)
+        if data[name] is None:
+            # Loader already reported the problem (e.g. missing log file)
+            return
+    spec["render"](data, settings)
+
 if __name__ == '__main__':
     main()
@@ -3,28 +3,117 @@ Ignisyl Firewall Integration Module
 Integrates with Windows Firewall to enforce blocking decisions
 """
 
+import os
 import subprocess
 import platform
 import logging
+import logging.handlers
+import queue
+import atexit
+import json
+import threading
 from datetime import datetime
 
+# --- Action Logging ---
+ACTION_LOGGER_NAME = "ignisyl.firewall"
+_log_listeners = {}   # resolved log path -> (logger, QueueListener, rotation settings)
+_log_listeners_lock = threading.Lock()
+
+class JsonLineFormatter(logging.Formatter):
+    """
+    Format log records as one JSON object per line
+    Structured fields passed via extra={"fields": {...}} are merged in
+    """
+    
+    def format(self, record):
+        entry = {
+            "timestamp": datetime.fromtimestamp(record.created).strftime("%Y-%m-%d %H:%M:%S"),
+            "level": record.levelname,
+            "message": record.getMessage()
+        }
+        entry.update(getattr(record, "fields", {}))
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def setup_action_logger(log_file="firewall_actions.log", max_bytes=5 * 1024 * 1024, backup_count=5):
+    """
+    Return the firewall action logger for a log file
+    Records are queued by the caller and written as JSON lines by a
+    background listener thread into a size-rotated log file; each file
+    gets its own logger and listener, shared by every caller using it
+    """
+    path = os.path.realpath(log_file)
+    settings = (max_bytes, backup_count)
+    with _log_listeners_lock:
+        if path in _log_listeners:
+            logger, _, open_settings = _log_listeners[path]
+            if open_settings != settings:
+                raise ValueError(f"{log_file} is already open with max_bytes={open_settings[0]}, "
+                                 f"backup_count={open_settings[1]}")
+            return logger
+        
+        file_handler = logging.handlers.RotatingFileHandler(
+            path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8"
+        )
+        file_handler.setFormatter(JsonLineFormatter())
+        
+        # Unbounded queue: callers never block on disk I/O
+        log_queue = queue.Queue()
+        logger = logging.getLogger(f"{ACTION_LOGGER_NAME}.{len(_log_listeners)}")
+        logger.addHandler(logging.handlers.QueueHandler(log_queue))
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        
+        listener = logging.handlers.QueueListener(log_queue, file_handler)
+        listener.start()
+        if not _log_listeners:
+            atexit.register(shutdown_action_logger)
+        _log_listeners[path] = (logger, listener, settings)
+    
+    return logger
+
+
+def shutdown_action_logger():
+    """
+    Flush queued records and stop every background log writer
+    """
+    with _log_listeners_lock:
+        for logger, listener, _ in _log_listeners.values():
+            listener.stop()
+            for handler in listener.handlers:
+                handler.close()
+            for handler in list(logger.handlers):
+                if isinstance(handler, logging.handlers.QueueHandler):
+                    logger.removeHandler(handler)
+        _log_listeners.clear()
+        atexit.unregister(shutdown_action_logger)
+
+
 class FirewallController:
     """
     Controls Windows/Linux firewall based on threat detection
     """
     
-    def __init__(self):
-        self.os_type = platform.system()
+    def __init__(self, simulator=None, log_file="firewall_actions.log"):
+        # An attached SimulatedRuleTable receives every command instead of the OS
+        self.simulator = simulator
+        self.os_type = simulator.os_type if simulator else platform.system()
         self.blocked_ips = set()
         self.blocked_users = set()
-        self.log_file = "firewall_actions.log"
+        self.log_file = log_file
         
-        # Setup logging
-        logging.basicConfig(
-            filename=self.log_file,
-            level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - %(message)s'
-        )
+        # Setup logging (queued JSON lines, rotated by size)
+        self.logger = setup_action_logger(self.log_file)
+    
+    def _run_command(self, cmd):
+        """
+        Run a firewall command, or apply it to the simulator when attached
+        """
+        if self.simulator is not None:
+            return self.simulator.execute(cmd)
+        return subprocess.run(cmd, shell=True, capture_output=True, text=True)
     
     def block_ip_address(self, ip_address, rule_name="Ignisyl_Block"):
         """
@@ -34,33 +123,33 @@ class FirewallController:
             if self.os_type == "Windows":
                 # Windows Firewall command
                 cmd = f'netsh advfirewall firewall add rule name="{rule_name}_{ip_address}" dir=in action=block remoteip={ip_address}'
-                result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
+                result = self._run_command(cmd)
                 
                 if result.returncode == 0:
                     self.blocked_ips.add(ip_address)
-                    logging.info(f"BLOCKED IP: {ip_address}")
+                    self.logger.info(f"BLOCKED IP: {ip_address}", extra={"fields": {"action": "BLOCK_IP", "target": ip_address, "rule": rule_name}})
                     return True, f"Successfully blocked {ip_address}"
                 else:
-                    logging.error(f"Failed to block {ip_address}: {result.stderr}")
+                    self.logger.error(f"Failed to block {ip_address}: {result.stderr}", extra={"fields": {"action": "BLOCK_IP", "target": ip_address, "rule": rule_name}})
                     return False, result.stderr
                     
             elif self.os_type == "Linux":
                 # Linux iptables command
                 cmd = f'sudo iptables -A INPUT -s {ip_address} -j DROP'
-                result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
+                result = self._run_command(cmd)
                 
                 if result.returncode == 0:
                     self.blocked_ips.add(ip_address)
-                    logging.info(f"BLOCKED IP: {ip_address}")
+                    self.logger.info(f"BLOCKED IP: {ip_address}", extra={"fields": {"action": "BLOCK_IP", "target": ip_address, "rule": rule_name}})
                     return True, f"Successfully blocked {ip_address}"
                 else:
-                    logging.error(f"Failed to block {ip_address}: {result.stderr}")
+                    self.logger.error(f"Failed to block {ip_address}: {result.stderr}", extra={"fields": {"action": "BLOCK_IP", "target": ip_address, "rule": rule_name}})
                     return False, result.stderr
             else:
                 return False, f"Unsupported OS: {self.os_type}"
                 
         except Exception as e:
-            logging.error(f"Error blocking IP {ip_address}: {str(e)}")
+            self.logger.error(f"Error blocking IP {ip_address}: {str(e)}", extra={"fields": {"action": "BLOCK_IP", "target": ip_address}})
             return False, str(e)
     
     def unblock_ip_address(self, ip_address, rule_name="Ignisyl_Block"):
@@ -70,28 +159,28 @@ class FirewallController:
         try:
             if self.os_type == "Windows":
                 cmd = f'netsh advfirewall firewall delete rule name="{rule_name}_{ip_address}"'
-                result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
+                result = self._run_command(cmd)
                 
                 if result.returncode == 0:
                     self.blocked_ips.discard(ip_address)
-                    logging.info(f"UNBLOCKED IP: {ip_address}")
+                    self.logger.info(f"UNBLOCKED IP: {ip_address}", extra={"fields": {"action": "UNBLOCK_IP", "target": ip_address, "rule": rule_name}})
                     return True, f"Successfully unblocked {ip_address}"
                 else:
                     return False, result.stderr
                     
             elif self.os_type == "Linux":
                 cmd = f'sudo iptables -D INPUT -s {ip_address} -j DROP'
-                result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
+                result = self._run_command(cmd)
                 
                 if result.returncode == 0:
                     self.blocked_ips.discard(ip_address)
-                    logging.info(f"UNBLOCKED IP: {ip_address}")
+                    self.logger.info(f"UNBLOCKED IP: {ip_address}", extra={"fields": {"action": "UNBLOCK_IP", "target": ip_address, "rule": rule_name}})
                     return True, f"Successfully unblocked {ip_address}"
                 else:
                     return False, result.stderr
                     
         except Exception as e:
-            logging.error(f"Error unblocking IP {ip_address}: {str(e)}")
+            self.logger.error(f"Error unblocking IP {ip_address}: {str(e)}", extra={"fields": {"action": "UNBLOCK_IP", "target": ip_address}})
             return False, str(e)
     
     def block_user_network_access(self, username):
@@ -103,11 +192,11 @@ class FirewallController:
             if self.os_type == "Windows":
                 # Disable network adapter for user
                 cmd = f'netsh advfirewall firewall add rule name="Ignisyl_BlockUser_{username}" dir=out action=block enable=yes profile=any localip=any remoteip=any protocol=any interfacetype=any'
-                result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
+                result = self._run_command(cmd)
                 
                 if result.returncode == 0:
                     self.blocked_users.add(username)
-                    logging.info(f"BLOCKED USER NETWORK ACCESS: {username}")
+                    self.logger.info(f"BLOCKED USER NETWORK ACCESS: {username}", extra={"fields": {"action": "BLOCK_USER", "target": username}})
                     return True, f"Successfully blocked network access for {username}"
                 else:
                     return False, result.stderr
@@ -115,7 +204,7 @@ class FirewallController:
                 return False, "User-level blocking only supported on Windows"
                 
         except Exception as e:
-            logging.error(f"Error blocking user {username}: {str(e)}")
+            self.logger.error(f"Error blocking user {username}: {str(e)}", extra={"fields": {"action": "BLOCK_USER", "target": username}})
             return False, str(e)
     
     def restrict_port_access(self, port, protocol="TCP"):
@@ -125,26 +214,26 @@ class FirewallController:
         try:
             if self.os_type == "Windows":
                 cmd = f'netsh advfirewall firewall add rule name="Ignisyl_RestrictPort_{port}" dir=in action=block protocol={protocol} localport={port}'
-                result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
+                result = self._run_command(cmd)
                 
                 if result.returncode == 0:
-                    logging.info(f"RESTRICTED PORT: {port}/{protocol}")
+                    self.logger.info(f"RESTRICTED PORT: {port}/{protocol}", extra={"fields": {"action": "RESTRICT_PORT", "target": f"{port}/{protocol}"}})
                     return True, f"Successfully restricted port {port}"
                 else:
                     return False, result.stderr
                     
             elif self.os_type == "Linux":
                 cmd = f'sudo iptables -A INPUT -p {protocol.lower()} --dport {port} -j DROP'
-                result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
+                result = self._run_command(cmd)
                 
                 if result.returncode == 0:
-                    logging.info(f"RESTRICTED PORT: {port}/{protocol}")
+                    self.logger.info(f"RESTRICTED PORT: {port}/{protocol}", extra={"fields": {"action": "RESTRICT_PORT", "target": f"{port}/{protocol}"}})
                     return True, f"Successfully restricted port {port}"
                 else:
                     return False, result.stderr
                     
         except Exception as e:
-            logging.error(f"Error restricting port {port}: {str(e)}")
+            self.logger.error(f"Error restricting port {port}: {str(e)}", extra={"fields": {"action": "RESTRICT_PORT", "target": f"{port}/{protocol}"}})
             return False, str(e)
     
     def get_firewall_status(self):
@@ -154,11 +243,11 @@ class FirewallController:
         try:
             if self.os_type == "Windows":
                 cmd = 'netsh advfirewall show allprofiles state'
-                result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
+                result = self._run_command(cmd)
                 return result.stdout
             elif self.os_type == "Linux":
                 cmd = 'sudo iptables -L -n'
-                result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
+                result = self._run_command(cmd)
                 return result.stdout
             else:
                 return "Unsupported OS"
@@ -220,7 +309,8 @@ class FirewallController:
             success, msg = self.block_user_network_access(user)
             actions_taken.append(("Block User", success, msg))
             
-            logging.critical(f"HIGH RISK - BLOCKED: User={user}, PC={pc}, IP={user_ip}")
+            self.logger.critical(f"HIGH RISK - BLOCKED: User={user}, PC={pc}, IP={user_ip}",
+                                 extra={"fields": {"risk_level": risk_level, "user": user, "pc": pc, "ip": user_ip}})
             
         elif risk_level == "Medium":
             # RESTRICT: Block specific high-risk ports
@@ -229,18 +319,29 @@ class FirewallController:
                 success, msg = self.restrict_port_access(port)
                 actions_taken.append((f"Restrict Port {port}", success, msg))
             
-            logging.warning(f"MEDIUM RISK - RESTRICTED: User={user}, PC={pc}")
+            self.logger.warning(f"MEDIUM RISK - RESTRICTED: User={user}, PC={pc}",
+                                extra={"fields": {"risk_level": risk_level, "user": user, "pc": pc}})
         
         return actions_taken
 
 
 # Example usage and testing
 if __name__ == "__main__":
+    import sys
+    from firewall_simulator import SimulatedRuleTable
+    
+    # Runs against the in-process simulator unless --live is given
+    live = "--live" in sys.argv
+    
     print("=" * 60)
-    print("IGNISYL FIREWALL CONTROLLER - TEST MODE")
+    print("IGNISYL FIREWALL CONTROLLER - " + ("LIVE MODE" if live else "TEST MODE (SIMULATED)"))
     print("=" * 60)
     
-    firewall = FirewallController()
+    if live:
+        firewall = FirewallController()
+    else:
+        strategy = "netsh" if platform.system() == "Windows" else "iptables"
+        firewall = FirewallController(simulator=SimulatedRuleTable(strategy))
     
     print(f"\n🖥️  Operating System: {firewall.os_type}")
     print(f"📋 Log File: {firewall.log_file}")
@@ -275,6 +376,11 @@ if __name__ == "__main__":
     print(f"Blocked Users: {blocked['blocked_users']}")
     print(f"Timestamp: {blocked['timestamp']}")
     
+    if firewall.simulator is not None:
+        print("\n4️⃣  Simulated Rule Table:")
+        print("-" * 60)
+        print(firewall.simulator.describe())
+    
     print("\n" + "=" * 60)
-    print("⚠️  NOTE: Actual firewall modifications require administrator privileges")
+    print("⚠️  NOTE: Actual firewall modifications require administrator privileges (run with --live)")
     print("=" * 60)
@@ -0,0 +1,247 @@
+"""
+Ignisyl Firewall Simulator
+In-process model of the firewall rule table for test mode and benchmarking
+"""
+
+import shlex
+import subprocess
+
+# Cost model used to turn rule evaluations into an estimated per-packet latency
+RULE_MATCH_NS = 40    # Comparing a packet against one chain rule
+SET_LOOKUP_NS = 60    # One hash/bitmap membership test (ipset)
+
+STRATEGIES = ["iptables", "ipset", "netsh"]
+
+
+class SimulatedRuleTable:
+    """
+    Simulates the rule table behind one firewall backend strategy
+
+    - iptables: rules are appended to a linear INPUT chain and packets
+      walk the chain in order, so match cost grows with the rule count.
+      `-A` does not de-duplicate, exactly like the real tool.
+    - ipset: blocked sources and ports live in hash/bitmap sets that a
+      fixed pair of chain rules references, so match cost is constant.
+    - netsh: Windows Firewall named rules. Duplicate names are allowed
+      and inbound block rules are evaluated one by one.
+
+    Commands are accepted as the same strings FirewallController passes
+    to subprocess.run and answered with a subprocess.CompletedProcess.
+    """
+
+    def __init__(self, strategy="iptables"):
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown strategy: {strategy}")
+        self.strategy = strategy
+        self.os_type = "Windows" if strategy == "netsh" else "Linux"
+        self.rules = []              # Ordered chain (iptables / netsh)
+        self.blocked_sources = set()  # ipset hash:ip
+        self.blocked_ports = set()    # ipset bitmap:port
+        self.commands_executed = 0
+        self.peak_rule_count = 0
+
+    # --- Command handling ---
+    def execute(self, cmd):
+        """
+        Apply a firewall command string to the simulated table
+        """
+        self.commands_executed += 1
+        try:
+            args = shlex.split(cmd)
+        except ValueError as e:
+            return self._result(cmd, 1, stderr=str(e))
+
+        if args and args[0] == "sudo":
+            args = args[1:]
+
+        if args and args[0] == "iptables" and self.strategy != "netsh":
+            result = self._execute_iptables(cmd, args[1:])
+        elif args and args[0] == "netsh" and self.strategy == "netsh":
+            result = self._execute_netsh(cmd, args[1:])
+        else:
+            result = self._result(cmd, 127, stderr=f"{args[0] if args else cmd}: command not found")
+
+        self.peak_rule_count = max(self.peak_rule_count, self.rule_count)
+        return result
+
+    def _execute_iptables(self, cmd, args):
+        if args[:2] == ["-L", "-n"]:
+            return self._result(cmd, 0, stdout=self.describe())
+
+        if len(args) < 2 or args[0] not in ("-A", "-D") or args[1] != "INPUT":
+            return self._result(cmd, 2, stderr="iptables: Bad argument")
+
+        try:
+            rule = self._parse_iptables_rule(args[2:])
+        except ValueError as e:
+            return self._result(cmd, 2, stderr=f"iptables: {e}")
+        if rule is None:
+            return self._result(cmd, 2, stderr="iptables: Bad argument")
+
+        if args[0] == "-A":
+            if self.strategy == "ipset":
+                self._add_to_sets(rule)
+            else:
+                self.rules.append(rule)
+            return self._result(cmd, 0)
+
+        # -D removes the first matching rule
+        if self.strategy == "ipset":
+            removed = self._remove_from_sets(rule)
+        else:
+            removed = self._remove_first(rule)
+        if removed:
+            return self._result(cmd, 0)
+        return self._result(cmd, 1, stderr="iptables: Bad rule (does a matching rule exist in that chain?).")
+
+    def _parse_iptables_rule(self, args):
+        """
+        Rule for the options after the chain, or None for an unknown option
+        Raises ValueError for a missing or malformed option value
+        """
+        rule = {"name": None, "dir": "in", "src": None, "proto": None, "port": None}
+        i = 0
+        while i < len(args):
+            flag = args[i]
+            if flag not in ("-s", "-p", "--dport", "-j"):
+                return None
+            if i + 1 >= len(args):
+                raise ValueError(f'option "{flag}" requires an argument')
+            value = args[i + 1]
+            if flag == "-s":
+                rule["src"] = value
+            elif flag == "-p":
+                rule["proto"] = value.lower()
+            elif flag == "--dport":
+                if not value.isdigit():
+                    raise ValueError(f'invalid port/service "{value}" specified')
+                rule["port"] = int(value)
+            elif flag == "-j":
+                if value != "DROP":
+                    return None
+            i += 2
+        return rule
+
+    def _execute_netsh(self, cmd, args):
+        if args[:3] == ["advfirewall", "show", "allprofiles"]:
+            return self._result(cmd, 0, stdout="Domain Profile Settings:\nState ON\n")
+
+        if args[:2] != ["advfirewall", "firewall"] or len(args) < 4:
+            return self._result(cmd, 1, stderr="The following command was not found.")
+
+        verb = " ".join(args[2:4])
+        options = {}
+        for token in args[4:]:
+            if "=" in token:
+                key, value = token.split("=", 1)
+                options[key.lower()] = value
+
+        if verb == "add rule":
+            rule = {
+                "name": options.get("name"),
+                "dir": options.get("dir", "in"),
+                "src": None if options.get("remoteip", "any") == "any" else options["remoteip"],
+                "proto": None if options.get("protocol", "any") == "any" else options["protocol"].lower(),
+                "port": int(options["localport"]) if "localport" in options else None
+            }
+            self.rules.append(rule)
+            return self._result(cmd, 0, stdout="Ok.\n")
+
+        if verb == "delete rule":
+            before = len(self.rules)
+            self.rules = [rule for rule in self.rules if rule["name"] != options.get("name")]
+            deleted = before - len(self.rules)
+            if deleted:
+                return self._result(cmd, 0, stdout=f"\nDeleted {deleted} rule(s).\nOk.\n")
+            return self._result(cmd, 1, stdout="No rules match the specified criteria.\n")
+
+        return self._result(cmd, 1, stderr="The following command was not found.")
+
+    def _add_to_sets(self, rule):
+        if rule["src"]:
+            self.blocked_sources.add(rule["src"])
+        if rule["port"] is not None:
+            self.blocked_ports.add((rule["proto"], rule["port"]))
+
+    def _remove_from_sets(self, rule):
+        if rule["src"] and rule["src"] in self.blocked_sources:
+            self.blocked_sources.discard(rule["src"])
+            return True
+        if rule["port"] is not None and (rule["proto"], rule["port"]) in self.blocked_ports:
+            self.blocked_ports.discard((rule["proto"], rule["port"]))
+            return True
+        return False
+
+    def _remove_first(self, rule):
+        for i, existing in enumerate(self.rules):
+            if all(existing[key] == rule[key] for key in ("dir", "src", "proto", "port")):
+                del self.rules[i]
+                return True
+        return False
+
+    def _result(self, cmd, returncode, stdout="", stderr=""):
+        return subprocess.CompletedProcess(args=cmd, returncode=returncode, stdout=stdout, stderr=stderr)
+
+    # --- Packet matching ---
+    @property
+    def rule_count(self):
+        """Number of entries the backend has to store"""
+        if self.strategy == "ipset":
+            return len(self.blocked_sources) + len(self.blocked_ports)
+        return len(self.rules)
+
+    def match_packet(self, src_ip, dst_port, protocol="tcp"):
+        """
+        Evaluate one inbound packet
+        Returns: (verdict: str, evaluations: int, cost_ns: int)
+        """
+        protocol = protocol.lower()
+
+        if self.strategy == "ipset":
+            # One set lookup for the source, one for the destination port
+            dropped = src_ip in self.blocked_sources or (protocol, dst_port) in self.blocked_ports
+            return ("DROP" if dropped else "ACCEPT"), 2, 2 * SET_LOOKUP_NS
+
+        evaluations = 0
+        for rule in self.rules:
+            if rule["dir"] != "in":
+                continue
+            evaluations += 1
+            if rule["src"] is not None and rule["src"] != src_ip:
+                continue
+            if rule["proto"] is not None and rule["proto"] != protocol:
+                continue
+            if rule["port"] is not None and rule["port"] != dst_port:
+                continue
+            return "DROP", evaluations, evaluations * RULE_MATCH_NS
+        return "ACCEPT", evaluations, evaluations * RULE_MATCH_NS
+
+    def lookup_cost(self, packets):
+        """
+        Average rule evaluations and estimated nanoseconds per packet
+        for a list of (src_ip, dst_port, protocol) tuples
+        """
+        if not packets:
+            return 0.0, 0.0
+        total_evaluations = 0
+        total_ns = 0
+        for src_ip, dst_port, protocol in packets:
+            _, evaluations, cost_ns = self.match_packet(src_ip, dst_port, protocol)
+            total_evaluations += evaluations
+            total_ns += cost_ns
+        return total_evaluations / len(packets), total_ns / len(packets)
+
+    def describe(self):
+        """
+        Human-readable listing, similar to `iptables -L -n`
+        """
+        lines = [f"Chain INPUT (policy ACCEPT) [{self.strategy}]"]
+        if self.strategy == "ipset":
+            lines.append(f"DROP  all  match-set ignisyl_sources src  ({len(self.blocked_sources)} members)")
+            lines.append(f"DROP  all  match-set ignisyl_ports dst    ({len(self.blocked_ports)} members)")
+        else:
+            for rule in self.rules:
+                src = rule["src"] or "0.0.0.0/0"
+                port = f"dpt:{rule['port']}" if rule["port"] is not None else ""
+                lines.append(f"DROP  {rule['proto'] or 'all'}  {src}  {rule['dir']}  {port}".rstrip())
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,105 @@
+"""
+Ignisyl Log Traffic Generator
+Sends logon events to the network listener over UDP or TCP for testing
+
+Usage:
+    python -m ignisyl_core listen --train logon.csv --udp-port 5514 --tcp-port 5514 &
+    python generate_log_traffic.py --protocol udp --format rfc5424 --count 10000 --rate 2000
+    python generate_log_traffic.py --protocol tcp --format json --count 50000 --rate 0
+"""
+
+import argparse
+import json
+import random
+import socket
+import time
+from datetime import datetime
+
+import pandas as pd
+
+FORMATS = ["json", "rfc5424", "rfc3164", "csv"]
+
+
+def format_event(event, fmt, hostname="ignisyl-gen"):
+    """Render one event as a line in the chosen wire format"""
+    date = event['date']
+    body = f"user={event['user']} pc={event['pc']} activity={event['activity']}"
+    if fmt == "json":
+        return json.dumps({"date": date.strftime('%Y-%m-%d %H:%M:%S'), "user": event['user'],
+                           "pc": event['pc'], "activity": event['activity']})
+    if fmt == "rfc5424":
+        return f"<134>1 {date.strftime('%Y-%m-%dT%H:%M:%S')}Z {hostname} logon - - - {body}"
+    if fmt == "rfc3164":
+        return f"<134>{date.strftime('%b')} {date.day:>2} {date.strftime('%H:%M:%S')} {hostname} logon: {body}"
+    return f"{date.strftime('%Y-%m-%d %H:%M:%S')},{event['user']},{event['pc']},{event['activity']}"
+
+
+def generate_events(file_path, count, seed=42):
+    """
+    Events sampled from a real log, re-dated to today so they look live
+    """
+    df = pd.read_csv(file_path)
+    df['date'] = pd.to_datetime(df['date'])
+    records = df[['date', 'user', 'pc', 'activity']].to_dict("records")
+    rng = random.Random(seed)
+    today = datetime.now().date()
+    for _ in range(count):
+        event = dict(rng.choice(records))
+        event['date'] = datetime.combine(today, event['date'].time())
+        yield event
+
+
+def send(args):
+    lines = (format_event(event, args.format) for event in generate_events(args.data, args.count))
+    interval = 1.0 / args.rate if args.rate > 0 else 0.0
+    sent = 0
+    started = time.perf_counter()
+
+    if args.protocol == "udp":
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        connection = None
+    else:
+        connection = socket.create_connection((args.host, args.port))
+        sock = None
+
+    try:
+        for line in lines:
+            payload = (line + "\n").encode("utf-8")
+            if sock:
+                sock.sendto(payload, (args.host, args.port))
+            else:
+                connection.sendall(payload)   # blocks while the listener applies backpressure
+            sent += 1
+            if interval:
+                # Pace against the schedule, not the previous send, so drift doesn't accumulate
+                delay = started + sent * interval - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+    finally:
+        if sock:
+            sock.close()
+        if connection:
+            connection.close()
+
+    elapsed = time.perf_counter() - started
+    return sent, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Send test logon events to the Ignisyl listener")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5514)
+    parser.add_argument("--protocol", choices=["udp", "tcp"], default="udp")
+    parser.add_argument("--format", choices=FORMATS, default="json")
+    parser.add_argument("--data", default="logon.csv", help="Log file to sample events from")
+    parser.add_argument("--count", type=int, default=1000)
+    parser.add_argument("--rate", type=float, default=1000, help="Events per second (0 = as fast as possible)")
+    args = parser.parse_args()
+
+    sent, elapsed = send(args)
+    print(f"Sent {sent:,} {args.format} events over {args.protocol.upper()} in {elapsed:.2f}s "
+          f"({sent / elapsed if elapsed else 0:,.0f} events/s)")
+
+
+if __name__ == "__main__":
+    main()
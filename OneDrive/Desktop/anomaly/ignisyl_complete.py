@@ -1,16 +1,12 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
-from sklearn.ensemble import IsolationForest
-from sklearn.preprocessing import LabelEncoder, MinMaxScaler, StandardScaler
-from sklearn.neural_network import MLPRegressor
 from datetime import datetime
 import json
 import os
-import time
 import sqlite3
-import plotly.express as px
-import plotly.graph_objects as go
+from warmup import PipelineWarmup, run_splash
+from ignisyl_core import get_pipeline_cache, score_file
+from ignisyl_core.output import write_sqlite
 
 # --- Page Configuration ---
 st.set_page_config(
@@ -79,25 +75,7 @@ def init_database():
 
 def save_to_database(df):
     """Save risk scores to database"""
-    conn = sqlite3.connect('ignisyl_database.db')
-    
-    for _, row in df.iterrows():
-        conn.execute('''
-            INSERT INTO risk_scores (timestamp, user, pc, activity, risk_score, risk_level, firewall_action, model_used)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            row['timestamp'],
-            row['user'],
-            row['pc'],
-            row['activity'],
-            row['risk_score'],
-            row['risk_level'],
-            row['firewall_action'],
-            'Isolation Forest + Autoencoder'
-        ))
-    
-    conn.commit()
-    conn.close()
+    write_sqlite(df, 'ignisyl_database.db', model_used='Isolation Forest + Autoencoder')
 
 def get_risk_history(user=None, days=7):
     """Get risk score history from database"""
@@ -122,76 +100,44 @@ def get_risk_history(user=None, days=7):
     conn.close()
     return df
 
-# --- Autoencoder Model ---
-class AutoencoderDetector:
-    """
-    Autoencoder for anomaly detection
-    Learns to reconstruct normal patterns; high reconstruction error = anomaly
-    """
-    
-    def __init__(self, hidden_layers=[10, 5, 10]):
-        self.model = MLPRegressor(
-            hidden_layer_sizes=hidden_layers,
-            activation='relu',
-            solver='adam',
-            max_iter=500,
-            random_state=42
-        )
-        self.scaler = StandardScaler()
-    
-    def fit(self, X):
-        """Train autoencoder on normal data"""
-        X_scaled = self.scaler.fit_transform(X)
-        self.model.fit(X_scaled, X_scaled)  # Train to reconstruct input
-        return self
-    
-    def predict_anomaly_score(self, X):
-        """Calculate reconstruction error as anomaly score"""
-        X_scaled = self.scaler.transform(X)
-        X_reconstructed = self.model.predict(X_scaled)
-        
-        # Calculate reconstruction error (MSE per sample)
-        reconstruction_error = np.mean((X_scaled - X_reconstructed) ** 2, axis=1)
-        
-        return reconstruction_error
+# --- Scoring Pipeline ---
+DEFAULT_DATA_FILE = "logon.csv"
+DEFAULT_CONTAMINATION = 0.01
 
-# --- Ensemble Model (Isolation Forest + Autoencoder) ---
-def train_ensemble_model(X):
-    """
-    Train both Isolation Forest and Autoencoder
-    Combine their scores for better accuracy
-    """
-    
-    # Model 1: Isolation Forest
-    iso_forest = IsolationForest(contamination=0.01, random_state=42)
-    iso_forest.fit(X)
-    iso_scores = iso_forest.decision_function(X)
-    
-    # Model 2: Autoencoder
-    autoencoder = AutoencoderDetector(hidden_layers=[10, 5, 10])
-    autoencoder.fit(X)
-    ae_scores = autoencoder.predict_anomaly_score(X)
-    
-    return iso_forest, autoencoder, iso_scores, ae_scores
+ACTION_LABELS = {
+    "High": "🚫 BLOCK",
+    "Medium": "⚠️ RESTRICT",
+    "Low": "✅ ALLOW"
+}
 
-def calculate_ensemble_risk_score(iso_score, ae_score, iso_scores_all, ae_scores_all):
+def score_activity_logs(file_path, use_ensemble_model, contamination_level, progress=None):
     """
-    Combine Isolation Forest and Autoencoder scores
-    Using weighted average for final risk score
+    Load a log file and score it with the ensemble or Isolation Forest alone
+    Streamlit-free so it can run on the warm-up thread; raises on bad input
     """
-    
-    # Normalize Isolation Forest score (invert: more negative = higher risk)
-    iso_normalized = (-iso_score + max(iso_scores_all)) / (max(iso_scores_all) - min(iso_scores_all))
-    
-    # Normalize Autoencoder score (higher error = higher risk)
-    ae_normalized = (ae_score - min(ae_scores_all)) / (max(ae_scores_all) - min(ae_scores_all))
-    
-    # Weighted combination (70% Isolation Forest, 30% Autoencoder)
-    combined_score = (0.7 * iso_normalized + 0.3 * ae_normalized) * 100
-    
-    return np.clip(combined_score, 0, 100)
+    return score_file(
+        file_path, action_labels=ACTION_LABELS,
+        model="ensemble" if use_ensemble_model else "isolation_forest",
+        contamination=contamination_level, feature_set="extended", progress=progress
+    )
+
+def cached_score_activity_logs(file_path, use_ensemble_model, contamination_level, progress=None):
+    """Scoring pipeline behind the shared content-addressed cache"""
+    return get_pipeline_cache().get_or_compute(
+        "ignisyl_complete", file_path, (use_ensemble_model, contamination_level),
+        lambda: score_activity_logs(file_path, use_ensemble_model, contamination_level, progress)
+    )
+
+def load_and_process_data(file_path, use_ensemble_model, contamination_level):
+    try:
+        return cached_score_activity_logs(file_path, use_ensemble_model, contamination_level)
+    except FileNotFoundError:
+        st.error(f"❌ Error: File '{file_path}' not found!")
+        return None
 
 # --- Welcome Page ---
+WELCOME_MIN_SECONDS = 2.5
+
 def show_welcome_page():
     st.markdown("""
         <div style="display: flex; flex-direction: column; justify-content: center; align-items: center; height: 80vh; background: linear-gradient(135deg, #000000 0%, #1a1a1a 100%); border-radius: 10px;">
@@ -206,7 +152,16 @@ def show_welcome_page():
             </div>
         </div>
     """, unsafe_allow_html=True)
-    time.sleep(2.5)
+    
+    # Train both models on the default log file while the splash is up
+    if 'warmup' not in st.session_state:
+        st.session_state.warmup = PipelineWarmup(
+            cached_score_activity_logs, (DEFAULT_DATA_FILE, True, DEFAULT_CONTAMINATION)
+        ).start()
+    
+    progress_bar = st.progress(0.0)
+    status_text = st.empty()
+    run_splash(st.session_state.warmup, progress_bar, status_text, min_duration=WELCOME_MIN_SECONDS)
     return True
 
 # --- Main Application ---
@@ -252,12 +207,13 @@ def main():
             "Select Data Type:",
             ["User Activity Logs (CERT)", "Network Traffic (UNSW-NB15)", "Both"]
         )
-        data_file = st.text_input("Log File Path", value="logon.csv")
+        data_file = st.text_input("Log File Path", value=DEFAULT_DATA_FILE,
+                                  help="A CSV log file (optionally .gz), a folder of logs, or a glob such as logs/*.csv")
         
         st.divider()
         
         st.subheader("🤖 AI Model Settings")
-        contamination = st.slider("Detection Sensitivity", 0.01, 0.10, 0.01, 0.01,
+        contamination = st.slider("Detection Sensitivity", 0.01, 0.10, DEFAULT_CONTAMINATION, 0.01,
                                  help="Lower = More sensitive")
         use_ensemble = st.checkbox("Use Ensemble Model (IF + AE)", value=True,
                                    help="Combine Isolation Forest and Autoencoder for better accuracy")
@@ -268,88 +224,9 @@ def main():
         show_timeline = st.checkbox("Show Threat Timeline", value=True)
         show_history = st.checkbox("Show Risk History", value=True)
 
-    # Load and process data
-    @st.cache_data
-    def load_and_process_data(file_path, use_ensemble_model):
-        try:
-            df = pd.read_csv(file_path)
-        except FileNotFoundError:
-            st.error(f"❌ Error: File '{file_path}' not found!")
-            return None
-
-        # Preprocessing
-        df['date'] = pd.to_datetime(df['date'])
-        df['hour_of_day'] = df['date'].dt.hour
-        df['day_of_week'] = df['date'].dt.dayofweek
-        df['is_weekend'] = df['day_of_week'].isin([5, 6]).astype(int)
-        df['is_night'] = df['hour_of_day'].apply(lambda x: 1 if x < 6 or x > 22 else 0)
-        
-        # Encoding
-        le_user = LabelEncoder()
-        le_pc = LabelEncoder()
-        le_activity = LabelEncoder()
-        df['user_encoded'] = le_user.fit_transform(df['user'])
-        df['pc_encoded'] = le_pc.fit_transform(df['pc'])
-        df['activity_encoded'] = le_activity.fit_transform(df['activity'])
-
-        # Features for models
-        features_for_model = [
-            'user_encoded', 'pc_encoded', 'activity_encoded', 
-            'hour_of_day', 'day_of_week', 'is_weekend', 'is_night'
-        ]
-        X = df[features_for_model]
-        
-        if use_ensemble_model:
-            # Train ensemble model
-            iso_forest, autoencoder, iso_scores, ae_scores = train_ensemble_model(X)
-            
-            # Calculate ensemble risk scores
-            df['iso_score'] = iso_scores
-            df['ae_score'] = ae_scores
-            df['risk_score'] = [
-                calculate_ensemble_risk_score(iso, ae, iso_scores, ae_scores)
-                for iso, ae in zip(iso_scores, ae_scores)
-            ]
-            df['model_used'] = 'Ensemble (IF + AE)'
-        else:
-            # Use only Isolation Forest
-            model = IsolationForest(contamination=contamination, random_state=42)
-            model.fit(X)
-            anomaly_scores = model.decision_function(X)
-            
-            scaler = MinMaxScaler(feature_range=(0, 100))
-            scores = anomaly_scores.reshape(-1, 1)
-            inverted_scores = -scores + max(scores)
-            df['risk_score'] = scaler.fit_transform(inverted_scores).flatten()
-            df['model_used'] = 'Isolation Forest'
-
-        # Risk level assignment
-        def assign_risk_level(score):
-            if score > 85:
-                return 'High'
-            elif score > 60:
-                return 'Medium'
-            else:
-                return 'Low'
-        
-        df['risk_level'] = df['risk_score'].apply(assign_risk_level)
-        
-        # Firewall action
-        def adaptive_firewall_action(risk_level):
-            if risk_level == 'High':
-                return "🚫 BLOCK"
-            elif risk_level == 'Medium':
-                return "⚠️ RESTRICT"
-            else:
-                return "✅ ALLOW"
-        
-        df['firewall_action'] = df['risk_level'].apply(adaptive_firewall_action)
-        df['timestamp'] = df['date'].dt.strftime('%Y-%m-%d %H:%M:%S')
-        
-        return df
-
     with st.spinner("🔄 Training AI models and analyzing threats..."):
-        df_processed = load_and_process_data(data_file, use_ensemble)
+        df_processed = load_and_process_data(data_file, use_ensemble, contamination)
+    st.sidebar.caption(get_pipeline_cache().summary())
 
     if df_processed is not None:
         # Save to database
@@ -380,6 +257,9 @@ def main():
 
         st.divider()
 
+        # Charting loads with the first dashboard render, after the welcome page
+        import plotly.express as px
+
         # === TIMELINE VISUALIZATION ===
         if show_timeline and high_risk > 0:
             st.header("📅 Threat Timeline")
@@ -402,7 +282,7 @@ def main():
         if high_risk > 0:
             st.header("⚠️ High-Risk Users")
             
-            risky_users = df_processed[df_processed['risk_level'] == 'High'].groupby('user').agg({
+            risky_users = df_processed[df_processed['risk_level'] == 'High'].groupby('user', observed=True).agg({
                 'risk_level': 'count',
                 'risk_score': 'mean'
             }).reset_index()
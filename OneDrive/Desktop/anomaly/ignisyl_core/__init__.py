@@ -0,0 +1,32 @@
+"""
+Ignisyl Core
+Streamlit-free detection pipeline shared by the dashboards and the CLI
+
+    from ignisyl_core import score_file
+    df = score_file("logon.csv", contamination=0.01)
+"""
+
+from .cache import PipelineCache, get_pipeline_cache
+from .calibration import KLLSketch, RiskCalibrator
+from .detector import Detector
+from .features import BASE_FEATURES, BEHAVIOURAL_FEATURES, EXTENDED_FEATURES, build_feature_matrix
+from .follow import LogFollower
+from .forest import CompiledForest, compile_isolation_forest
+from .graph import AccessGraph, add_graph_features
+from .ingestion import (
+    FileStats, load_activity_logs, read_activity_log, read_activity_logs, resolve_log_files
+)
+from .models import AutoencoderDetector, train_ensemble_model, train_isolation_forest
+from .online import HalfSpaceTrees, train_half_space_trees
+from .output import write_results
+from .peers import PeerGroupModels, train_peer_groups
+from .rolling import RollingFeatureState, add_rolling_features
+from .sessions import SessionState, add_session_features, sessionize
+from .scoring import (
+    ACTION_LABELS, MODELS, assign_firewall_actions, assign_risk_levels,
+    calculate_ensemble_risk_score, isolation_risk_scores, score_file, score_logs
+)
+from .whitelist import (
+    WHITELIST_FILE, empty_whitelist, is_whitelisted, load_whitelist, save_whitelist,
+    whitelist_mask
+)
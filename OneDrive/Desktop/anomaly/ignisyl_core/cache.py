@@ -0,0 +1,214 @@
+"""
+Ignisyl Core - Pipeline Cache
+Content-addressed, memory-bounded cache shared by the dashboards
+
+Entries are keyed by the SHA-256 of the input file's bytes (plus any files
+the result depends on, such as the whitelist) and the pipeline parameters,
+so renaming a file still hits and editing it in place misses. The cache
+evicts least-recently-used entries once the configured memory budget is
+exceeded. Results are shared rather than pickled: NumPy arrays are marked
+read-only, and every caller gets its own shallow copy of a DataFrame or
+Series, so adding or replacing columns never reaches the cached frame.
+"""
+
+import hashlib
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from .ingestion import resolve_log_files
+
+DEFAULT_BUDGET_MB = int(os.environ.get("IGNISYL_CACHE_MB", "512"))
+_HASH_CHUNK = 1024 * 1024
+
+
+def estimate_size(value):
+    """
+    Approximate in-memory size of a cached value in bytes
+    """
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(index=True, deep=True))
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    if isinstance(value, (tuple, list)):
+        return sys.getsizeof(value) + sum(estimate_size(item) for item in value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_size(item) for item in value.values())
+    return sys.getsizeof(value)
+
+
+def freeze(value):
+    """
+    Mark NumPy arrays inside a value read-only so cache hits can share them
+    """
+    if isinstance(value, np.ndarray):
+        value.setflags(write=False)
+    elif isinstance(value, (tuple, list)):
+        for item in value:
+            freeze(item)
+    elif isinstance(value, dict):
+        for item in value.values():
+            freeze(item)
+    return value
+
+
+def share(value):
+    """
+    A cached value for one caller: shallow copies of frames and containers,
+    so the caller's columns and items are its own
+    """
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return value.copy(deep=False)
+    if isinstance(value, tuple):
+        return tuple(share(item) for item in value)
+    if isinstance(value, list):
+        return [share(item) for item in value]
+    if isinstance(value, dict):
+        return {name: share(item) for name, item in value.items()}
+    return value
+
+
+class PipelineCache:
+    """
+    LRU cache of pipeline results under a memory budget
+    Thread-safe: used from Streamlit sessions and the warm-up thread
+    """
+
+    def __init__(self, max_bytes=DEFAULT_BUDGET_MB * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()   # key -> (value, size)
+        self._digests = {}              # (path, size, mtime_ns, inode) -> sha256
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    # --- Keys ---
+    def file_digest(self, path):
+        """
+        SHA-256 of a file's contents
+        Re-hashing is skipped while the file's size and mtime are unchanged
+        """
+        stat = os.stat(path)
+        signature = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns, stat.st_ino)
+        with self._lock:
+            digest = self._digests.get(signature)
+        if digest is not None:
+            return digest
+
+        sha = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(_HASH_CHUNK), b""):
+                sha.update(chunk)
+        digest = sha.hexdigest()
+
+        with self._lock:
+            self._digests[signature] = digest
+        return digest
+
+    def source_digest(self, path):
+        """
+        Content hash of a log source: one file, or every file a directory or
+        glob resolves to (so adding a day's log to a folder misses)
+        """
+        if os.path.isfile(path):
+            return self.file_digest(path)
+        sha = hashlib.sha256()
+        for file_path in resolve_log_files(path):
+            sha.update(self.file_digest(file_path).encode("ascii"))
+        return sha.hexdigest()
+
+    def make_key(self, namespace, file_path, params=(), depends_on=()):
+        """
+        Cache key from the input's content hash, dependency hashes and parameters
+        Missing dependency files are part of the key too
+        """
+        dependencies = tuple(
+            self.file_digest(path) if os.path.exists(path) else f"missing:{path}"
+            for path in depends_on
+        )
+        return (namespace, self.source_digest(file_path), dependencies, tuple(params))
+
+    # --- Lookup ---
+    def get_or_compute(self, namespace, file_path, params, compute, depends_on=()):
+        """
+        Return the cached result for this input, computing and storing it on a miss
+        """
+        key = self.make_key(namespace, file_path, params, depends_on)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return share(entry[0])
+            self.misses += 1
+
+        value = freeze(compute())
+        self.put(key, value)
+        return share(value)
+
+    def put(self, key, value):
+        size = estimate_size(value)
+        with self._lock:
+            if key in self._entries:
+                self.current_bytes -= self._entries.pop(key)[1]
+            if size > self.max_bytes:
+                # Larger than the whole budget: hand it back without caching
+                return
+            self._entries[key] = (value, size)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self):
+        """
+        Hit/miss/eviction counters and memory use
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes
+            }
+
+    def summary(self):
+        """One-line description for dashboards"""
+        s = self.stats()
+        return (f"Cache: {s['hits']} hits · {s['misses']} misses · {s['evictions']} evictions · "
+                f"{s['bytes'] / 2**20:.1f}/{s['max_bytes'] / 2**20:.0f} MB")
+
+
+_shared_cache = None
+_shared_lock = threading.Lock()
+
+
+def get_pipeline_cache():
+    """
+    Process-wide cache shared by every session and dashboard
+    Budget comes from the IGNISYL_CACHE_MB environment variable (default 512)
+    """
+    global _shared_cache
+    with _shared_lock:
+        if _shared_cache is None:
+            _shared_cache = PipelineCache()
+        return _shared_cache
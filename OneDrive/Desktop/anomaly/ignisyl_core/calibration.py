@@ -0,0 +1,213 @@
+"""
+Ignisyl Core - Risk Calibration
+Risk scores from where an event ranks among reference events
+
+The min-max scaling in scoring.py gives an event a risk that depends on
+what else is in its batch. A RiskCalibrator keeps a quantile sketch of
+the anomaly values of reference events (the training log, plus any other
+shards merged in) for one model version, and maps a new event to the share
+of reference events at least as anomalous - its tail probability - with
+a binary search, so the same event always gets the same risk.
+
+Tail probabilities are placed on the 0-100 scale on a log axis anchored to
+the contamination share c: an event rarer than the top 5c of reference
+events reaches the Medium threshold, rarer than the top c the High one,
+and rarer than the top c/100 scores 100. When 5c would reach the whole
+log (c >= 0.2), Medium starts halfway between c and 1 on the log axis.
+
+Sketches are saved per model version and, with a shard name, per process,
+so processes scoring different parts of the traffic with the same model
+each save what they saw and load() merges all of them.
+
+KLLSketch (Karnin, Lang & Liberty, 2016) holds a stack of compactors whose
+items weigh 1, 2, 4, ...; a full compactor sorts its items and promotes
+every other one a level up. Sketches merge level by level, so shards can
+calibrate separately and be combined. Rank error is about 1.7/k; up to
+roughly 3k values nothing is compacted and ranks are exact.
+"""
+
+import glob
+import os
+
+import numpy as np
+
+from .scoring import HIGH_RISK_THRESHOLD, MEDIUM_RISK_THRESHOLD
+
+DEFAULT_SKETCH_SIZE = 4096
+MEDIUM_TAIL_FACTOR = 5     # Medium from the top 5 x contamination of reference events
+SATURATION_FACTOR = 0.01   # 100 from the top contamination / 100
+
+
+class KLLSketch:
+    """
+    Mergeable quantile sketch of a stream of floats
+    """
+
+    def __init__(self, k=DEFAULT_SKETCH_SIZE, seed=42):
+        self.k = k
+        self.seed = seed
+        self.levels = [np.empty(0)]   # items at level h stand for 2^h values
+        self.count = 0
+        self._rng = np.random.default_rng(seed)
+        self._sorted = None           # (items, cumulative weights), rebuilt after updates
+
+    def __len__(self):
+        return self.count
+
+    def _capacity(self, level):
+        # Lower levels get geometrically less room than the top one
+        return max(2, int(np.ceil(self.k * (2 / 3) ** (len(self.levels) - level - 1))))
+
+    def _compress(self):
+        while sum(map(len, self.levels)) > sum(map(self._capacity, range(len(self.levels)))):
+            level = next(h for h, items in enumerate(self.levels) if len(items) > self._capacity(h))
+            if level + 1 == len(self.levels):
+                self.levels.append(np.empty(0))
+            items = np.sort(self.levels[level])
+            kept, items = items[:len(items) % 2], items[len(items) % 2:]
+            promoted = items[self._rng.integers(2)::2]
+            self.levels[level] = kept
+            self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float).ravel()
+        values = values[~np.isnan(values)]
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self.count += len(values)
+        self._sorted = None
+        self._compress()
+        return self
+
+    def merge(self, other):
+        """Fold another sketch into this one"""
+        for level, items in enumerate(other.levels):
+            if level == len(self.levels):
+                self.levels.append(np.empty(0))
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.count += other.count
+        self._sorted = None
+        self._compress()
+        return self
+
+    def _cumulative(self):
+        if self._sorted is None:
+            items = np.concatenate(self.levels)
+            weights = np.concatenate([np.full(len(level_items), 2.0 ** level)
+                                      for level, level_items in enumerate(self.levels)])
+            order = np.argsort(items, kind="stable")
+            self._sorted = items[order], np.cumsum(weights[order])
+        return self._sorted
+
+    def weight_below(self, values):
+        """Estimated number of sketched values strictly below each value"""
+        items, cumulative = self._cumulative()
+        positions = np.searchsorted(items, np.asarray(values, dtype=float), side="left")
+        return np.where(positions > 0, cumulative[np.maximum(positions - 1, 0)], 0.0)
+
+    def quantile(self, q):
+        """Estimated value at each fraction q of the stream"""
+        items, cumulative = self._cumulative()
+        if not len(items):
+            raise ValueError("Empty sketch")
+        positions = np.searchsorted(cumulative, np.asarray(q, dtype=float) * cumulative[-1], side="left")
+        return items[np.minimum(positions, len(items) - 1)]
+
+    # --- Persistence ---
+    def to_arrays(self):
+        return {"items": np.concatenate(self.levels),
+                "levels": np.repeat(np.arange(len(self.levels)), list(map(len, self.levels))),
+                "count": np.array(self.count)}
+
+    @classmethod
+    def from_arrays(cls, arrays, k=DEFAULT_SKETCH_SIZE, seed=42):
+        sketch = cls(k, seed)
+        items, levels = arrays["items"], arrays["levels"]
+        sketch.levels = [items[levels == level] for level in range(int(levels.max()) + 1 if len(levels) else 1)]
+        sketch.count = int(arrays["count"])
+        return sketch
+
+
+class RiskCalibrator:
+    """
+    0-100 risk from the tail probability of an anomaly value among reference
+    events; values are higher-is-more-anomalous
+    """
+
+    def __init__(self, version, contamination=0.01, k=DEFAULT_SKETCH_SIZE):
+        if not 0 < contamination < 1:
+            raise ValueError(f"Contamination must be between 0 and 1, got {contamination}")
+        self.version = version
+        self.contamination = contamination
+        self.sketch = KLLSketch(k)
+
+    def __len__(self):
+        return len(self.sketch)
+
+    def update(self, anomaly):
+        """Add reference events"""
+        self.sketch.update(anomaly)
+        return self
+
+    def merge(self, other):
+        """Add another shard's reference events for the same model version"""
+        if other.version != self.version:
+            raise ValueError(f"Cannot merge calibration for model {other.version} into {self.version}")
+        self.sketch.merge(other.sketch)
+        return self
+
+    def tail_probability(self, anomaly):
+        """Share of reference events at least as anomalous; beyond all of them counts as one in n + 1"""
+        if not len(self.sketch):
+            raise RuntimeError("Calibrator has no reference events")
+        at_least = self.sketch.count - self.sketch.weight_below(anomaly)
+        return np.maximum(at_least, 1) / (self.sketch.count + 1)
+
+    def risk_scores(self, anomaly):
+        c = self.contamination
+        # Anchors must fall strictly from 1 for np.interp
+        medium = MEDIUM_TAIL_FACTOR * c if MEDIUM_TAIL_FACTOR * c < 1 else np.sqrt(c)
+        tails = np.array([1.0, medium, c, SATURATION_FACTOR * c])
+        risks = [0.0, MEDIUM_RISK_THRESHOLD, HIGH_RISK_THRESHOLD, 100.0]
+        return np.interp(-np.log10(self.tail_probability(anomaly)), -np.log10(tails), risks)
+
+    # --- Persistence ---
+    def path_in(self, directory, shard=None):
+        name = f"calibration_{self.version}_{shard}.npz" if shard else f"calibration_{self.version}.npz"
+        return os.path.join(directory, name)
+
+    def saved_paths(self, directory):
+        """Every sketch saved for this version: unsharded, then shards by name"""
+        paths = sorted(glob.glob(os.path.join(glob.escape(directory), f"calibration_{self.version}_*.npz")))
+        unsharded = self.path_in(directory)
+        return ([unsharded] if os.path.exists(unsharded) else []) + \
+            [path for path in paths if not path.endswith(".tmp.npz")]
+
+    def save(self, directory, shard=None):
+        """Write the sketch to <directory>/calibration_<version>[_<shard>].npz"""
+        os.makedirs(directory, exist_ok=True)
+        path = self.path_in(directory, shard)
+        temp_path = f"{path}.tmp.npz"
+        np.savez(temp_path, **self.sketch.to_arrays())
+        os.replace(temp_path, path)
+        return path
+
+    @staticmethod
+    def _read(path, k):
+        with np.load(path) as saved:
+            return KLLSketch.from_arrays(saved, k)
+
+    def load(self, directory, shard=None):
+        """
+        Merge in every sketch saved for this version, or only the given shard's
+        Returns: reference events loaded
+        """
+        if shard:
+            paths = [path for path in [self.path_in(directory, shard)] if os.path.exists(path)]
+        else:
+            paths = self.saved_paths(directory)
+        loaded = 0
+        for path in paths:
+            sketch = self._read(path, self.sketch.k)
+            self.sketch.merge(sketch)
+            loaded += len(sketch)
+        return loaded
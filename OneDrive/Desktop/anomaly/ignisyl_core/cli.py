@@ -0,0 +1,319 @@
+"""
+Ignisyl Core - Command Line
+Score activity logs without the dashboards, e.g. from cron or batch jobs
+
+Usage:
+    python -m ignisyl_core score logon.csv -o scores.parquet
+    python -m ignisyl_core score logs/ -o ignisyl_database.db --model ensemble
+    python -m ignisyl_core score "logs/*.csv" -o scores.csv --whitelist whitelist.json
+    python -m ignisyl_core score "logs/*.csv.gz" -o scores.parquet --workers 8
+    python -m ignisyl_core serve --train logon.csv --port 8765 --max-batch-size 64
+    python -m ignisyl_core listen --train logon.csv --udp-port 5514 --tcp-port 5514 -o live.db
+    python -m ignisyl_core follow logon.csv --train logon.csv -o ignisyl_database.db --state logon.follow.json
+    python -m ignisyl_core train-autoencoder logs/ --checkpoint autoencoder.ckpt --max-epochs 30
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+
+from .detector import Detector
+from .features import FEATURE_SETS
+from .follow import DEFAULT_POLL_SECONDS, LogFollower, run_follower
+from .ingestion import CSV_ENGINES, DEFAULT_CHUNK_ROWS, load_activity_logs
+from .listener import (
+    DEFAULT_BATCH_SIZE, DEFAULT_FLUSH_SECONDS, DEFAULT_QUEUE_SIZE, LogListener, ScoringSink,
+    run_listener
+)
+from .output import OUTPUT_FORMATS, detect_format, write_results
+from .peers import DEFAULT_MAX_LOADED, DEFAULT_PEER_GROUPS
+from .scoring import MODELS, assign_firewall_actions, score_logs
+from .service import (
+    DEFAULT_HOST, DEFAULT_MAX_BATCH_SIZE, DEFAULT_MAX_QUEUE, DEFAULT_MAX_WAIT_MS, DEFAULT_PORT,
+    ScoringService, run_service
+)
+from .streaming import StreamingAutoencoderTrainer
+from .whitelist import load_whitelist, whitelist_mask
+
+
+LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m ignisyl_core",
+                                     description="Ignisyl headless threat scoring")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    score = commands.add_parser("score", help="Score a log file, directory or glob")
+    score.add_argument("input", help="CSV log file, directory of CSV files, or glob pattern")
+    score.add_argument("-o", "--output", required=True,
+                       help="Output file (.parquet, .csv, or .db/.sqlite for the risk_scores table)")
+    score.add_argument("--format", choices=sorted(set(OUTPUT_FORMATS.values())),
+                       help="Output format (default: from the output extension)")
+    score.add_argument("--model", choices=list(MODELS), default="isolation_forest")
+    score.add_argument("--features", choices=list(FEATURE_SETS), default=None,
+                       help="Feature set (default: base for isolation_forest, extended for ensemble)")
+    score.add_argument("--contamination", type=float, default=0.01)
+    score.add_argument("--whitelist", default=None, help="Whitelist JSON to apply")
+    score.add_argument("--workers", type=int, default=None,
+                       help="Processes for parsing several files (default: one per core)")
+    score.add_argument("--dedup-training", action="store_true",
+                       help="Train the autoencoder on distinct feature rows weighted by count (much faster)")
+    score.add_argument("--jobs", type=int, default=None,
+                       help="Cores for training the models (default: all available)")
+    add_peer_arguments(score)
+    score.add_argument("--engine", choices=CSV_ENGINES, default="c",
+                       help="CSV parser; pyarrow is multi-threaded and parses timestamps natively")
+    score.add_argument("--quiet", action="store_true", help="Only print the summary line")
+
+    serve = commands.add_parser("serve", help="Run the local HTTP scoring service")
+    add_training_arguments(serve)
+    serve.add_argument("--host", default=DEFAULT_HOST)
+    serve.add_argument("--port", type=int, default=DEFAULT_PORT)
+    serve.add_argument("--max-batch-size", type=int, default=DEFAULT_MAX_BATCH_SIZE)
+    serve.add_argument("--max-wait-ms", type=float, default=DEFAULT_MAX_WAIT_MS)
+    serve.add_argument("--max-queue", type=int, default=DEFAULT_MAX_QUEUE,
+                       help="Queued events before requests are rejected with 503")
+
+    listen = commands.add_parser("listen", help="Score events received over UDP/TCP syslog or JSON lines")
+    add_training_arguments(listen)
+    listen.add_argument("--host", default="127.0.0.1")
+    listen.add_argument("--udp-port", type=int, default=None)
+    listen.add_argument("--tcp-port", type=int, default=None)
+    listen.add_argument("-o", "--output", default=None,
+                        help="Append scored events here (.csv, .jsonl, or .db/.sqlite)")
+    listen.add_argument("--queue-size", type=int, default=DEFAULT_QUEUE_SIZE,
+                        help="Events buffered before UDP drops and TCP backpressure")
+    listen.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    listen.add_argument("--flush-ms", type=float, default=DEFAULT_FLUSH_SECONDS * 1000)
+    listen.add_argument("--stats-interval", type=float, default=10.0, help="Seconds between counter logs")
+
+    follow = commands.add_parser("follow", help="Score rows as they are appended to a growing CSV log")
+    follow.add_argument("input", help="CSV log file to follow")
+    add_training_arguments(follow)
+    follow.add_argument("-o", "--output", default=None,
+                        help="Append scored rows here (.csv, .jsonl, or .db/.sqlite)")
+    follow.add_argument("--state", default=None,
+                        help="JSON file recording the read position, so a restart resumes instead of re-reading")
+    follow.add_argument("--poll-interval", type=float, default=DEFAULT_POLL_SECONDS, help="Seconds between polls")
+    follow.add_argument("--skip-existing", action="store_true",
+                        help="Without saved state, start at the end of the file instead of scoring it all")
+    follow.add_argument("--once", action="store_true", help="Score what is new and exit (for cron)")
+
+    autoencoder = commands.add_parser("train-autoencoder",
+                                      help="Train the autoencoder in chunks, resuming from a checkpoint if it exists")
+    autoencoder.add_argument("input", help="CSV log file, directory of CSV files, or glob pattern")
+    autoencoder.add_argument("--checkpoint", required=True, help="Checkpoint file, written after every epoch")
+    autoencoder.add_argument("--features", choices=["base", "extended"], default="extended")
+    autoencoder.add_argument("--chunksize", type=int, default=DEFAULT_CHUNK_ROWS, help="Rows per chunk")
+    autoencoder.add_argument("--max-epochs", type=int, default=50)
+    autoencoder.add_argument("--patience", type=int, default=3,
+                             help="Epochs without validation improvement before stopping")
+    autoencoder.add_argument("--validation-fraction", type=float, default=0.05)
+    autoencoder.add_argument("--restart", action="store_true", help="Ignore an existing checkpoint")
+    return parser
+
+
+def add_training_arguments(parser):
+    parser.add_argument("--train", required=True, help="Log file, directory or glob to train on")
+    parser.add_argument("--model", choices=list(MODELS), default="isolation_forest")
+    parser.add_argument("--features", choices=list(FEATURE_SETS), default=None)
+    parser.add_argument("--contamination", type=float, default=0.01)
+    parser.add_argument("--whitelist", default=None, help="Whitelist JSON, re-read when it changes")
+    parser.add_argument("--workers", type=int, default=None, help="Processes for parsing several training files")
+    parser.add_argument("--engine", choices=CSV_ENGINES, default="c", help="CSV parser for the training logs")
+    parser.add_argument("--dedup-training", action="store_true",
+                        help="Train the autoencoder on distinct feature rows weighted by count (much faster)")
+    parser.add_argument("--jobs", type=int, default=None,
+                        help="Cores for training the models (default: all available)")
+    add_peer_arguments(parser)
+    parser.add_argument("--calibrated", action="store_true",
+                        help="Risk from each event's rank among the training events instead of the training range")
+    parser.add_argument("--calibration-dir", default=None,
+                        help="With --calibrated, merge the sketches saved here for the same model into the "
+                             "reference and save the events scored in this run")
+    parser.add_argument("--calibration-shard", default="default",
+                        help="Name this process's calibration sketch; give each concurrent process its own")
+    parser.add_argument("--memo-dir", default=None,
+                        help="Directory to keep score memos in, reused when the same model is trained again")
+
+
+def add_peer_arguments(parser):
+    parser.add_argument("--peer-groups", type=int, default=DEFAULT_PEER_GROUPS,
+                        help="Clusters of similar users, one forest each (with --model peer_groups)")
+    parser.add_argument("--heavy-user-rows", type=int, default=None,
+                        help="Give users with at least this many events a forest of their own")
+    parser.add_argument("--peer-model-dir", default=None,
+                        help="Keep peer-group forests here and load them on demand")
+    parser.add_argument("--max-loaded-groups", type=int, default=DEFAULT_MAX_LOADED,
+                        help="Peer-group forests held in memory with --peer-model-dir")
+
+
+def peer_options(args):
+    return {"n_groups": args.peer_groups, "heavy_user_rows": args.heavy_user_rows,
+            "model_dir": args.peer_model_dir, "max_loaded": args.max_loaded_groups}
+
+
+def train_detector(args):
+    started = time.perf_counter()
+    df, files = load_activity_logs(args.train, args.workers, args.engine)
+    feature_set = args.features or ("extended" if args.model == "ensemble" else "base")
+    detector = Detector(args.model, args.contamination, feature_set, deduplicate=args.dedup_training,
+                        n_jobs=args.jobs, calibrate=args.calibrated, peer_options=peer_options(args)).fit(df)
+    print(f"Trained {MODELS[args.model]} on {len(df):,} events from {len(files)} file(s) "
+          f"in {time.perf_counter() - started:.2f}s (model version {detector.version})", file=sys.stderr)
+    if args.memo_dir and detector.memo is not None:
+        loaded = detector.load_memo(args.memo_dir)
+        print(f"Loaded {loaded:,} memoised scores from {args.memo_dir}", file=sys.stderr)
+    if args.calibration_dir and detector.calibrator is not None:
+        loaded = detector.load_calibration(args.calibration_dir, args.calibration_shard)
+        print(f"Merged {loaded:,} calibration events from {args.calibration_dir}", file=sys.stderr)
+    return detector
+
+
+def save_state(detector, args):
+    """Score memo and calibration shard, for the next run of the same model"""
+    if args.memo_dir and detector.memo is not None:
+        path = detector.save_memo(args.memo_dir)
+        print(f"Saved {len(detector.memo):,} memoised scores to {path}", file=sys.stderr)
+    if args.calibration_dir and detector.observed is not None:
+        path = detector.save_calibration(args.calibration_dir, args.calibration_shard)
+        print(f"Saved {len(detector.observed):,} calibration events to {path}", file=sys.stderr)
+
+
+def run_score(args):
+    timings = {}
+    log = (lambda message: None) if args.quiet else (lambda message: print(message, file=sys.stderr))
+    # Before reading and training, so a bad output path fails at once
+    output_format = args.format or detect_format(args.output)
+
+    started = time.perf_counter()
+    df, files = load_activity_logs(args.input, args.workers, args.engine)
+    timings["read"] = time.perf_counter() - started
+    log(f"Loaded {len(df):,} events from {len(files)} file(s) in {timings['read']:.2f}s")
+    if len(files) > 1:
+        for stats in files:
+            log(f"  {stats.summary()}")
+
+    feature_set = args.features or ("extended" if args.model == "ensemble" else "base")
+    started = time.perf_counter()
+    score_logs(df, model=args.model, contamination=args.contamination, feature_set=feature_set,
+               progress=lambda fraction, message: log(f"  {message}"), deduplicate=args.dedup_training,
+               n_jobs=args.jobs, peer_options=peer_options(args))
+    if args.whitelist:
+        df['is_whitelisted'] = whitelist_mask(df, load_whitelist(args.whitelist)).to_numpy()
+    df['firewall_action'] = assign_firewall_actions(df)
+    timings["score"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    write_results(df, args.output, output_format)
+    timings["write"] = time.perf_counter() - started
+
+    total = sum(timings.values())
+    counts = df['risk_level'].value_counts()
+    print(f"Scored {len(df):,} events in {total:.2f}s ({len(df) / total:,.0f} events/s) -> "
+          f"{args.output} [{output_format}]")
+    print(f"  read {timings['read']:.2f}s · score {timings['score']:.2f}s · write {timings['write']:.2f}s")
+    print(f"  High: {counts.get('High', 0):,} · Medium: {counts.get('Medium', 0):,} · "
+          f"Low: {counts.get('Low', 0):,}")
+    return 0
+
+
+def run_serve(args):
+    logging.basicConfig(level=logging.INFO, format=LOG_FORMAT)
+    detector = train_detector(args)
+
+    service = ScoringService(detector, whitelist_path=args.whitelist,
+                             max_batch_size=args.max_batch_size, max_wait_ms=args.max_wait_ms,
+                             max_queue=args.max_queue)
+
+    def ready(address):
+        print(f"Scoring service listening on http://{address[0]}:{address[1]} "
+              f"(batch <= {args.max_batch_size}, wait <= {args.max_wait_ms}ms)", file=sys.stderr)
+
+    run_service(service, args.host, args.port, ready=ready)
+    save_state(detector, args)
+    return 0
+
+
+def run_listen(args):
+    if args.udp_port is None and args.tcp_port is None:
+        raise ValueError("Give --udp-port, --tcp-port or both")
+    logging.basicConfig(level=logging.INFO, format=LOG_FORMAT)
+    detector = train_detector(args)
+
+    sink = ScoringSink(detector, whitelist_path=args.whitelist, output=args.output)
+    listener = LogListener(sink, queue_size=args.queue_size, batch_size=args.batch_size,
+                           flush_interval=args.flush_ms / 1000.0)
+    try:
+        asyncio.run(run_listener(listener, args.host, args.udp_port, args.tcp_port, args.stats_interval))
+    except KeyboardInterrupt:
+        pass
+    save_state(detector, args)
+    return 0
+
+
+def run_follow(args):
+    logging.basicConfig(level=logging.INFO, format=LOG_FORMAT)
+    detector = train_detector(args)
+
+    sink = ScoringSink(detector, whitelist_path=args.whitelist, output=args.output)
+    follower = LogFollower(args.input, state_path=args.state, skip_existing=args.skip_existing)
+    total = run_follower(follower, sink, args.poll_interval, once=args.once)
+    save_state(detector, args)
+    counts = sink.level_counts
+    print(f"Scored {total:,} new rows from {args.input} (offset {follower.offset:,}) · "
+          f"High: {counts['High']:,} · Medium: {counts['Medium']:,} · Low: {counts['Low']:,}")
+    return 0
+
+
+def run_train_autoencoder(args):
+    logging.basicConfig(level=logging.INFO, format=LOG_FORMAT)
+    if os.path.exists(args.checkpoint) and not args.restart:
+        trainer = StreamingAutoencoderTrainer.load(args.checkpoint, max_epochs=args.max_epochs,
+                                                   patience=args.patience, chunksize=args.chunksize)
+        print(f"Resuming {args.checkpoint} after {trainer.epochs_trained} epoch(s)", file=sys.stderr)
+    else:
+        trainer = StreamingAutoencoderTrainer(
+            feature_set=args.features, chunksize=args.chunksize, validation_fraction=args.validation_fraction,
+            max_epochs=args.max_epochs, patience=args.patience, checkpoint_path=args.checkpoint
+        )
+
+    def report(entry):
+        print(f"  epoch {entry['epoch']:>3}: train loss {entry['train_loss']:.5f} · "
+              f"validation {entry['validation_loss']:.5f}{' *' if entry['improved'] else ''} · "
+              f"{entry['rows'] / entry['seconds']:,.0f} rows/s", file=sys.stderr)
+
+    started = time.perf_counter()
+    epochs_before = trainer.epochs_trained
+    trainer.fit(args.input, progress=report)
+    print(f"Trained {trainer.epochs_trained - epochs_before} epoch(s) ({trainer.epochs_trained} in total) on "
+          f"{trainer.trained_rows:,} rows in {time.perf_counter() - started:.1f}s; "
+          f"best validation loss {trainer.best_loss:.5f} -> {args.checkpoint}")
+    return 0
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        if args.command == "score":
+            return run_score(args)
+        if args.command == "serve":
+            return run_serve(args)
+        if args.command == "listen":
+            return run_listen(args)
+        if args.command == "follow":
+            return run_follow(args)
+        if args.command == "train-autoencoder":
+            return run_train_autoencoder(args)
+    except (FileNotFoundError, ValueError, RuntimeError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,257 @@
+"""
+Ignisyl Core - Trained Detector
+A model fitted once and reused to score new events
+
+score_logs fits and normalises on the batch it scores, so one event on its
+own cannot be scored that way. Detector keeps the training-time encoders and
+score ranges, so a single event gets the risk score it would have had as
+part of the training log.
+
+Raw model outputs are memoised per distinct feature vector (see memo.py)
+under a version hash of the fitted model, so repeated patterns are looked
+up rather than re-scored.
+
+With calibrate=True, risk comes from where an event ranks among the
+training events (see calibration.py) rather than from the training range.
+Events scored since training are sketched separately; save_calibration
+writes them as one shard and load_calibration merges every saved shard of
+the model version into the reference, so the risk mapping only changes
+between runs.
+
+Half-Space Trees keep learning: every scored event is counted towards the
+next reference window, so scores are not memoised for that model.
+
+With the behavioural feature set the detector keeps each user's rolling
+and session state (see rolling.py and sessions.py) from the training log
+on, and every scored event is added to it, so events should be scored in
+time order and only once.
+"""
+
+import hashlib
+import pickle
+
+import numpy as np
+import pandas as pd
+
+from .calibration import RiskCalibrator
+from .features import behavioural_states, build_feature_matrix, feature_bounds, transform_features
+from .forest import COMPILED_MAX_ROWS, compile_isolation_forest
+from .graph import ALERT_COLUMN, AccessGraph
+from .memo import ScoreMemo, fits_in_key, row_keys
+from .models import train_ensemble_model, train_isolation_forest
+from .online import train_half_space_trees
+from .peers import train_peer_groups
+from .scoring import ACTION_LABELS, MODELS, assign_firewall_actions, assign_risk_levels
+from .whitelist import whitelist_mask
+
+
+class Detector:
+    """
+    Isolation Forest, ensemble, Half-Space Trees or peer-group forests with
+    frozen normalisation
+    """
+
+    def __init__(self, model="isolation_forest", contamination=0.01, feature_set="base", memoize=True,
+                 deduplicate=False, n_jobs=None, calibrate=False, peer_options=None):
+        if model not in MODELS:
+            raise ValueError(f"Unknown model: {model}")
+        self.model = model
+        self.contamination = contamination
+        self.feature_set = feature_set
+        self.encoders = None
+        self.iso_forest = None
+        self.compiled_forest = None   # flat-array copy of iso_forest for small batches, if it matches
+        self.autoencoder = None
+        self.half_space_trees = None
+        self.peer_groups = None
+        self.peer_options = peer_options or {}   # PeerGroupModels settings
+        self.iso_range = None   # (min, max) decision_function (or mass score) on the training log
+        self.ae_range = None    # (min, max) reconstruction error on the training log
+        self.trained_rows = 0
+        self.memoize = memoize
+        self.deduplicate = deduplicate   # weighted autoencoder training on distinct rows
+        self.n_jobs = n_jobs    # training cores; None uses every available core
+        self.version = None     # hash of the fitted model, keys the score memo
+        self.memo = None
+        self.calibrate = calibrate
+        self.calibrator = None  # sketch of the reference events' anomaly values
+        self.observed = None    # sketch of the events scored since, saved as a shard
+        self.behaviour = None   # per-user state for the behavioural feature set
+        self._bounds = None
+
+    @property
+    def access_graph(self):
+        """The live AccessGraph of the behavioural feature set, if any"""
+        return next((state for state in self.behaviour or () if isinstance(state, AccessGraph)), None)
+
+    @property
+    def fitted(self):
+        return any(model is not None for model in (self.iso_forest, self.half_space_trees, self.peer_groups))
+
+    def fit(self, df):
+        """
+        Train on a parsed activity log (date column already datetime)
+        """
+        df = df.copy()
+        X, self.encoders = build_feature_matrix(df, self.feature_set)
+        self._bounds = feature_bounds(self.feature_set, self.encoders)
+        if self.feature_set == "behavioural":
+            self.behaviour = behavioural_states(df)
+
+        if self.model == "ensemble":
+            self.iso_forest, self.autoencoder, iso_scores, ae_scores = \
+                train_ensemble_model(X, self.contamination, self.deduplicate, self.n_jobs)
+            self.ae_range = (float(ae_scores.min()), float(ae_scores.max()))
+            training_outputs = np.column_stack([iso_scores, ae_scores])
+        elif self.model == "half_space_trees":
+            self.half_space_trees, iso_scores = train_half_space_trees(X, self._bounds)
+            training_outputs = iso_scores[:, np.newaxis]
+        elif self.model == "peer_groups":
+            self.peer_groups, iso_scores = train_peer_groups(X, self.encoders, self.contamination, self.n_jobs,
+                                                             **self.peer_options)
+            training_outputs = iso_scores[:, np.newaxis]
+        else:
+            self.iso_forest, iso_scores = train_isolation_forest(X, self.contamination, self.n_jobs)
+            training_outputs = iso_scores[:, np.newaxis]
+
+        if self.iso_forest is not None:
+            self.compiled_forest = compile_isolation_forest(self.iso_forest, X)
+        self.iso_range = (float(iso_scores.min()), float(iso_scores.max()))
+        self.trained_rows = len(df)
+        self.version = self._model_version()
+        online = self.model == "half_space_trees"
+        # Wide vocabularies with the behavioural features can outgrow one int64 key
+        memoizable = self.memoize and not online and fits_in_key(*self._bounds)
+        self.memo = ScoreMemo(self.version) if memoizable else None
+        if self.calibrate:
+            self.calibrator = RiskCalibrator(self.version, self.contamination)
+            self.calibrator.update(self._combined(training_outputs))
+            self.observed = RiskCalibrator(self.version, self.contamination)
+        return self
+
+    def _model_version(self):
+        """Content hash of everything that determines a raw score"""
+        state = (self.model, self.feature_set, {column: list(encoder.classes_)
+                                                for column, encoder in self.encoders.items()},
+                 self.iso_forest, self.autoencoder, self.half_space_trees,
+                 self.peer_groups.fingerprint() if self.peer_groups is not None else None)
+        return hashlib.sha256(pickle.dumps(state)).hexdigest()[:16]
+
+    def _model_outputs(self, X):
+        """(n, 1) decision_function, plus reconstruction error as a second column for the ensemble"""
+        if self.model == "half_space_trees":
+            return self.half_space_trees.score_learn(X.to_numpy())[:, np.newaxis]
+        if self.model == "peer_groups":
+            return self.peer_groups.decision_function(X)[:, np.newaxis]
+        if self.compiled_forest is not None and len(X) <= COMPILED_MAX_ROWS:
+            iso_scores = self.compiled_forest.decision_function(X)   # identical, without sklearn's overhead
+        else:
+            iso_scores = self.iso_forest.decision_function(X)
+        if self.model == "ensemble":
+            return np.column_stack([iso_scores, self.autoencoder.predict_anomaly_score(X)])
+        return iso_scores[:, np.newaxis]
+
+    def raw_scores(self, X):
+        """Model outputs for a feature matrix, through the memo when enabled"""
+        if self.memo is None or len(X) == 0:
+            return self._model_outputs(X)
+        keys = row_keys(X.to_numpy(), *self._bounds)
+        return self.memo.score(keys, X, self._model_outputs)
+
+    def save_memo(self, directory):
+        return self.memo.save(directory) if self.memo is not None else None
+
+    def load_memo(self, directory):
+        return self.memo.load(directory) if self.memo is not None else 0
+
+    def save_calibration(self, directory, shard):
+        """Write the events this shard has scored (and loaded for it earlier) for this model version"""
+        return self.observed.save(directory, shard) if self.observed is not None else None
+
+    def load_calibration(self, directory, shard):
+        """
+        Merge every saved shard for this model version into the reference;
+        this shard's own events also carry on into its next save
+        Returns: reference events loaded
+        """
+        if self.calibrator is None:
+            return 0
+        self.observed.load(directory, shard)
+        return self.calibrator.load(directory)
+
+    def _combined(self, outputs):
+        """Model outputs as one value per event, 0-1 over the training log; higher = more anomalous"""
+        iso_min, iso_max = self.iso_range
+        iso_normalized = (iso_max - outputs[:, 0]) / (iso_max - iso_min)
+
+        if self.model == "ensemble":
+            ae_min, ae_max = self.ae_range
+            ae_normalized = (outputs[:, 1] - ae_min) / (ae_max - ae_min)
+            combined = 0.7 * iso_normalized + 0.3 * ae_normalized
+        else:
+            combined = iso_normalized
+        return combined
+
+    def _risk_scores(self, df):
+        """(risk scores, copy of df with the model's features added)"""
+        if not self.fitted:
+            raise RuntimeError("Detector has not been trained")
+
+        features = df.copy()
+        X = transform_features(features, self.encoders, self.feature_set, self.behaviour)
+        combined = self._combined(self.raw_scores(X))
+        if self.calibrator is not None:
+            self.observed.update(combined)
+            return self.calibrator.risk_scores(combined), features
+        return np.clip(combined * 100, 0, 100), features
+
+    def risk_scores(self, df):
+        """
+        0-100 risk scores for new events, normalised with training ranges
+        or, when calibrated, from their rank among training events
+        """
+        return self._risk_scores(df)[0]
+
+    def score(self, df):
+        """
+        Score new events; returns a frame with risk_score, risk_level and
+        model_used, plus access_alert with the behavioural feature set
+        """
+        risk_scores, features = self._risk_scores(df)
+        risk_scores = risk_scores.round(2)
+        scored = pd.DataFrame({
+            'risk_score': risk_scores,
+            'risk_level': assign_risk_levels(risk_scores),
+            'model_used': MODELS[self.model]
+        }, index=df.index)
+        if ALERT_COLUMN in features.columns:
+            scored[ALERT_COLUMN] = features[ALERT_COLUMN].to_numpy()
+        return scored
+
+    def assess(self, df, whitelist=None, action_labels=ACTION_LABELS):
+        """
+        Score new events and apply the whitelist and firewall policy
+        Returns: df with risk_score, risk_level, model_used, is_whitelisted,
+        firewall_action and timestamp added (and access_alert, as for score)
+        """
+        df = df.copy()
+        scored = self.score(df)
+        for column in scored.columns:
+            df[column] = scored[column]
+        if whitelist is not None:
+            df['is_whitelisted'] = whitelist_mask(df, whitelist).to_numpy()
+        else:
+            df['is_whitelisted'] = False
+        df['firewall_action'] = assign_firewall_actions(df, action_labels)
+        df['timestamp'] = df['date'].dt.strftime('%Y-%m-%d %H:%M:%S')
+        return df
+
+    def describe(self):
+        return {
+            "model": MODELS[self.model],
+            "contamination": self.contamination,
+            "feature_set": self.feature_set,
+            "trained_rows": self.trained_rows,
+            "version": self.version,
+            "calibration_events": len(self.calibrator) if self.calibrator is not None else None
+        }
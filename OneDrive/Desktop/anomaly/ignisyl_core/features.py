@@ -0,0 +1,155 @@
+"""
+Ignisyl Core - Feature Extraction
+Time-of-activity features and label encoding for the detection models
+"""
+
+import numpy as np
+import pandas as pd
+
+from .graph import GRAPH_FEATURE_RANGES, AccessGraph, add_graph_features
+from .rolling import ROLLING_FEATURE_RANGES, RollingFeatureState, add_rolling_features
+from .sessions import SESSION_FEATURE_RANGES, SessionState, add_session_features
+
+# Inclusive value range of each per-user context feature
+BEHAVIOURAL_FEATURE_RANGES = {**ROLLING_FEATURE_RANGES, **SESSION_FEATURE_RANGES, **GRAPH_FEATURE_RANGES}
+
+BASE_FEATURES = ['user_encoded', 'pc_encoded', 'activity_encoded', 'hour_of_day', 'day_of_week']
+EXTENDED_FEATURES = BASE_FEATURES + ['is_weekend', 'is_night']
+BEHAVIOURAL_FEATURES = EXTENDED_FEATURES + list(BEHAVIOURAL_FEATURE_RANGES)
+
+FEATURE_SETS = {
+    "base": BASE_FEATURES,
+    "extended": EXTENDED_FEATURES,
+    "behavioural": BEHAVIOURAL_FEATURES
+}
+
+CATEGORICAL_COLUMNS = ['user', 'pc', 'activity']
+
+# Inclusive value range of each time feature
+TIME_FEATURE_RANGES = {
+    'hour_of_day': (0, 23),
+    'day_of_week': (0, 6),
+    'is_weekend': (0, 1),
+    'is_night': (0, 1)
+}
+
+
+def add_time_features(df, extended=False):
+    """
+    Hour and weekday of each event; weekend / night flags when extended
+    """
+    df['hour_of_day'] = df['date'].dt.hour
+    df['day_of_week'] = df['date'].dt.dayofweek
+    if extended:
+        df['is_weekend'] = df['day_of_week'].isin([5, 6]).astype(int)
+        df['is_night'] = ((df['hour_of_day'] < 6) | (df['hour_of_day'] > 22)).astype(int)
+    return df
+
+
+def fit_label_encoder(values):
+    """
+    LabelEncoder fitted on a column
+    Returns: (encoder, codes)
+    """
+    from sklearn.preprocessing import LabelEncoder
+
+    encoder = LabelEncoder()
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        # A parsed log's categories are already its sorted distinct values, so
+        # the category codes are the labels without sorting every string again
+        values = values.cat.remove_unused_categories()
+        categories = values.cat.categories
+        if categories.is_monotonic_increasing and not values.isna().any():
+            encoder.classes_ = categories.to_numpy(dtype=object)
+            return encoder, values.cat.codes.to_numpy().astype(np.int64)
+    return encoder, encoder.fit_transform(values)
+
+
+def encode_categoricals(df):
+    """
+    Label-encode user, pc and activity into <column>_encoded
+    Returns: the fitted encoders by column
+    """
+    encoders = {}
+    for column in CATEGORICAL_COLUMNS:
+        encoders[column], df[f'{column}_encoded'] = fit_label_encoder(df[column])
+    return encoders
+
+
+def apply_encoders(df, encoders):
+    """
+    Encode new events with encoders fitted at training time
+    Values never seen in training get code -1, outside the trained range
+    """
+    for column, encoder in encoders.items():
+        df[f'{column}_encoded'] = pd.Categorical(df[column], categories=encoder.classes_).codes.astype(int)
+    return df
+
+
+def feature_bounds(feature_set, encoders):
+    """
+    Inclusive (lows, highs) of every feature for a trained encoder set
+    Encoded columns run from -1 (unseen in training) to the last class
+    """
+    lows, highs = [], []
+    for feature in FEATURE_SETS[feature_set]:
+        if feature in TIME_FEATURE_RANGES:
+            low, high = TIME_FEATURE_RANGES[feature]
+        elif feature in BEHAVIOURAL_FEATURE_RANGES:
+            low, high = BEHAVIOURAL_FEATURE_RANGES[feature]
+        else:
+            low, high = -1, len(encoders[feature[:-len('_encoded')]].classes_) - 1
+        lows.append(low)
+        highs.append(high)
+    return np.array(lows), np.array(highs)
+
+
+def behavioural_states(df):
+    """Live per-user rolling, session and access-graph state after every event of a log"""
+    return RollingFeatureState.from_history(df), SessionState.from_history(df), AccessGraph.from_history(df)
+
+
+def add_behavioural_features(df, states=None):
+    """
+    Rolling, session and graph features, in place; from states (as made by
+    behavioural_states, and advanced by these events) when given, otherwise
+    from the events in df alone
+    """
+    if states is None:
+        add_rolling_features(df)
+        add_session_features(df)
+        add_graph_features(df)
+    else:
+        for state in states:
+            state.update(df)
+    return df
+
+
+def transform_features(df, encoders, feature_set="base", states=None):
+    """
+    Model input for new events, using training-time encoders
+    states: behavioural_states of earlier events, for the behavioural set
+    """
+    if feature_set not in FEATURE_SETS:
+        raise ValueError(f"Unknown feature set: {feature_set}")
+
+    add_time_features(df, extended=feature_set != "base")
+    if feature_set == "behavioural":
+        add_behavioural_features(df, states)
+    apply_encoders(df, encoders)
+    return df[FEATURE_SETS[feature_set]]
+
+
+def build_feature_matrix(df, feature_set="base"):
+    """
+    Add the features for a feature set and return the model input
+    Returns: (X, encoders)
+    """
+    if feature_set not in FEATURE_SETS:
+        raise ValueError(f"Unknown feature set: {feature_set}")
+
+    add_time_features(df, extended=feature_set != "base")
+    if feature_set == "behavioural":
+        add_behavioural_features(df)
+    encoders = encode_categoricals(df)
+    return df[FEATURE_SETS[feature_set]], encoders
@@ -0,0 +1,271 @@
+"""
+Ignisyl Core - Tail-Follow Ingestion
+Reads only the rows appended to a growing CSV log since the last poll
+
+The follower keeps the file open and remembers its byte offset and any
+trailing partial line, so a row that is half-written during one poll is
+picked up whole on the next. Like `tail -F` it copes with:
+    rotation    the path now names a different file: the rest of the old
+                file is read first, then the new file from its start
+    truncation  the file shrank or its first bytes changed: restart at 0
+State can be checkpointed to JSON so a restarted follower resumes where
+it stopped instead of re-reading the whole log.
+"""
+
+import base64
+import hashlib
+import io
+import json
+import logging
+import os
+import time
+
+import pandas as pd
+
+from .ingestion import LOG_COLUMNS
+
+logger = logging.getLogger("ignisyl.follow")
+
+FINGERPRINT_BYTES = 1024
+READ_CHUNK_BYTES = 8 * 1024 * 1024
+DEFAULT_POLL_SECONDS = 1.0
+
+
+def _identity(stat):
+    return (stat.st_dev, stat.st_ino)
+
+
+class LogFollower:
+    """
+    Incremental reader for an append-only CSV activity log
+    """
+
+    def __init__(self, path, state_path=None, skip_existing=False):
+        self.path = path
+        self.state_path = state_path
+        self.skip_existing = skip_existing
+        self.header = None
+        self.offset = 0
+        self.partial = b""
+        self.fingerprint = None
+        self.identity = None
+        self.bad_rows = 0
+        self.rotations = 0
+        self.truncations = 0
+        self._handle = None
+        self._expect_header = True   # the next complete line is the file's header
+        if state_path and os.path.exists(state_path):
+            self._load_state()
+
+    # --- State ---
+    def _load_state(self):
+        with open(self.state_path, "r") as f:
+            state = json.load(f)
+        if os.path.abspath(state.get("path", "")) != os.path.abspath(self.path):
+            logger.warning("State file %s is for %s; starting fresh", self.state_path, state.get("path"))
+            return
+        self.header = state.get("header")
+        self.offset = state.get("offset", 0)
+        self.partial = base64.b64decode(state.get("partial", ""))
+        self.fingerprint = state.get("fingerprint")
+        self.identity = tuple(state["identity"]) if state.get("identity") else None
+        self._expect_header = self.header is None
+
+    def checkpoint(self):
+        """Persist the read position; call once the rows returned by poll() are stored"""
+        if not self.state_path:
+            return
+        state = {
+            "path": os.path.abspath(self.path),
+            "header": self.header,
+            "offset": self.offset,
+            "partial": base64.b64encode(self.partial).decode("ascii"),
+            "fingerprint": self.fingerprint,
+            "identity": list(self.identity) if self.identity else None
+        }
+        temp_path = f"{self.state_path}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump(state, f)
+        os.replace(temp_path, self.state_path)
+
+    # --- File tracking ---
+    def _head_fingerprint(self, handle):
+        """Hash of the first FINGERPRINT_BYTES, or None while the file is shorter than that"""
+        position = handle.tell()
+        handle.seek(0)
+        head = handle.read(FINGERPRINT_BYTES)
+        handle.seek(position)
+        return hashlib.sha256(head).hexdigest() if len(head) == FINGERPRINT_BYTES else None
+
+    def _restart(self):
+        self.offset = 0
+        self.partial = b""
+        self.fingerprint = None
+        self._expect_header = True
+
+    def _set_header(self, line):
+        header = line.decode("utf-8").strip().split(",")
+        missing = [column for column in LOG_COLUMNS if column not in header]
+        if missing:
+            raise ValueError(f"'{self.path}' is missing columns: {', '.join(missing)}")
+        self.header = header
+        self._expect_header = False
+
+    def _open(self, resume):
+        """
+        Open the file at self.path, resuming at the saved offset when it is
+        the same file that was being followed
+        Returns: False if the file does not exist (yet)
+        """
+        try:
+            handle = open(self.path, "rb")
+        except FileNotFoundError:
+            return False
+        stat = os.fstat(handle.fileno())
+        fingerprint = self._head_fingerprint(handle)
+        same_file = (resume and self.identity == _identity(stat) and self.offset <= stat.st_size
+                     and (self.fingerprint is None or fingerprint == self.fingerprint))
+
+        if same_file:
+            handle.seek(self.offset)
+        else:
+            if resume and self.identity is not None:
+                logger.info("%s changed while not followed; reading it from the start", self.path)
+            first_open = self.identity is None
+            self._restart()
+            header = handle.readline() if self.skip_existing and first_open else b""
+            if header.endswith(b"\n"):
+                # Start at the end of the last complete line, taking the header from the top
+                self._set_header(header)
+                data = handle.read()
+                self.offset = handle.tell() - (len(data) - data.rfind(b"\n") - 1)
+                handle.seek(self.offset)
+            else:
+                # Empty, or the header is still being written: nothing to skip yet
+                handle.seek(0)
+
+        self._handle = handle
+        self.identity = _identity(stat)
+        return True
+
+    def _read_available(self):
+        chunks = []
+        while True:
+            chunk = self._handle.read(READ_CHUNK_BYTES)
+            if not chunk:
+                break
+            chunks.append(chunk)
+            self.offset += len(chunk)
+        return b"".join(chunks)
+
+    def _follow_current_file(self):
+        """
+        Detect rotation and truncation before reading
+        Returns: rows still unread in a rotated-away file
+        """
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None   # mid-rotation: keep reading the old file
+
+        if _identity(stat) != self.identity:
+            # Whatever was appended to the old file before it was renamed comes first
+            tail = self.partial + self._read_available()
+            if tail and not tail.endswith(b"\n"):
+                tail += b"\n"
+            rows = self._parse_lines(tail) if tail else None
+            self._handle.close()
+            self._handle = None
+            self.rotations += 1
+            logger.info("%s was rotated", self.path)
+            self._restart()
+            self._open(resume=False)
+            return rows
+
+        if stat.st_size < self.offset:
+            reason = "was truncated"
+        elif self.fingerprint is not None and self._head_fingerprint(self._handle) != self.fingerprint:
+            reason = "was rewritten"
+        else:
+            return None
+        self.truncations += 1
+        logger.info("%s %s; reading from the start", self.path, reason)
+        self._handle.seek(0)
+        self._restart()
+        return None
+
+    # --- Reading ---
+    def _parse_lines(self, data):
+        """Complete CSV lines -> DataFrame in the log schema"""
+        lines = [line.rstrip(b"\r") for line in data.split(b"\n")]   # CRLF exports from Windows
+        if self._expect_header:
+            self._set_header(lines.pop(0))
+        lines = [line for line in lines if line.strip()]
+        if not lines:
+            return None
+
+        df = pd.read_csv(io.BytesIO(b"\n".join(lines)), names=self.header, header=None,
+                         on_bad_lines="skip", dtype=str)
+        df['date'] = pd.to_datetime(df['date'], errors="coerce")
+        bad = df[LOG_COLUMNS].isna().any(axis=1)
+        self.bad_rows += int(bad.sum()) + len(lines) - len(df)
+        return df.loc[~bad, LOG_COLUMNS].reset_index(drop=True)
+
+    def poll(self):
+        """
+        Rows completed since the last poll (an empty frame when there are none)
+        """
+        frames = []
+        if self._handle is None:
+            if not self._open(resume=True):
+                return pd.DataFrame(columns=LOG_COLUMNS)
+        else:
+            frames.append(self._follow_current_file())
+
+        data = self.partial + self._read_available()
+        cut = data.rfind(b"\n") + 1
+        complete, self.partial = data[:cut], data[cut:]
+        if complete:
+            frames.append(self._parse_lines(complete))
+        if self.fingerprint is None and self.offset >= FINGERPRINT_BYTES:
+            self.fingerprint = self._head_fingerprint(self._handle)
+
+        frames = [frame for frame in frames if frame is not None and len(frame)]
+        if not frames:
+            return pd.DataFrame(columns=LOG_COLUMNS)
+        return frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+
+    def close(self):
+        if self._handle:
+            self._handle.close()
+            self._handle = None
+
+
+def run_follower(follower, sink, poll_interval=DEFAULT_POLL_SECONDS, once=False):
+    """
+    Poll until interrupted (or once), passing each delta to sink(rows) and
+    checkpointing only after the sink has stored it, so a crash re-reads
+    at most the last delta instead of losing it
+    Returns: total rows handled
+    """
+    total = 0
+    try:
+        while True:
+            started = time.perf_counter()
+            rows = follower.poll()
+            if len(rows):
+                sink(rows)
+                total += len(rows)
+                logger.info("Scored %d new rows in %.2fs (offset %d, %d total)", len(rows),
+                            time.perf_counter() - started, follower.offset, total)
+            follower.checkpoint()
+            if once:
+                break
+            time.sleep(poll_interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        follower.close()
+    if follower.bad_rows:
+        logger.warning("Skipped %d malformed rows", follower.bad_rows)
+    return total
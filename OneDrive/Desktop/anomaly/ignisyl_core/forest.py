@@ -0,0 +1,150 @@
+"""
+Ignisyl Core - Compiled Isolation Forest
+A fitted IsolationForest flattened into NumPy arrays for fast scoring
+
+decision_function on one row spends almost all its time in input
+validation, joblib dispatch and one tree.apply call per tree, not in the
+trees themselves. CompiledForest lays every node of every tree out in one
+set of contiguous arrays - split feature, threshold, left and right child,
+and for leaves the path length the event is charged - and walks all trees
+for a batch of rows at once, one level per step.
+
+The arithmetic is sklearn's, in the same order: each leaf's value is its
+depth plus the average path length of its training samples minus one,
+values are added up tree by tree, and the score is 2^(-depth / c(n)).
+Scores are identical to the estimator's, not merely close.
+
+A single event scores in well under a millisecond instead of around ten.
+Past a couple of thousand rows sklearn's compiled per-tree walk wins, so
+callers scoring large batches should keep using the estimator
+(see COMPILED_MAX_ROWS). The arrays are also a fraction of the size of the
+pickled estimator and can be saved and loaded without scikit-learn.
+
+Flattening reads private IsolationForest attributes, so
+compile_isolation_forest checks the result against the estimator on a
+sample of training rows and gives None when sklearn's internals have moved
+on; callers then score with the estimator.
+"""
+
+import os
+
+import numpy as np
+
+# Rows walked through the trees at once; bounds the (rows, trees) node buffer
+SCORE_CHUNK_ROWS = 8192
+# Batch size above which IsolationForest.decision_function is the faster one
+COMPILED_MAX_ROWS = 2048
+# Training rows compile_isolation_forest compares against the estimator
+VERIFY_ROWS = 256
+
+_ARRAYS = ("roots", "features", "thresholds", "children", "leaf_values")
+
+
+class CompiledForest:
+    """
+    Isolation Forest as flat node arrays; leaves point at themselves
+    """
+
+    def __init__(self, roots, features, thresholds, children, leaf_values, max_depth, denominator, offset):
+        self.roots = roots               # (trees,) index of each tree's root
+        self.features = features         # split column per node (0 at leaves)
+        self.thresholds = thresholds     # go left if value <= threshold (+inf at leaves)
+        self.children = children         # left child of node i at 2i, right child at 2i + 1
+        self.leaf_values = leaf_values   # path length charged for ending at each leaf
+        self.max_depth = max_depth
+        self.denominator = denominator   # trees x average path length of max_samples
+        self.offset = offset             # IsolationForest.offset_
+
+    @classmethod
+    def from_isolation_forest(cls, model):
+        """Flatten a fitted sklearn IsolationForest"""
+        from sklearn.ensemble._iforest import _average_path_length
+
+        roots, features, thresholds, children, leaf_values = [], [], [], [], []
+        start, max_depth = 0, 0
+        for estimator, columns, path_lengths, depths in zip(
+                model.estimators_, model.estimators_features_,
+                model._average_path_length_per_tree, model._decision_path_lengths):
+            tree = estimator.tree_
+            nodes = np.arange(tree.node_count)
+            is_leaf = tree.children_left == -1
+
+            roots.append(start)
+            features.append(np.where(is_leaf, 0, np.asarray(columns)[np.maximum(tree.feature, 0)]))
+            thresholds.append(np.where(is_leaf, np.inf, tree.threshold))
+            children.append(np.column_stack([np.where(is_leaf, nodes, tree.children_left),
+                                             np.where(is_leaf, nodes, tree.children_right)]).ravel() + start)
+            leaf_values.append(depths + path_lengths - 1.0)
+            start += tree.node_count
+            max_depth = max(max_depth, tree.max_depth)
+
+        denominator = len(model.estimators_) * _average_path_length([model._max_samples])[0]
+        return cls(np.array(roots, dtype=np.int32), np.concatenate(features).astype(np.int32),
+                   np.concatenate(thresholds), np.concatenate(children).astype(np.int32),
+                   np.concatenate(leaf_values),
+                   max_depth, float(denominator), float(model.offset_))
+
+    @property
+    def nbytes(self):
+        return sum(getattr(self, name).nbytes for name in _ARRAYS)
+
+    def save(self, path):
+        """Write the arrays to an .npz file atomically"""
+        temp_path = f"{path}.tmp.npz"
+        np.savez(temp_path, max_depth=self.max_depth, denominator=self.denominator, offset=self.offset,
+                 **{name: getattr(self, name) for name in _ARRAYS})
+        os.replace(temp_path, path)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as saved:
+            return cls(*(saved[name] for name in _ARRAYS), int(saved["max_depth"]),
+                       float(saved["denominator"]), float(saved["offset"]))
+
+    def _leaves(self, X):
+        """(rows, trees) leaf reached in every tree"""
+        nodes = np.broadcast_to(self.roots, (len(X), len(self.roots)))
+        # np.take on flat arrays gathers about twice as fast as fancy indexing
+        values = X.ravel()
+        row_starts = np.arange(len(X))[:, np.newaxis] * X.shape[1]
+        for _ in range(self.max_depth):
+            split_values = np.take(values, row_starts + np.take(self.features, nodes))
+            goes_right = split_values > np.take(self.thresholds, nodes)
+            nodes = np.take(self.children, 2 * nodes + goes_right)
+        return nodes
+
+    def score_samples(self, X):
+        """Same as IsolationForest.score_samples; X is a 2-D array or DataFrame"""
+        # Trees were fitted on float32, so thresholds are compared against float32 values
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        scores = np.empty(len(X))
+        for start in range(0, len(X), SCORE_CHUNK_ROWS):
+            chunk = X[start:start + SCORE_CHUNK_ROWS]
+            # cumsum adds tree by tree, in the order sklearn does
+            depths = np.cumsum(self.leaf_values[self._leaves(chunk)], axis=1)[:, -1]
+            # A forest fitted on one sample has denominator 0; sklearn scores it 2^-1
+            ratio = depths / self.denominator if self.denominator else np.ones_like(depths)
+            scores[start:start + len(chunk)] = -(2 ** (-ratio))
+        return scores
+
+    def decision_function(self, X):
+        """Same as IsolationForest.decision_function"""
+        return self.score_samples(X) - self.offset
+
+
+def compile_isolation_forest(model, X, rows=VERIFY_ROWS):
+    """
+    CompiledForest of a fitted IsolationForest, or None if this sklearn
+    version cannot be flattened or scores any of up to rows rows of its
+    training data X differently
+    """
+    try:
+        compiled = CompiledForest.from_isolation_forest(model)
+    except (AttributeError, ImportError):
+        return None
+    sample = X.iloc if hasattr(X, "iloc") else X
+    sample = sample[np.unique(np.linspace(0, len(X) - 1, min(rows, len(X))).astype(np.int64))]
+    if not np.array_equal(compiled.decision_function(sample), model.decision_function(sample)):
+        return None
+    return compiled
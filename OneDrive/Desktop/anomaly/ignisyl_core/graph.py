@@ -0,0 +1,223 @@
+"""
+Ignisyl Core - Access Graph
+Who uses which PC and which activity, as weighted edges
+
+Label encoding turns a user and a PC into two unrelated integers, so the
+model cannot tell a user's own desk from a machine they have never touched.
+The access graph counts events on every user -> PC and user -> activity
+edge and gives each event
+
+    pc_edge_level        how often the user had used this PC before, on a
+                         log2 scale: 0 never, 1 once, 2 twice or three
+                         times, ... up to EDGE_LEVEL_CAP
+    activity_edge_level  the same for the user and this activity
+    pc_users             distinct users seen on the PC before (capped)
+
+and an access_alert for an established user (ESTABLISHED_USER_EVENTS
+earlier events) on an edge that is new or rare (at most RARE_EDGE_LEVEL):
+new_pc, new_activity, rare_pc or rare_activity, the first that applies,
+or an empty string.
+
+add_graph_features computes a batch with a few stable sorts and grouped
+counts. AccessGraph keeps the counts in hash maps keyed by edge for a live
+feed, so looking up and counting an event is constant time; adjacency()
+exports them as scipy sparse matrices. The two give identical values on a
+time-ordered log.
+"""
+
+import threading
+
+import numpy as np
+import pandas as pd
+
+EDGE_LEVEL_CAP = 6            # 32 or more earlier events
+RARE_EDGE_LEVEL = 2           # at most 3 earlier events
+ESTABLISHED_USER_EVENTS = 50
+MAX_PC_USERS = 10
+
+# Inclusive value range of each graph feature
+GRAPH_FEATURE_RANGES = {
+    'pc_edge_level': (0, EDGE_LEVEL_CAP),
+    'activity_edge_level': (0, EDGE_LEVEL_CAP),
+    'pc_users': (0, MAX_PC_USERS)
+}
+GRAPH_FEATURES = list(GRAPH_FEATURE_RANGES)
+ALERT_COLUMN = 'access_alert'
+
+
+def edge_levels(counts):
+    """0 for no earlier events, else 1 + floor(log2(count)), capped"""
+    counts = np.asarray(counts, dtype=np.int64)
+    levels = np.zeros(len(counts), dtype=np.int64)
+    seen = counts > 0
+    levels[seen] = np.floor(np.log2(counts[seen])).astype(np.int64) + 1
+    return np.minimum(levels, EDGE_LEVEL_CAP)
+
+
+def _edge_level(count):
+    """edge_levels for one count, in plain Python"""
+    return min(count.bit_length(), EDGE_LEVEL_CAP)
+
+
+def _alerts(user_events, pc_level, activity_level):
+    established = np.asarray(user_events) >= ESTABLISHED_USER_EVENTS
+    pc_level, activity_level = np.asarray(pc_level), np.asarray(activity_level)
+    return np.select([established & (pc_level == 0), established & (activity_level == 0),
+                      established & (pc_level <= RARE_EDGE_LEVEL),
+                      established & (activity_level <= RARE_EDGE_LEVEL)],
+                     ["new_pc", "new_activity", "rare_pc", "rare_activity"], "")
+
+
+def _alert(user_events, pc_level, activity_level):
+    """_alerts for one event, in plain Python"""
+    if user_events < ESTABLISHED_USER_EVENTS:
+        return ""
+    if pc_level == 0:
+        return "new_pc"
+    if activity_level == 0:
+        return "new_activity"
+    if pc_level <= RARE_EDGE_LEVEL:
+        return "rare_pc"
+    if activity_level <= RARE_EDGE_LEVEL:
+        return "rare_activity"
+    return ""
+
+
+def _earlier(keys, weights=None):
+    """Sum of weights (default 1) over earlier rows with the same key"""
+    order = np.argsort(keys, kind="stable")
+    weights = np.ones(len(keys), dtype=np.int64) if weights is None else weights
+    sorted_keys, sorted_weights = keys[order], weights[order]
+    before = np.cumsum(sorted_weights) - sorted_weights
+    starts = np.r_[True, sorted_keys[1:] != sorted_keys[:-1]]
+    group_base = before[np.maximum.accumulate(np.where(starts, np.arange(len(keys)), 0))]
+    result = np.empty(len(keys), dtype=np.int64)
+    result[order] = before - group_base
+    return result
+
+
+def add_graph_features(df):
+    """
+    Graph features and access_alert for a batch (date column already
+    datetime), in place; events with the same time keep their order in df
+    """
+    if len(df) == 0:
+        for feature in GRAPH_FEATURES:
+            df[feature] = np.empty(0, dtype=np.int64)
+        df[ALERT_COLUMN] = np.empty(0, dtype=object)
+        return df
+
+    users = pd.factorize(df['user'])[0]
+    pcs = pd.factorize(df['pc'])[0]
+    activities = pd.factorize(df['activity'])[0]
+    order = np.argsort(df['date'].to_numpy(dtype='datetime64[ns]'), kind="stable")
+    users, pcs, activities = users[order], pcs[order], activities[order]
+
+    pc_counts = _earlier(users * (pcs.max() + 1) + pcs)
+    activity_counts = _earlier(users * (activities.max() + 1) + activities)
+    pc_users = _earlier(pcs, (pc_counts == 0).astype(np.int64))
+    user_events = _earlier(users)
+
+    pc_level, activity_level = edge_levels(pc_counts), edge_levels(activity_counts)
+    values = {
+        'pc_edge_level': pc_level,
+        'activity_edge_level': activity_level,
+        'pc_users': np.minimum(pc_users, MAX_PC_USERS)
+    }
+    for feature, sorted_values in values.items():
+        column = np.empty(len(order), dtype=np.int64)
+        column[order] = sorted_values
+        df[feature] = column
+    alerts = np.empty(len(order), dtype=object)
+    alerts[order] = _alerts(user_events, pc_level, activity_level)
+    df[ALERT_COLUMN] = alerts
+    return df
+
+
+class AccessGraph:
+    """
+    Edge counts of user -> PC and user -> activity for a live feed; thread-safe
+    Events are expected in time order
+    """
+
+    def __init__(self):
+        self.pc_edges = {}         # (user, pc) -> events
+        self.activity_edges = {}   # (user, activity) -> events
+        self.pc_users = {}         # pc -> distinct users
+        self.user_events = {}      # user -> events
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_history(cls, df):
+        """Graph of every event of a log"""
+        graph = cls()
+        frame = pd.DataFrame({column: df[column].astype(str).to_numpy() for column in ('user', 'pc', 'activity')})
+        graph.pc_edges = frame.groupby(['user', 'pc'], sort=False).size().to_dict()
+        graph.activity_edges = frame.groupby(['user', 'activity'], sort=False).size().to_dict()
+        graph.pc_users = pd.Series([pc for _, pc in graph.pc_edges]).value_counts(sort=False).to_dict()
+        graph.user_events = frame['user'].value_counts(sort=False).to_dict()
+        return graph
+
+    def update(self, df):
+        """Graph features and access_alert for new events, in place, counting them into the graph"""
+        columns = {feature: [] for feature in GRAPH_FEATURES}
+        alerts = []
+        with self._lock:
+            for user, pc, activity in zip(df['user'].astype(str).tolist(), df['pc'].astype(str).tolist(),
+                                          df['activity'].astype(str).tolist()):
+                pc_count = self.pc_edges.get((user, pc), 0)
+                activity_count = self.activity_edges.get((user, activity), 0)
+                pc_users = self.pc_users.get(pc, 0)
+                user_events = self.user_events.get(user, 0)
+
+                pc_level, activity_level = _edge_level(pc_count), _edge_level(activity_count)
+                columns['pc_edge_level'].append(pc_level)
+                columns['activity_edge_level'].append(activity_level)
+                columns['pc_users'].append(min(pc_users, MAX_PC_USERS))
+                alerts.append(_alert(user_events, pc_level, activity_level))
+
+                self.pc_edges[(user, pc)] = pc_count + 1
+                self.activity_edges[(user, activity)] = activity_count + 1
+                if not pc_count:
+                    self.pc_users[pc] = pc_users + 1
+                self.user_events[user] = user_events + 1
+
+        for feature, values in columns.items():
+            df[feature] = np.array(values, dtype=np.int64)
+        df[ALERT_COLUMN] = np.array(alerts, dtype=object)
+        return df
+
+    def adjacency(self, kind="pc"):
+        """
+        Edge counts as a sparse matrix
+        Returns: (users x targets scipy CSR matrix, users, targets), kind "pc" or "activity"
+        """
+        from scipy.sparse import csr_matrix
+
+        if kind not in ("pc", "activity"):
+            raise ValueError(f"Unknown edge kind: {kind}")
+        with self._lock:
+            edges = dict(self.pc_edges if kind == "pc" else self.activity_edges)
+        user_codes, users = pd.factorize(np.array([user for user, _ in edges], dtype=object))
+        target_codes, targets = pd.factorize(np.array([target for _, target in edges], dtype=object))
+        matrix = csr_matrix((np.fromiter(edges.values(), dtype=np.int64, count=len(edges)),
+                             (user_codes, target_codes)), shape=(len(users), len(targets)))
+        return matrix, list(users), list(targets)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "users": len(self.user_events),
+                "pcs": len(self.pc_users),
+                "pc_edges": len(self.pc_edges),
+                "activity_edges": len(self.activity_edges)
+            }
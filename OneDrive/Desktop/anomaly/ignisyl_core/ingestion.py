@@ -0,0 +1,209 @@
+"""
+Ignisyl Core - Ingestion
+Locates and loads activity log files (date, user, pc, activity)
+
+A directory or glob of daily / per-host logs is parsed on a process pool,
+one file per task, and the pieces are merged into time order. Gzipped
+logs (.csv.gz) are decompressed as a stream while parsing.
+
+Files are parsed against a fixed schema instead of letting pandas infer
+it: only the log columns are read, user / pc / activity become category
+columns, and dates are parsed with LOG_DATE_FORMAT (falling back to
+inference for exports in another format). engine="pyarrow" parses with
+Arrow's multi-threaded reader and its native ISO-8601 timestamp parser.
+"""
+
+import glob
+import os
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from functools import partial
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+LOG_COLUMNS = ['date', 'user', 'pc', 'activity']
+LOG_DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+LOG_DTYPES = {'user': "category", 'pc': "category", 'activity': "category"}
+CSV_ENGINES = ("c", "pyarrow")
+LOG_PATTERNS = ("*.csv", "*.csv.gz")
+DEFAULT_CHUNK_ROWS = 500_000
+PARALLEL_MIN_BYTES = 16 * 1024 * 1024   # below this, starting a pool costs more than it saves
+
+
+class FileStats(namedtuple("FileStats", ["path", "rows", "bytes", "seconds"])):
+    """Parse throughput for one log file (bytes are as stored, i.e. compressed for .gz)"""
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    @property
+    def mb_per_second(self):
+        return self.bytes / 1e6 / self.seconds if self.seconds else 0.0
+
+    def summary(self):
+        return (f"{os.path.basename(self.path)}: {self.rows:,} rows, {self.bytes / 1e6:,.1f} MB "
+                f"in {self.seconds:.2f}s ({self.rows_per_second:,.0f} rows/s, {self.mb_per_second:,.1f} MB/s)")
+
+
+def resolve_log_files(path):
+    """
+    Expand a file, directory or glob pattern into a sorted list of log files
+    Raises FileNotFoundError when nothing matches
+    """
+    if os.path.isdir(path):
+        files = []
+        for pattern in LOG_PATTERNS:
+            files.extend(glob.glob(os.path.join(path, pattern)))
+    elif glob.has_magic(path):
+        files = glob.glob(path)
+    else:
+        files = [path] if os.path.exists(path) else []
+
+    if not files:
+        raise FileNotFoundError(f"No log files found at '{path}'")
+    return sorted(files)
+
+
+def parse_event(event):
+    """
+    Validate one event and parse its date
+    Raises ValueError for missing fields or an unparseable date
+    """
+    if not isinstance(event, dict):
+        raise ValueError("Each event must be a JSON object")
+    missing = [column for column in LOG_COLUMNS if column not in event]
+    if missing:
+        raise ValueError(f"Event is missing fields: {', '.join(missing)}")
+    try:
+        date = pd.Timestamp(event['date'])
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Invalid date '{event['date']}': {e}") from e
+    if pd.isna(date):
+        raise ValueError("Event date is empty")
+    if date.tzinfo is not None:
+        date = date.tz_convert(None)  # naive UTC, like the CSV logs
+    return {'date': date, 'user': str(event['user']), 'pc': str(event['pc']),
+            'activity': str(event['activity'])}
+
+
+def parse_dates(dates):
+    """Parse a date column with the log's fixed format, inferring it only if that fails"""
+    try:
+        return pd.to_datetime(dates, format=LOG_DATE_FORMAT)
+    except ValueError:
+        return pd.to_datetime(dates)
+
+
+def _check_columns(file_path):
+    header = pd.read_csv(file_path, nrows=0).columns
+    missing = [column for column in LOG_COLUMNS if column not in header]
+    if missing:
+        raise ValueError(f"'{file_path}' is missing columns: {', '.join(missing)}")
+
+
+def read_activity_log(file_path, engine="c"):
+    """
+    Load one log file with the log schema
+    Compression (.gz) is inferred from the extension and streamed
+    """
+    if engine not in CSV_ENGINES:
+        raise ValueError(f"Unknown CSV engine '{engine}'; use one of {', '.join(CSV_ENGINES)}")
+    _check_columns(file_path)
+
+    if engine == "pyarrow":
+        try:
+            # Arrow parses ISO-8601 timestamps itself; anything else stays text
+            df = pd.read_csv(file_path, usecols=LOG_COLUMNS, dtype=LOG_DTYPES, engine="pyarrow")
+        except ImportError as e:
+            raise RuntimeError("The pyarrow CSV engine needs pyarrow: pip install pyarrow") from e
+    else:
+        df = pd.read_csv(file_path, usecols=LOG_COLUMNS, dtype={**LOG_DTYPES, 'date': str})
+
+    if not pd.api.types.is_datetime64_any_dtype(df['date']):
+        df['date'] = parse_dates(df['date'])
+    return df[LOG_COLUMNS]
+
+
+def iter_activity_chunks(path, chunksize=DEFAULT_CHUNK_ROWS):
+    """
+    Stream every log file under a path as typed frames of at most chunksize
+    rows, file by file, without holding more than one chunk in memory
+    """
+    for file_path in resolve_log_files(path):
+        _check_columns(file_path)
+        reader = pd.read_csv(file_path, usecols=LOG_COLUMNS, dtype={**LOG_DTYPES, 'date': str},
+                             chunksize=chunksize)
+        with reader:
+            for chunk in reader:
+                chunk['date'] = parse_dates(chunk['date'])
+                yield chunk[LOG_COLUMNS]
+
+
+def _read_timed(file_path, sort=True, engine="c"):
+    """Pool task: parse one file, putting rows in time order if they are not already"""
+    started = time.perf_counter()
+    df = read_activity_log(file_path, engine)
+    if sort and not df['date'].is_monotonic_increasing:
+        df = df.sort_values('date', kind="stable", ignore_index=True)
+    stats = FileStats(file_path, len(df), os.path.getsize(file_path), time.perf_counter() - started)
+    return df, stats
+
+
+def _align_categories(frames):
+    """Give each category column the union of its categories, so concat keeps it categorical"""
+    dtypes = {}
+    for column in LOG_DTYPES:
+        if all(isinstance(frame[column].dtype, pd.CategoricalDtype) for frame in frames):
+            union = union_categoricals([frame[column] for frame in frames], sort_categories=True)
+            dtypes[column] = union.dtype
+    return [frame.astype(dtypes) for frame in frames] if dtypes else frames
+
+
+def merge_by_time(frames):
+    """
+    Merge frames that are each sorted by date into one time-ordered frame
+    The stable sort is Timsort, which finds each frame as a pre-sorted run and
+    merges the runs - a k-way merge in O(n log k) - keeping file order for ties
+    """
+    df = pd.concat(_align_categories(frames), ignore_index=True)
+    order = np.argsort(df['date'].to_numpy(), kind="stable")
+    return df.take(order).reset_index(drop=True)
+
+
+def load_activity_logs(path, workers=None, engine="c"):
+    """
+    Load every log file under a path, in parallel when there are several
+    A single file is returned in its original row order; several files are
+    merged into time order
+    Returns: (df, [FileStats per file])
+    """
+    files = resolve_log_files(path)
+    if len(files) == 1:
+        df, stats = _read_timed(files[0], sort=False, engine=engine)
+        return df, [stats]
+
+    workers = min(workers or os.cpu_count() or 1, len(files))
+    total_bytes = sum(os.path.getsize(file_path) for file_path in files)
+    read = partial(_read_timed, engine=engine)
+    if workers > 1 and total_bytes >= PARALLEL_MIN_BYTES:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(read, files))
+    else:
+        results = [read(file_path) for file_path in files]
+
+    df = merge_by_time([frame for frame, _ in results])
+    return df, [stats for _, stats in results]
+
+
+def read_activity_logs(path, workers=None, engine="c"):
+    """
+    Load every log file under a path into a single frame
+    Returns: (df, files)
+    """
+    df, file_stats = load_activity_logs(path, workers, engine)
+    return df, [stats.path for stats in file_stats]
@@ -0,0 +1,335 @@
+"""
+Ignisyl Core - Network Log Listener
+asyncio listener for logon events sent over UDP or TCP
+
+Accepted line formats (one event per line or datagram):
+    JSON lines        {"date": "...", "user": "...", "pc": "...", "activity": "..."}
+    RFC 5424 syslog   <134>1 2024-10-01T08:15:00Z host app - - - user=john_doe pc=PC-001 activity=Logon
+    RFC 3164 syslog   <134>Oct  1 08:15:00 host app: user=john_doe pc=PC-001 activity=Logon
+    CSV               2024-10-01 08:15:00,john_doe,PC-001,Logon
+
+A syslog message body may itself be JSON, key=value pairs or CSV. Without
+a date field, the syslog header timestamp (or the arrival time) is used.
+
+Events go through a bounded queue to a single scoring worker. When the
+queue is full, UDP datagrams are dropped and counted, and TCP connections
+stop being read, so TCP senders are slowed by flow control instead.
+"""
+
+import asyncio
+import json
+import logging
+import re
+import signal
+import socket
+import time
+from datetime import datetime
+
+import pandas as pd
+
+from .ingestion import LOG_COLUMNS, parse_event
+from .metrics import Counters, LatencyHistogram
+from .output import append_results
+from .scoring import ACTION_LABELS
+from .whitelist import WhitelistWatcher
+
+logger = logging.getLogger("ignisyl.listener")
+
+DEFAULT_QUEUE_SIZE = 10000
+DEFAULT_BATCH_SIZE = 256
+DEFAULT_FLUSH_SECONDS = 0.2
+MAX_LINE_BYTES = 64 * 1024
+UDP_RECEIVE_BUFFER_BYTES = 4 * 1024 * 1024   # absorbs bursts the kernel would otherwise drop
+
+SYSLOG_PRI = re.compile(r'^<(\d{1,3})>')
+RFC5424_HEADER = re.compile(
+    r'^\d (?P<timestamp>\S+) \S+ \S+ \S+ \S+ (?:-|(?:\[[^\]]*\])+) ?(?P<message>.*)$'
+)
+RFC3164_HEADER = re.compile(
+    r'^(?P<timestamp>[A-Z][a-z]{2} [ \d]\d \d\d:\d\d:\d\d) \S+ [^:]+: ?(?P<message>.*)$'
+)
+KEY_VALUE = re.compile(r'(\w+)=("[^"]*"|\S+)')
+
+
+def _parse_body(body):
+    """Fields from a JSON, key=value or CSV message body"""
+    body = body.strip()
+    if body.startswith("{"):
+        try:
+            fields = json.loads(body)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON: {e}") from e
+        if not isinstance(fields, dict):
+            raise ValueError("JSON event must be an object")
+        return fields
+
+    pairs = KEY_VALUE.findall(body)
+    if pairs:
+        return {key: value.strip('"') for key, value in pairs}
+
+    parts = [part.strip() for part in body.split(",")]
+    if len(parts) == len(LOG_COLUMNS):
+        return dict(zip(LOG_COLUMNS, parts))
+    raise ValueError(f"Unrecognised event: {body[:80]}")
+
+
+def _syslog_timestamp(text, rfc3164):
+    if rfc3164:
+        # RFC 3164 has no year; assume the current one
+        return datetime.strptime(f"{datetime.now().year} {text}", "%Y %b %d %H:%M:%S")
+    return text
+
+
+def parse_log_line(line):
+    """
+    Parse one received line into the date, user, pc, activity schema
+    Raises ValueError when the line cannot be used
+    """
+    line = line.strip()
+    if not line:
+        raise ValueError("Empty line")
+
+    header_timestamp = None
+    match = SYSLOG_PRI.match(line)
+    if match:
+        rest = line[match.end():]
+        header = RFC5424_HEADER.match(rest)
+        if header:
+            header_timestamp = _syslog_timestamp(header.group("timestamp"), rfc3164=False)
+            line = header.group("message")
+        else:
+            header = RFC3164_HEADER.match(rest)
+            if header:
+                header_timestamp = _syslog_timestamp(header.group("timestamp"), rfc3164=True)
+                line = header.group("message")
+            else:
+                line = rest
+
+    fields = _parse_body(line)
+    if "date" not in fields:
+        fields["date"] = header_timestamp or datetime.now()
+    return parse_event(fields)
+
+
+class ScoringSink:
+    """
+    Scores each batch with a trained detector and appends it to an output
+    Called from a worker thread, one batch at a time
+    """
+
+    def __init__(self, detector, whitelist_path=None, output=None, action_labels=ACTION_LABELS):
+        self.detector = detector
+        self.whitelist = WhitelistWatcher(whitelist_path) if whitelist_path else None
+        self.output = output
+        self.action_labels = action_labels
+        self.level_counts = {"High": 0, "Medium": 0, "Low": 0}
+
+    def __call__(self, events):
+        whitelist = self.whitelist.current() if self.whitelist else None
+        df = self.detector.assess(pd.DataFrame(events, columns=LOG_COLUMNS), whitelist,
+                                  self.action_labels)
+        for level, count in df['risk_level'].value_counts().items():
+            self.level_counts[level] = self.level_counts.get(level, 0) + int(count)
+
+        alerts = df[(df['risk_level'] == 'High') & (~df['is_whitelisted'])]
+        for row in alerts.itertuples():
+            logger.warning("High risk: %s on %s (%s) score %.2f", row.user, row.pc, row.activity,
+                           row.risk_score)
+        if 'access_alert' in df.columns:
+            for row in df[(df['access_alert'] != "") & (~df['is_whitelisted'])].itertuples():
+                logger.info("Access alert %s: %s on %s (%s)", row.access_alert, row.user, row.pc, row.activity)
+
+        if self.output:
+            append_results(df, self.output)
+        return df
+
+
+class LogListener:
+    """
+    UDP and TCP receivers feeding a bounded queue drained by one scoring worker
+    sink(events) runs in a thread so scoring never blocks the event loop
+    """
+
+    def __init__(self, sink, queue_size=DEFAULT_QUEUE_SIZE, batch_size=DEFAULT_BATCH_SIZE,
+                 flush_interval=DEFAULT_FLUSH_SECONDS):
+        self.sink = sink
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.counters = Counters("received", "parsed", "parse_errors", "dropped",
+                                 "backpressure_waits", "scored", "batches", "sink_errors")
+        self.batch_latency = LatencyHistogram()
+        self.queue = None
+        self._servers = []
+        self._transports = []
+        self._worker = None
+        self._busy = False   # a batch has left the queue but is not yet scored
+
+    # --- Intake ---
+    def _parse(self, raw):
+        self.counters.add("received")
+        try:
+            text = raw.decode("utf-8", errors="replace") if isinstance(raw, bytes) else raw
+            event = parse_log_line(text)
+        except ValueError as e:
+            self.counters.add("parse_errors")
+            logger.debug("Unparseable line: %s", e)
+            return None
+        self.counters.add("parsed")
+        return event
+
+    def offer(self, raw):
+        """Non-blocking intake (UDP): drop the event if the queue is full"""
+        event = self._parse(raw)
+        if event is None:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.counters.add("dropped")
+
+    async def put(self, raw):
+        """Blocking intake (TCP): wait for queue space, which pauses reading the socket"""
+        event = self._parse(raw)
+        if event is None:
+            return
+        if self.queue.full():
+            self.counters.add("backpressure_waits")
+        await self.queue.put(event)
+
+    async def _handle_tcp(self, reader, writer):
+        peer = writer.get_extra_info("peername")
+        logger.info("TCP connection from %s", peer)
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (asyncio.LimitOverrunError, ValueError):
+                    self.counters.add("parse_errors")
+                    continue
+                if not line:
+                    break
+                if line.strip():
+                    await self.put(line)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    # --- Scoring worker ---
+    async def _next_batch(self):
+        batch = [await self.queue.get()]
+        self._busy = True
+        deadline = time.perf_counter() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _drain(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            self._busy = False
+            batch = await self._next_batch()
+            started = time.perf_counter()
+            try:
+                await loop.run_in_executor(None, self.sink, batch)
+                self.counters.add("scored", len(batch))
+            except Exception:
+                self.counters.add("sink_errors")
+                logger.exception("Scoring batch of %d failed", len(batch))
+            self.batch_latency.record(time.perf_counter() - started)
+            self.counters.add("batches")
+
+    # --- Lifecycle ---
+    async def start(self, host="127.0.0.1", udp_port=None, tcp_port=None):
+        if udp_port is None and tcp_port is None:
+            raise ValueError("At least one of udp_port and tcp_port is required")
+        loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=self.queue_size)
+        listener = self
+
+        class UdpProtocol(asyncio.DatagramProtocol):
+            def datagram_received(self, data, addr):
+                for line in data.splitlines():
+                    if line.strip():
+                        listener.offer(line)
+
+        if udp_port is not None:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            try:
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, UDP_RECEIVE_BUFFER_BYTES)
+            except OSError:
+                pass
+            sock.bind((host, udp_port))
+            transport, _ = await loop.create_datagram_endpoint(UdpProtocol, sock=sock)
+            self._transports.append(transport)
+            logger.info("Listening for UDP on %s:%s", host, transport.get_extra_info("sockname")[1])
+        if tcp_port is not None:
+            server = await asyncio.start_server(self._handle_tcp, host, tcp_port, limit=MAX_LINE_BYTES)
+            self._servers.append(server)
+            logger.info("Listening for TCP on %s:%s", host, server.sockets[0].getsockname()[1])
+
+        self._worker = asyncio.create_task(self._drain())
+        return self
+
+    async def stop(self, drain_timeout=10):
+        """Stop accepting events, then score what is already queued"""
+        for transport in self._transports:
+            transport.close()
+        for server in self._servers:
+            server.close()
+            await server.wait_closed()
+
+        deadline = time.perf_counter() + drain_timeout
+        while (self._busy or not self.queue.empty()) and time.perf_counter() < deadline:
+            await asyncio.sleep(0.05)
+        if self._worker:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+
+    def stats(self):
+        snapshot = self.counters.snapshot()
+        snapshot["queue_depth"] = self.queue.qsize() if self.queue else 0
+        snapshot["batch_latency"] = self.batch_latency.snapshot()
+        return snapshot
+
+    def summary(self):
+        s = self.counters.snapshot()
+        depth = self.queue.qsize() if self.queue else 0
+        return (f"received {s['received']:,} · scored {s['scored']:,} · queue {depth:,}/{self.queue_size:,} · "
+                f"dropped {s['dropped']:,} · backpressure {s['backpressure_waits']:,} · "
+                f"parse errors {s['parse_errors']:,}")
+
+
+async def run_listener(listener, host="127.0.0.1", udp_port=None, tcp_port=None, stats_interval=10.0):
+    """
+    Run until SIGINT / SIGTERM (or cancellation), logging counters every
+    stats_interval seconds, then score what is still queued
+    """
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(signum, stopping.set)
+        except (NotImplementedError, RuntimeError):
+            pass   # Windows: Ctrl+C still arrives as KeyboardInterrupt
+
+    await listener.start(host, udp_port, tcp_port)
+    try:
+        while not stopping.is_set():
+            try:
+                await asyncio.wait_for(stopping.wait(), stats_interval)
+            except asyncio.TimeoutError:
+                logger.info(listener.summary())
+    finally:
+        await listener.stop()
+        logger.info("Stopped: %s", listener.summary())
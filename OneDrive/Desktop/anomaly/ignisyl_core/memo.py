@@ -0,0 +1,167 @@
+"""
+Ignisyl Core - Score Memoisation
+Scores each distinct feature vector once
+
+Every model feature is a small integer (label codes, hour, weekday, flags),
+so a log of millions of events holds far fewer distinct feature vectors.
+Rows are packed into one int64 key each, the way digits make up a number,
+deduplicated by hashing the keys, scored once per distinct row and the
+scores scattered back to every event.
+
+ScoreMemo keeps raw model outputs across calls for one model version, so
+a pattern seen before costs a dictionary lookup instead of a forest walk.
+A memo can be saved next to others in a directory and reloaded by a later
+process that trains the same model (same data and parameters).
+"""
+
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_MEMO_ENTRIES = 2_000_000
+_MAX_KEY_SPACE = 2 ** 62
+
+
+def fits_in_key(lows, highs):
+    """Whether rows with these inclusive column ranges can be packed by row_keys"""
+    spans = np.asarray(highs, dtype=np.int64) - np.asarray(lows, dtype=np.int64) + 1
+    return bool(np.prod(spans.astype(float)) < _MAX_KEY_SPACE)
+
+
+def row_keys(X, lows, highs):
+    """
+    One int64 per row, treating column j as a digit in base highs[j] - lows[j] + 1
+    Raises OverflowError if the combined range does not fit in an int64
+    """
+    if not fits_in_key(lows, highs):
+        raise OverflowError("Feature ranges are too wide to pack into one key")
+    X = np.asarray(X, dtype=np.int64)
+    spans = np.asarray(highs, dtype=np.int64) - np.asarray(lows, dtype=np.int64) + 1
+
+    keys = np.zeros(len(X), dtype=np.int64)
+    for column, (low, span) in enumerate(zip(lows, spans)):
+        keys = keys * span + (X[:, column] - low)
+    return keys
+
+
+def unique_rows(X):
+    """
+    Distinct rows of an integer feature matrix
+    Returns: (first, inverse) - the row index of each distinct row's first
+    occurrence, and for every row the position of its distinct row
+    """
+    values = np.asarray(X)
+    if len(values) == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    try:
+        keys = row_keys(values, values.min(axis=0), values.max(axis=0))
+    except OverflowError:
+        _, first, inverse = np.unique(values, axis=0, return_index=True, return_inverse=True)
+        return first, inverse.reshape(-1)
+    return _first_occurrences(keys)
+
+
+def _first_occurrences(keys):
+    inverse, uniques = pd.factorize(keys)
+    first = np.empty(len(uniques), dtype=np.int64)
+    first[inverse[::-1]] = np.arange(len(keys) - 1, -1, -1)   # the last write is the first occurrence
+    return first, inverse
+
+
+def score_unique(score, X):
+    """
+    score(X) computed on the distinct rows of X only, expanded back to every row
+    X is a DataFrame so the model still sees its feature names
+    """
+    first, inverse = unique_rows(X.to_numpy())
+    if len(first) == len(X):
+        return score(X)
+    return np.asarray(score(X.iloc[first]))[inverse]
+
+
+class ScoreMemo:
+    """
+    Raw model outputs by feature-row key for one model version
+    Thread-safe; stops growing at max_entries
+    """
+
+    def __init__(self, version, max_entries=DEFAULT_MEMO_ENTRIES):
+        self.version = version
+        self.max_entries = max_entries
+        self._scores = {}   # key -> tuple of raw scores
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._scores)
+
+    def score(self, keys, X, compute):
+        """
+        Raw scores for every row of X, computing only rows whose key is new
+        compute(rows) returns an (n, k) array of raw scores for a DataFrame of rows
+        """
+        first, inverse = _first_occurrences(keys)
+        unique_keys = keys[first].tolist()
+        with self._lock:
+            cached = [self._scores.get(key) for key in unique_keys]
+        missing = [position for position, value in enumerate(cached) if value is None]
+
+        if missing:
+            computed = np.asarray(compute(X.iloc[first[missing]]), dtype=float)
+            with self._lock:
+                room = self.max_entries - len(self._scores)
+                for position, values in zip(missing, computed):
+                    value = tuple(values)
+                    cached[position] = value
+                    if room > 0:
+                        self._scores[unique_keys[position]] = value
+                        room -= 1
+
+        with self._lock:
+            self.misses += len(missing)
+            self.hits += len(unique_keys) - len(missing)
+        return np.array(cached, dtype=float)[inverse]
+
+    # --- Persistence ---
+    def path_in(self, directory):
+        return os.path.join(directory, f"memo_{self.version}.npz")
+
+    def save(self, directory):
+        """Write the memo to <directory>/memo_<version>.npz"""
+        os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            keys = np.fromiter(self._scores.keys(), dtype=np.int64, count=len(self._scores))
+            values = np.array(list(self._scores.values()), dtype=float)
+        path = self.path_in(directory)
+        temp_path = f"{path}.tmp.npz"
+        np.savez(temp_path, keys=keys, values=values)
+        os.replace(temp_path, path)
+        return path
+
+    def load(self, directory):
+        """
+        Merge in the saved memo for this version, if there is one
+        Returns: entries loaded
+        """
+        path = self.path_in(directory)
+        if not os.path.exists(path):
+            return 0
+        with np.load(path) as saved:
+            keys, values = saved["keys"], saved["values"]
+        with self._lock:
+            self._scores.update(zip(keys.tolist(), map(tuple, values.tolist())))
+        return len(keys)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "version": self.version,
+                "entries": len(self._scores),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
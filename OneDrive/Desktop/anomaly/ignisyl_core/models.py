@@ -0,0 +1,171 @@
+"""
+Ignisyl Core - Detection Models
+Isolation Forest and the autoencoder used in the ensemble
+
+scikit-learn is imported when a model is first built, not with the module,
+so dashboards and the CLI start without paying for it.
+
+Most training rows are exact repeats. The Isolation Forest only fits its
+trees on small subsamples; the costly part of fit() is scoring every row
+to place the contamination threshold, which is done here on the distinct
+rows and weighted by their counts - the fitted model is identical. With
+deduplicate=True the autoencoder also trains on distinct rows, weighting
+each by its count, which gives statistically equivalent (not identical)
+reconstruction errors in a fraction of the time.
+
+With several cores the ensemble trains its members concurrently: the
+autoencoder in a worker process, the forest's trees and scoring on threads
+in this one. ensemble_parallelism decides the split from the core count.
+"""
+
+import inspect
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .memo import score_unique, unique_rows
+
+
+class AutoencoderDetector:
+    """
+    Autoencoder for anomaly detection
+    Learns to reconstruct normal patterns; high reconstruction error = anomaly
+    """
+
+    def __init__(self, hidden_layers=(10, 5, 10)):
+        from sklearn.neural_network import MLPRegressor
+        from sklearn.preprocessing import StandardScaler
+
+        self.model = MLPRegressor(
+            hidden_layer_sizes=list(hidden_layers),
+            activation='relu',
+            solver='adam',
+            max_iter=500,
+            random_state=42
+        )
+        self.scaler = StandardScaler()
+
+    @property
+    def supports_sample_weight(self):
+        """MLPRegressor.fit takes sample_weight from scikit-learn 1.7"""
+        return "sample_weight" in inspect.signature(self.model.fit).parameters
+
+    def fit(self, X, sample_weight=None):
+        """Train autoencoder on normal data, optionally weighting each row"""
+        if sample_weight is None:
+            X_scaled = self.scaler.fit_transform(X)
+            self.model.fit(X_scaled, X_scaled)  # Train to reconstruct input
+        else:
+            X_scaled = self.scaler.fit(X, sample_weight=sample_weight).transform(X)
+            self.model.fit(X_scaled, X_scaled, sample_weight=sample_weight)
+        return self
+
+    def partial_fit(self, X):
+        """
+        One pass of mini-batch updates over X, with the scaler already fitted
+        Returns: the mean training loss of the pass
+        """
+        X_scaled = self.scaler.transform(X)
+        self.model.partial_fit(X_scaled, X_scaled)
+        return self.model.loss_
+
+    def predict_anomaly_score(self, X):
+        """Calculate reconstruction error as anomaly score"""
+        X_scaled = self.scaler.transform(X)
+        X_reconstructed = self.model.predict(X_scaled)
+
+        # Reconstruction error (MSE per sample)
+        return np.mean((X_scaled - X_reconstructed) ** 2, axis=1)
+
+
+# Below this many rows a second process costs more to start than it saves
+PARALLEL_ENSEMBLE_MIN_ROWS = 20_000
+
+
+def available_cores():
+    """Cores this process may run on (the affinity mask where the OS has one)"""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def ensemble_parallelism(rows, n_jobs=None):
+    """
+    How to spend n_jobs cores (default: all available) on an ensemble fit
+    Returns: (train the autoencoder in a worker process, threads for the forest)
+
+    The autoencoder is a small MLP that gains little from more than one core,
+    so it gets one and the forest, whose trees are independent, the rest.
+    """
+    cores = n_jobs if n_jobs and n_jobs > 0 else available_cores()
+    if cores < 2 or rows < PARALLEL_ENSEMBLE_MIN_ROWS:
+        return False, cores
+    return True, cores - 1
+
+
+def train_isolation_forest(X, contamination=0.01, n_jobs=None):
+    """
+    Fit an Isolation Forest, building and scoring trees on n_jobs threads
+    (default: one per available core; the trees are the same for any n_jobs)
+    Returns: (model, decision_function scores; lower = more anomalous)
+    """
+    from joblib import parallel_config
+    from sklearn.ensemble import IsolationForest
+
+    n_jobs = n_jobs or available_cores()
+    # Fit the trees only, then place the threshold the way fit() would -
+    # the contamination percentile of the training scores - from distinct rows
+    model = IsolationForest(contamination="auto", random_state=42, n_jobs=n_jobs)
+    model.fit(X)
+    first, inverse = unique_rows(X.to_numpy())
+    with parallel_config(backend="threading", n_jobs=n_jobs):
+        unique_scores = model.score_samples(X.iloc[first])
+    # The trees do not depend on n_jobs; leave it out so the saved model (and
+    # its memo version) is the same whichever machine trained it
+    model.n_jobs = None
+    model.contamination = contamination
+    model.offset_ = np.percentile(np.repeat(unique_scores, np.bincount(inverse)), 100.0 * contamination)
+    return model, (unique_scores - model.offset_)[inverse]
+
+
+def train_autoencoder(X, deduplicate=False):
+    """
+    Fit the autoencoder, on distinct rows weighted by their counts if deduplicate
+    Returns: (autoencoder, reconstruction errors for every row of X)
+    """
+    autoencoder = AutoencoderDetector(hidden_layers=(10, 5, 10))
+    if deduplicate and autoencoder.supports_sample_weight:
+        first, inverse = unique_rows(X.to_numpy())
+        autoencoder.fit(X.iloc[first], sample_weight=np.bincount(inverse))
+    else:
+        autoencoder.fit(X)
+    return autoencoder, score_unique(autoencoder.predict_anomaly_score, X)
+
+
+def _train_autoencoder_single_threaded(X, deduplicate):
+    # Pool worker: keep BLAS to one thread so it does not compete with the forest
+    from threadpoolctl import threadpool_limits
+
+    with threadpool_limits(limits=1):
+        return train_autoencoder(X, deduplicate)
+
+
+def train_ensemble_model(X, contamination=0.01, deduplicate=False, n_jobs=None):
+    """
+    Train both Isolation Forest and Autoencoder, concurrently when the cores
+    and the data allow (see ensemble_parallelism)
+    Returns: (iso_forest, autoencoder, iso_scores, ae_scores)
+    """
+    concurrent, iso_jobs = ensemble_parallelism(len(X), n_jobs)
+    if not concurrent:
+        iso_forest, iso_scores = train_isolation_forest(X, contamination, iso_jobs)
+        autoencoder, ae_scores = train_autoencoder(X, deduplicate)
+        return iso_forest, autoencoder, iso_scores, ae_scores
+
+    with ProcessPoolExecutor(max_workers=1) as pool:
+        autoencoder_job = pool.submit(_train_autoencoder_single_threaded, X, deduplicate)
+        iso_forest, iso_scores = train_isolation_forest(X, contamination, iso_jobs)
+        autoencoder, ae_scores = autoencoder_job.result()
+
+    return iso_forest, autoencoder, iso_scores, ae_scores
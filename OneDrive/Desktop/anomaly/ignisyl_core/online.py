@@ -0,0 +1,183 @@
+"""
+Ignisyl Core - Online Detection
+Half-Space Trees: an anomaly detector that learns one event at a time
+
+Isolation Forest has to see the whole batch before it can score anything.
+Half-Space Trees (Tan, Ting & Liu, 2011) are built before any data arrives:
+every node halves one random feature's range of a randomly shifted
+workspace, so only node masses (event counts) are learnt. Events are
+counted into the latest window; every window_size events the latest masses
+become the reference masses and counting starts over. An event's mass
+score is the reference mass of the node it ends in times 2^depth, summed
+over the trees, so events in regions the reference window rarely visited
+score low - lower is more anomalous, like decision_function. Mass scores
+span orders of magnitude, so log2(1 + mass) is reported; it ranks events
+the same and spreads them over the 0-100 risk scale much like the forest.
+Scoring and learning one event cost O(trees x depth) and memory does not
+grow with the stream.
+
+Trees are NumPy arrays in heap order (node i has children 2i+1 and 2i+2),
+so an event walks every tree at once. The reference masses only change
+when a window rolls over, so each run of events inside one window is
+scored in a single vectorised pass - the same result as event by event.
+"""
+
+import threading
+
+import numpy as np
+
+DEFAULT_TREES = 25
+DEFAULT_DEPTH = 15
+DEFAULT_WINDOW = 250
+
+
+class HalfSpaceTrees:
+    """
+    Streaming Half-Space Trees over integer feature rows with known bounds
+    Thread-safe; score_learn scores events against the reference window,
+    then counts them towards the next one
+    """
+
+    def __init__(self, lows, highs, n_trees=DEFAULT_TREES, depth=DEFAULT_DEPTH, window_size=DEFAULT_WINDOW,
+                 size_limit=0.1, seed=42):
+        self.lows = np.asarray(lows, dtype=float)
+        self.spans = np.maximum(np.asarray(highs, dtype=float) - self.lows, 1.0)
+        self.n_trees = n_trees
+        self.depth = depth
+        self.window_size = window_size
+        self.size_limit = size_limit   # stop descending below this share of the reference window
+        self.seed = seed
+
+        self.split_features, self.split_values = self._build_trees(np.random.default_rng(seed))
+        n_nodes = 2 ** (depth + 1) - 1
+        self.reference = np.zeros((n_trees, n_nodes), dtype=np.int64)
+        self.latest = np.zeros((n_trees, n_nodes), dtype=np.int64)
+        self.reference_rows = 0   # events behind the reference masses
+        self.window_rows = 0      # events counted into the latest window
+        self.windows = 0
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self):
+        """True once a reference window exists; before that every score is 0"""
+        return self.reference_rows > 0
+
+    def _build_trees(self, rng):
+        """Split feature and value of every internal node, level by level"""
+        n_features = len(self.lows)
+        n_internal = 2 ** self.depth - 1
+        split_features = np.empty((self.n_trees, n_internal), dtype=np.int64)
+        split_values = np.empty((self.n_trees, n_internal))
+
+        for tree in range(self.n_trees):
+            # Workspace of each feature: a random point in [0, 1] widened so
+            # that the unit range always falls inside it
+            centre = rng.random(n_features)
+            half_width = 2 * np.maximum(centre, 1 - centre)
+            mins = np.empty((2 ** (self.depth + 1) - 1, n_features))
+            maxs = np.empty_like(mins)
+            mins[0], maxs[0] = centre - half_width, centre + half_width
+
+            for level in range(self.depth):
+                nodes = np.arange(2 ** level - 1, 2 ** (level + 1) - 1)
+                features = rng.integers(n_features, size=len(nodes))
+                values = (mins[nodes, features] + maxs[nodes, features]) / 2
+                split_features[tree, nodes], split_values[tree, nodes] = features, values
+
+                left, right = 2 * nodes + 1, 2 * nodes + 2
+                mins[left], maxs[left] = mins[nodes], maxs[nodes]
+                mins[right], maxs[right] = mins[nodes], maxs[nodes]
+                maxs[left, features] = values
+                mins[right, features] = values
+        return split_features, split_values
+
+    def _paths(self, X):
+        """(depth + 1, rows, trees) node index at every level, root first"""
+        X = (np.asarray(X, dtype=float) - self.lows) / self.spans
+        trees = np.arange(self.n_trees)
+        paths = np.zeros((self.depth + 1, len(X), self.n_trees), dtype=np.int64)
+        for level in range(self.depth):
+            nodes = paths[level]
+            features = self.split_features[trees, nodes]
+            goes_right = np.take_along_axis(X, features, axis=1) >= self.split_values[trees, nodes]
+            paths[level + 1] = 2 * nodes + 1 + goes_right
+        return paths
+
+    def _score_paths(self, paths):
+        trees = np.arange(self.n_trees)
+        masses = self.reference[trees, paths]
+        # An event stops at the first node too sparse to split further, or at a leaf
+        too_sparse = masses < self.size_limit * self.reference_rows
+        too_sparse[-1] = True
+        stop_level = too_sparse.argmax(axis=0)
+        stop_mass = np.take_along_axis(masses, stop_level[np.newaxis], axis=0)[0]
+        return np.log2(1 + (stop_mass * 2.0 ** stop_level).sum(axis=1))
+
+    def _count(self, paths):
+        np.add.at(self.latest, (np.arange(self.n_trees), paths), 1)
+        self.window_rows += paths.shape[1]
+        if self.window_rows >= self.window_size:
+            self.roll_window()
+
+    def roll_window(self):
+        """Make the latest masses the reference and start a new window"""
+        self.reference, self.latest = self.latest, np.zeros_like(self.latest)
+        self.reference_rows, self.window_rows = self.window_rows, 0
+        self.windows += 1
+
+    def _window_runs(self, X):
+        """Consecutive slices of X that each end at or before a window boundary"""
+        start = 0
+        while start < len(X):
+            stop = min(len(X), start + self.window_size - self.window_rows)
+            yield X[start:stop]
+            start = stop
+
+    def learn(self, X):
+        """Count events towards the latest window without scoring them"""
+        X = np.asarray(X)
+        with self._lock:
+            for run in self._window_runs(X):
+                self._count(self._paths(run))
+        return self
+
+    def score(self, X):
+        """log2(1 + mass score) against the reference window, without learning"""
+        with self._lock:
+            return self._score_paths(self._paths(X))
+
+    def score_learn(self, X):
+        """Score each event against the reference window, then learn it"""
+        X = np.asarray(X)
+        scores = np.empty(len(X))
+        done = 0
+        with self._lock:
+            for run in self._window_runs(X):
+                paths = self._paths(run)
+                scores[done:done + len(run)] = self._score_paths(paths)
+                self._count(paths)
+                done += len(run)
+        return scores
+
+
+def train_half_space_trees(X, bounds, **options):
+    """
+    Build Half-Space Trees for feature rows within bounds (lows, highs), prime
+    the reference window with the first window of X, then stream all of X
+    Returns: (model, log mass scores in row order; lower = more anomalous)
+    """
+    model = HalfSpaceTrees(*bounds, **options)
+    values = X.to_numpy()
+    model.learn(values[:model.window_size])
+    if not model.ready:   # fewer rows than one window
+        model.roll_window()
+    return model, model.score_learn(values)
@@ -0,0 +1,130 @@
+"""
+Ignisyl Core - Result Writers
+Write scored logs to Parquet, CSV, JSON lines or the SQLite risk history
+"""
+
+import os
+import sqlite3
+
+OUTPUT_FORMATS = {
+    ".parquet": "parquet",
+    ".csv": "csv",
+    ".jsonl": "jsonl",
+    ".db": "sqlite",
+    ".sqlite": "sqlite",
+    ".sqlite3": "sqlite"
+}
+
+RESULT_COLUMNS = ['timestamp', 'user', 'pc', 'activity', 'risk_score', 'risk_level',
+                  'firewall_action', 'model_used']
+
+RISK_SCORES_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS risk_scores (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp DATETIME,
+        user TEXT,
+        pc TEXT,
+        activity TEXT,
+        risk_score REAL,
+        risk_level TEXT,
+        firewall_action TEXT,
+        model_used TEXT
+    )
+'''
+
+
+def detect_format(path):
+    """Output format from a file extension"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in OUTPUT_FORMATS:
+        raise ValueError(f"Cannot infer output format from '{path}'; use one of "
+                         f"{', '.join(sorted(OUTPUT_FORMATS))}")
+    return OUTPUT_FORMATS[extension]
+
+
+def result_columns(df):
+    """Columns worth persisting: the log fields plus scores and actions"""
+    extra = [column for column in ('iso_score', 'ae_score', 'anomaly_score', 'is_whitelisted', 'access_alert')
+             if column in df.columns]
+    return [column for column in RESULT_COLUMNS if column in df.columns] + extra
+
+
+def write_parquet(df, path):
+    try:
+        df.to_parquet(path, index=False)
+    except ImportError as e:
+        raise RuntimeError("Parquet output needs pyarrow: pip install pyarrow") from e
+
+
+def write_csv(df, path):
+    df.to_csv(path, index=False)
+
+
+def write_jsonl(df, path, mode="w"):
+    with open(path, mode) as f:
+        df.to_json(f, orient="records", lines=True, date_format="iso")
+
+
+def write_sqlite(df, path, model_used=None):
+    """
+    Append scored events to the risk_scores table used by the dashboards
+    """
+    def column_or(name, default):
+        return df[name] if name in df.columns else [default] * len(df)
+
+    rows = zip(
+        df['timestamp'], df['user'], df['pc'], df['activity'],
+        df['risk_score'].astype(float), df['risk_level'],
+        column_or('firewall_action', None),
+        [model_used] * len(df) if model_used else column_or('model_used', None)
+    )
+
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute(RISK_SCORES_SCHEMA)
+        conn.executemany('''
+            INSERT INTO risk_scores (timestamp, user, pc, activity, risk_score, risk_level, firewall_action, model_used)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', rows)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+WRITERS = {
+    "parquet": write_parquet,
+    "csv": write_csv,
+    "jsonl": write_jsonl,
+    "sqlite": write_sqlite
+}
+
+
+def write_results(df, path, output_format=None):
+    """
+    Write scored logs in the format given or implied by the extension
+    Returns: the format used
+    """
+    output_format = output_format or detect_format(path)
+    if output_format == "sqlite":
+        write_sqlite(df, path)
+    else:
+        WRITERS[output_format](df[result_columns(df)], path)
+    return output_format
+
+
+def append_results(df, path, output_format=None):
+    """
+    Append scored events to an existing output, for continuous ingestion
+    Parquet files cannot be appended to; use CSV, JSON lines or SQLite
+    """
+    output_format = output_format or detect_format(path)
+    if output_format == "sqlite":
+        write_sqlite(df, path)
+    elif output_format == "csv":
+        write_header = not os.path.exists(path) or os.path.getsize(path) == 0
+        df[result_columns(df)].to_csv(path, mode="a", header=write_header, index=False)
+    elif output_format == "jsonl":
+        write_jsonl(df[result_columns(df)], path, mode="a")
+    else:
+        raise ValueError(f"Cannot append to {output_format} output '{path}'; use .csv, .jsonl or .db")
+    return output_format
@@ -0,0 +1,235 @@
+"""
+Ignisyl Core - Peer-Group Models
+One small Isolation Forest per group of users who behave alike
+
+The global model treats user_encoded as a number, so a split on it
+separates users by where their names sort, not by how they behave. Peer
+groups cluster users with k-means on their behaviour - the share of their
+events in each activity and in each hour of the day - and train one forest
+per group on that group's events, without the user column. Users with at
+least heavy_user_rows events can get a forest of their own.
+
+Groups are trained on a process pool. All forests share the training
+encoders (one vocabulary) and are kept as CompiledForest arrays, a
+fraction of the estimator's size. With a model_dir every forest is written
+there and loaded when an event first needs it, with at most max_loaded
+held in memory.
+
+An event is routed by its user code. Events of users unseen in training go
+to the group whose centroid is closest to that one event's activity and
+hour, so routing never depends on the rest of the batch.
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .forest import CompiledForest
+from .models import PARALLEL_ENSEMBLE_MIN_ROWS, available_cores, train_isolation_forest
+
+DEFAULT_PEER_GROUPS = 8
+DEFAULT_MAX_LOADED = 16
+HOURS = 24
+
+
+def behaviour_histograms(X, n_users, n_activities):
+    """
+    (n_users, n_activities + 24) share of each user's events in every
+    activity, then in every hour of the day
+    """
+    users = X['user_encoded'].to_numpy()
+    activities = X['activity_encoded'].to_numpy()
+    hours = X['hour_of_day'].to_numpy()
+    known = users >= 0
+    with_activity = known & (activities >= 0)
+
+    activity_counts = np.bincount(users[with_activity] * n_activities + activities[with_activity],
+                                  minlength=n_users * n_activities).reshape(n_users, n_activities)
+    hour_counts = np.bincount(users[known] * HOURS + hours[known],
+                              minlength=n_users * HOURS).reshape(n_users, HOURS)
+    totals = np.maximum(hour_counts.sum(axis=1, keepdims=True), 1)
+    return np.hstack([activity_counts, hour_counts]) / totals
+
+
+def _train_group(X, contamination, n_jobs):
+    model, scores = train_isolation_forest(X, contamination, n_jobs)
+    return CompiledForest.from_isolation_forest(model), scores
+
+
+class PeerGroupModels:
+    """
+    Routes events to per-group forests; thread-safe
+    """
+
+    def __init__(self, n_groups=DEFAULT_PEER_GROUPS, heavy_user_rows=None, contamination=0.01, model_dir=None,
+                 max_loaded=DEFAULT_MAX_LOADED):
+        self.n_groups = n_groups
+        self.heavy_user_rows = heavy_user_rows
+        self.contamination = contamination
+        self.model_dir = model_dir
+        self.max_loaded = max_loaded
+
+        self.n_activities = 0
+        self.centroids = None     # (clusters, activities + 24), for routing unseen users
+        self.user_groups = None   # group of every user code
+        self.group_rows = {}      # group -> training events
+        self.digests = {}         # group -> hash of its forest's arrays
+        self.loads = 0
+        self._models = OrderedDict()   # group -> CompiledForest, least recently used first
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        # Forests saved under model_dir are reloaded from there
+        state = self.__dict__.copy()
+        del state["_lock"]
+        state["_models"] = OrderedDict() if self.model_dir else self._models
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    @property
+    def groups(self):
+        return sorted(self.group_rows)
+
+    def fingerprint(self):
+        """Everything that decides a score - routing and each forest's digest - not where forests live"""
+        return (self.n_activities, self.centroids.tobytes(), self.user_groups.tobytes(),
+                sorted(self.digests.items()))
+
+    # --- Training ---
+    def fit(self, X, encoders, n_jobs=None):
+        """
+        Cluster the users of a feature matrix and train every group's forest
+        Returns: decision_function of every training row under its group's forest
+        """
+        from sklearn.cluster import KMeans
+
+        n_users = len(encoders['user'].classes_)
+        self.n_activities = len(encoders['activity'].classes_)
+        histograms = behaviour_histograms(X, n_users, self.n_activities)
+        clusters = min(self.n_groups, n_users)
+        kmeans = KMeans(n_clusters=clusters, n_init=4, random_state=42).fit(histograms)
+        self.centroids = kmeans.cluster_centers_
+        self.user_groups = kmeans.labels_.astype(np.int64)
+        if self.heavy_user_rows:
+            counts = np.bincount(X['user_encoded'], minlength=n_users)
+            heavy = np.flatnonzero(counts >= self.heavy_user_rows)
+            self.user_groups[heavy] = clusters + np.arange(len(heavy))
+
+        groups = self.route(X)
+        features = self._features(X)
+        members = {group: np.flatnonzero(groups == group) for group in np.unique(groups).tolist()}
+        self.group_rows = {group: len(rows) for group, rows in members.items()}
+
+        cores = n_jobs if n_jobs and n_jobs > 0 else available_cores()
+        workers = min(cores, len(members))
+        if workers > 1 and len(X) >= PARALLEL_ENSEMBLE_MIN_ROWS:
+            # Largest groups first so the pool does not end waiting on one big group
+            order = sorted(members, key=lambda group: -len(members[group]))
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                jobs = {group: pool.submit(_train_group, features.iloc[members[group]], self.contamination, 1)
+                        for group in order}
+                results = {group: job.result() for group, job in jobs.items()}
+        else:
+            results = {group: _train_group(features.iloc[rows], self.contamination, cores)
+                       for group, rows in members.items()}
+
+        scores = np.empty(len(X))
+        for group, (forest, group_scores) in results.items():
+            scores[members[group]] = group_scores
+            self._store(group, forest)
+        return scores
+
+    # --- Routing and scoring ---
+    def route(self, X):
+        """Group of every event"""
+        users = X['user_encoded'].to_numpy()
+        groups = np.empty(len(users), dtype=np.int64)
+        known = users >= 0
+        groups[known] = self.user_groups[users[known]]
+
+        unseen = np.flatnonzero(~known)
+        if len(unseen):
+            # Closest centroid to the event's own histogram (a one in its activity
+            # and in its hour): |c|^2 - 2 (c[activity] + c[hour]), constants dropped
+            activities = X['activity_encoded'].to_numpy()[unseen]
+            hours = X['hour_of_day'].to_numpy()[unseen]
+            nearness = self.centroids[:, self.n_activities + hours].T.copy()
+            seen_activity = activities >= 0
+            nearness[seen_activity] += self.centroids[:, activities[seen_activity]].T
+            distances = (self.centroids ** 2).sum(axis=1) - 2 * nearness
+            groups[unseen] = distances.argmin(axis=1)
+        return groups
+
+    @staticmethod
+    def _features(X):
+        return X.drop(columns='user_encoded')
+
+    def decision_function(self, X):
+        """Each event's score under its group's forest; lower = more anomalous"""
+        groups = self.route(X)
+        features = self._features(X).to_numpy()
+        scores = np.empty(len(X))
+        for group in np.unique(groups).tolist():
+            rows = np.flatnonzero(groups == group)
+            scores[rows] = self.model(group).decision_function(features[rows])
+        return scores
+
+    # --- Storage ---
+    def _path(self, group):
+        return os.path.join(self.model_dir, f"peer_group_{group}.npz")
+
+    def _store(self, group, forest):
+        digest = hashlib.sha256()
+        for array in (forest.features, forest.thresholds, forest.children, forest.leaf_values):
+            digest.update(array.tobytes())
+        self.digests[group] = digest.hexdigest()[:16]
+        if self.model_dir:
+            os.makedirs(self.model_dir, exist_ok=True)
+            forest.save(self._path(group))
+        with self._lock:
+            self._cache(group, forest)
+
+    def _cache(self, group, forest):
+        self._models[group] = forest
+        self._models.move_to_end(group)
+        # Without a model_dir a forest that is dropped cannot come back
+        while self.model_dir and len(self._models) > self.max_loaded:
+            self._models.popitem(last=False)
+
+    def model(self, group):
+        """The group's forest, loaded from model_dir if it is not in memory"""
+        with self._lock:
+            forest = self._models.get(group)
+            if forest is not None:
+                self._models.move_to_end(group)
+                return forest
+        forest = CompiledForest.load(self._path(group))
+        with self._lock:
+            self.loads += 1
+            self._cache(group, forest)
+        return forest
+
+    def stats(self):
+        with self._lock:
+            return {
+                "groups": len(self.group_rows),
+                "rows_per_group": {str(group): rows for group, rows in sorted(self.group_rows.items())},
+                "loaded": len(self._models),
+                "loads": self.loads
+            }
+
+
+def train_peer_groups(X, encoders, contamination=0.01, n_jobs=None, **options):
+    """
+    Fit peer-group forests on a feature matrix
+    Returns: (PeerGroupModels, decision_function scores; lower = more anomalous)
+    """
+    peers = PeerGroupModels(contamination=contamination, **options)
+    return peers, peers.fit(X, encoders, n_jobs)
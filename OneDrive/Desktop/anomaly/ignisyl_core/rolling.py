@@ -0,0 +1,217 @@
+"""
+Ignisyl Core - Rolling Behaviour Features
+Per-user context for each event: how busy the user has been, where they
+have been and when they usually work
+
+    user_events_1h   the user's events in the last hour, this one included
+    user_pcs_today   distinct PCs the user has used so far today
+    hour_deviation   how many standard deviations this event's hour is from
+                     the hours of the user's earlier events (whole numbers)
+
+Counts are capped (see ROLLING_FEATURE_RANGES) so the features stay small
+bounded integers like the rest of the model input.
+
+add_rolling_features computes a whole batch in one stable sort by user
+and time followed by vectorised scans. RollingFeatureState computes the
+same values one event at a time from per-user state - a deque of the last
+hour's timestamps, the day's PC set and integer sums of the hours - so an
+event costs the same however much history came before it. Both use exact
+integer arithmetic, so on a time-ordered log they agree exactly.
+"""
+
+import math
+import threading
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+ROLLING_WINDOW = pd.Timedelta(hours=1)
+HOUR_DEVIATION_CAP = 4
+
+# Inclusive value range of each rolling feature
+ROLLING_FEATURE_RANGES = {
+    'user_events_1h': (1, 50),
+    'user_pcs_today': (1, 20),
+    'hour_deviation': (0, HOUR_DEVIATION_CAP)
+}
+ROLLING_FEATURES = list(ROLLING_FEATURE_RANGES)
+
+
+def _capped(feature, values):
+    low, high = ROLLING_FEATURE_RANGES[feature]
+    return np.clip(values, low, high)
+
+
+def hour_deviations(hours, count, total, squares):
+    """
+    floor(|hour - mean| / std) against count earlier hours summing to total
+    (squares summing to squares), capped; 0 without history and, when every
+    earlier hour was the same, 0 for that hour and the cap for any other
+    """
+    hours, count, total, squares = (np.asarray(value, dtype=np.int64) for value in (hours, count, total, squares))
+    # n^2 * variance and n * |hour - mean|, both exact integers
+    spread = count * squares - total * total
+    distance = np.abs(hours * count - total)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z = distance / np.sqrt(spread)
+    deviation = np.where(spread > 0, np.minimum(np.floor(z), HOUR_DEVIATION_CAP),
+                         np.where(distance > 0, HOUR_DEVIATION_CAP, 0))
+    return np.where(count > 0, deviation, 0).astype(np.int64)
+
+
+def _hour_deviation(hour, count, total, squares):
+    """hour_deviations for one event, in plain Python with the same arithmetic"""
+    if count == 0:
+        return 0
+    spread = count * squares - total * total
+    distance = abs(hour * count - total)
+    if spread == 0:
+        return HOUR_DEVIATION_CAP if distance else 0
+    return int(min(math.floor(distance / math.sqrt(spread)), HOUR_DEVIATION_CAP))
+
+
+def _group_cumsum(values, starts):
+    """Running sum of values that restarts wherever starts is True"""
+    totals = np.cumsum(values)
+    start_positions = np.maximum.accumulate(np.where(starts, np.arange(len(values)), 0))
+    return totals - totals[start_positions] + values[start_positions]
+
+
+def add_rolling_features(df):
+    """
+    Rolling features for a batch (date column already datetime), in place
+    Events with the same user and time keep their order in df
+    """
+    if len(df) == 0:
+        for feature in ROLLING_FEATURES:
+            df[feature] = np.empty(0, dtype=np.int64)
+        return df
+
+    users = pd.factorize(df['user'])[0]
+    pcs = pd.factorize(df['pc'])[0]
+    times = df['date'].to_numpy(dtype='datetime64[ns]').view(np.int64)
+    order = np.lexsort((times, users))   # stable: ties stay in log order
+    users, pcs, times = users[order], pcs[order], times[order]
+    days = times // (86_400 * 10 ** 9)
+    hours = df['date'].dt.hour.to_numpy(dtype=np.int64)[order]
+    positions = np.arange(len(order))
+    user_starts = np.r_[True, users[1:] != users[:-1]]
+
+    # Events in the last hour: the first event of the same user later than
+    # t - 1h, found by binary search on (user, rank of time) keys
+    all_times = np.sort(times)
+    ranks = np.searchsorted(all_times, times, side="left")
+    window_starts = np.searchsorted(all_times, times - ROLLING_WINDOW.value, side="right")
+    keys = users * (len(times) + 1) + ranks
+    first_in_window = np.searchsorted(keys, users * (len(times) + 1) + window_starts, side="left")
+    events_1h = positions - first_in_window + 1
+
+    # Distinct PCs so far today: first occurrences in time order
+    sorted_frame = pd.DataFrame({'user': users, 'day': days, 'pc': pcs})
+    new_today = ~sorted_frame.duplicated(['user', 'day', 'pc']).to_numpy()
+    day_starts = user_starts | np.r_[True, days[1:] != days[:-1]]
+    pcs_today = _group_cumsum(new_today.astype(np.int64), day_starts)
+
+    # Hour moments of each user's earlier events
+    count = positions - np.maximum.accumulate(np.where(user_starts, positions, 0))
+    total = _group_cumsum(hours, user_starts) - hours
+    squares = _group_cumsum(hours * hours, user_starts) - hours * hours
+
+    values = {
+        'user_events_1h': events_1h,
+        'user_pcs_today': pcs_today,
+        'hour_deviation': hour_deviations(hours, count, total, squares)
+    }
+    for feature, sorted_values in values.items():
+        column = np.empty(len(order), dtype=np.int64)
+        column[order] = _capped(feature, sorted_values)
+        df[feature] = column
+    return df
+
+
+class _UserHistory:
+    __slots__ = ("times", "day", "day_pcs", "count", "total", "squares")
+
+    def __init__(self):
+        self.times = deque()   # timestamps (ns) within the last hour
+        self.day = None
+        self.day_pcs = set()
+        self.count = self.total = self.squares = 0
+
+
+class RollingFeatureState:
+    """
+    Per-user state for rolling features on a live feed; thread-safe
+    Events are expected in time order
+    """
+
+    def __init__(self):
+        self._users = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._users)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_history(cls, df):
+        """State as it stands after every event of a log (date column already datetime)"""
+        state = cls()
+        history = df[['user', 'pc', 'date']].sort_values(['user', 'date'], kind="stable")
+        times = history['date'].to_numpy(dtype='datetime64[ns]').view(np.int64)
+        history = history.assign(time=times, day=times // (86_400 * 10 ** 9),
+                                 hour=history['date'].dt.hour.to_numpy(dtype=np.int64))
+        for user, events in history.groupby('user', sort=False, observed=True):
+            user_history = _UserHistory()
+            last_time, last_day = events['time'].iat[-1], events['day'].iat[-1]
+            user_history.times.extend(events['time'][events['time'] > last_time - ROLLING_WINDOW.value].tolist())
+            user_history.day = int(last_day)
+            user_history.day_pcs = set(events['pc'][events['day'] == last_day].tolist())
+            hours = events['hour'].to_numpy()
+            user_history.count = len(hours)
+            user_history.total = int(hours.sum())
+            user_history.squares = int((hours * hours).sum())
+            state._users[user] = user_history
+        return state
+
+    def update(self, df):
+        """Rolling features for new events, in place, counting them into the state"""
+        times = df['date'].to_numpy(dtype='datetime64[ns]').view(np.int64).tolist()
+        hours = df['date'].dt.hour.tolist()
+        columns = {feature: [] for feature in ROLLING_FEATURES}
+        with self._lock:
+            for user, pc, time, hour in zip(df['user'].tolist(), df['pc'].tolist(), times, hours):
+                history = self._users.get(user)
+                if history is None:
+                    history = self._users[user] = _UserHistory()
+
+                window = history.times
+                while window and window[0] <= time - ROLLING_WINDOW.value:
+                    window.popleft()
+                window.append(time)
+
+                day = time // (86_400 * 10 ** 9)
+                if day != history.day:
+                    history.day, history.day_pcs = day, set()
+                history.day_pcs.add(pc)
+
+                columns['user_events_1h'].append(len(window))
+                columns['user_pcs_today'].append(len(history.day_pcs))
+                columns['hour_deviation'].append(
+                    _hour_deviation(hour, history.count, history.total, history.squares))
+                history.count += 1
+                history.total += hour
+                history.squares += hour * hour
+
+        for feature, values in columns.items():
+            df[feature] = _capped(feature, np.array(values, dtype=np.int64))
+        return df
@@ -0,0 +1,150 @@
+"""
+Ignisyl Core - Risk Scoring
+Turns model outputs into 0-100 risk scores, risk levels and firewall actions
+"""
+
+import numpy as np
+
+from .features import build_feature_matrix, feature_bounds
+from .ingestion import read_activity_logs
+from .models import train_ensemble_model, train_isolation_forest
+from .online import train_half_space_trees
+from .peers import train_peer_groups
+from .whitelist import whitelist_mask
+
+HIGH_RISK_THRESHOLD = 85
+MEDIUM_RISK_THRESHOLD = 60
+
+MODELS = {
+    "isolation_forest": "Isolation Forest",
+    "ensemble": "Ensemble (IF + AE)",
+    "half_space_trees": "Half-Space Trees (online)",
+    "peer_groups": "Peer-group Isolation Forests"
+}
+
+ACTION_LABELS = {
+    "High": "BLOCK",
+    "Medium": "RESTRICT",
+    "Low": "ALLOW"
+}
+
+
+def isolation_risk_scores(anomaly_scores):
+    """
+    Invert and rescale Isolation Forest scores to 0-100
+    Lower anomaly score (more anomalous) -> higher risk score
+    """
+    from sklearn.preprocessing import MinMaxScaler
+
+    scores = np.asarray(anomaly_scores).reshape(-1, 1)
+    inverted_scores = -scores + scores.max()
+    return MinMaxScaler(feature_range=(0, 100)).fit_transform(inverted_scores).flatten()
+
+
+def calculate_ensemble_risk_score(iso_scores, ae_scores):
+    """
+    Combine Isolation Forest and Autoencoder scores
+    Weighted average: 70% Isolation Forest, 30% Autoencoder
+    """
+    iso_scores = np.asarray(iso_scores)
+    ae_scores = np.asarray(ae_scores)
+
+    # Isolation Forest inverted (more negative = higher risk), Autoencoder as-is
+    iso_normalized = (-iso_scores + iso_scores.max()) / (iso_scores.max() - iso_scores.min())
+    ae_normalized = (ae_scores - ae_scores.min()) / (ae_scores.max() - ae_scores.min())
+
+    combined_score = (0.7 * iso_normalized + 0.3 * ae_normalized) * 100
+    return np.clip(combined_score, 0, 100)
+
+
+def assign_risk_levels(risk_scores):
+    """High above 85, Medium above 60, Low otherwise"""
+    risk_scores = np.asarray(risk_scores)
+    return np.select(
+        [risk_scores > HIGH_RISK_THRESHOLD, risk_scores > MEDIUM_RISK_THRESHOLD],
+        ['High', 'Medium'],
+        default='Low'
+    ).astype(object)
+
+
+def assign_firewall_actions(df, labels=ACTION_LABELS):
+    """
+    Firewall action per event from its risk level
+    A "whitelisted" label overrides the risk level for whitelisted events
+    """
+    actions = df['risk_level'].map(labels)
+    if "whitelisted" in labels and 'is_whitelisted' in df.columns:
+        actions = actions.where(~df['is_whitelisted'], labels["whitelisted"])
+    return actions
+
+
+def score_logs(df, model="isolation_forest", contamination=0.01, feature_set="base",
+               precision=None, progress=None, deduplicate=False, n_jobs=None, peer_options=None):
+    """
+    Extract features, train the detector and score every event in df
+    Adds feature, risk_score, risk_level, model_used and timestamp columns in place
+    progress, if given, is called as progress(fraction, message)
+    deduplicate trains the autoencoder on distinct feature rows weighted by count
+    n_jobs caps the cores used for training (default: all available)
+    peer_options are passed to PeerGroupModels for the peer_groups model
+    """
+    if model not in MODELS:
+        raise ValueError(f"Unknown model: {model}")
+    progress = progress or (lambda fraction, message: None)
+
+    progress(0.25, "Extracting features...")
+    X, encoders = build_feature_matrix(df, feature_set)
+
+    if model == "ensemble":
+        progress(0.40, "Training Isolation Forest + Autoencoder...")
+        _, _, iso_scores, ae_scores = train_ensemble_model(X, contamination, deduplicate, n_jobs)
+        progress(0.70, "Combining ensemble scores...")
+        df['iso_score'] = iso_scores
+        df['ae_score'] = ae_scores
+        risk_scores = calculate_ensemble_risk_score(iso_scores, ae_scores)
+    elif model == "half_space_trees":
+        progress(0.40, "Streaming events through Half-Space Trees...")
+        _, anomaly_scores = train_half_space_trees(X, feature_bounds(feature_set, encoders))
+        progress(0.70, "Scoring threats...")
+        df['anomaly_score'] = anomaly_scores
+        risk_scores = isolation_risk_scores(anomaly_scores)
+    elif model == "peer_groups":
+        progress(0.40, "Training peer-group Isolation Forests...")
+        _, anomaly_scores = train_peer_groups(X, encoders, contamination, n_jobs, **(peer_options or {}))
+        progress(0.70, "Scoring threats...")
+        df['anomaly_score'] = anomaly_scores
+        risk_scores = isolation_risk_scores(anomaly_scores)
+    else:
+        progress(0.40, "Training Isolation Forest...")
+        _, anomaly_scores = train_isolation_forest(X, contamination, n_jobs)
+        progress(0.70, "Scoring threats...")
+        df['anomaly_score'] = anomaly_scores
+        risk_scores = isolation_risk_scores(anomaly_scores)
+
+    if precision is not None:
+        risk_scores = risk_scores.round(precision)
+    df['risk_score'] = risk_scores
+    df['risk_level'] = assign_risk_levels(risk_scores)
+    df['model_used'] = MODELS[model]
+    df['timestamp'] = df['date'].dt.strftime('%Y-%m-%d %H:%M:%S')
+    return df
+
+
+def score_file(path, whitelist=None, action_labels=ACTION_LABELS, progress=None, workers=None, engine="c",
+               **options):
+    """
+    Load a log file, directory or glob and score it
+    options are passed to score_logs; whitelist adds is_whitelisted
+    """
+    progress = progress or (lambda fraction, message: None)
+
+    progress(0.05, "Loading activity logs...")
+    df, _ = read_activity_logs(path, workers, engine)
+    score_logs(df, progress=progress, **options)
+
+    if whitelist is not None:
+        progress(0.85, "Checking whitelist...")
+        df['is_whitelisted'] = whitelist_mask(df, whitelist).to_numpy()
+    if action_labels is not None:
+        df['firewall_action'] = assign_firewall_actions(df, action_labels)
+    return df
@@ -0,0 +1,320 @@
+"""
+Ignisyl Core - Scoring Service
+Local HTTP/JSON service that scores logon events for other systems
+
+Concurrent requests are collected into micro-batches: the batch worker
+waits up to max_wait_ms after the first queued event, or until
+max_batch_size events are queued, then scores them with one vectorised
+decision_function call.
+
+Endpoints:
+    POST /score     {"date", "user", "pc", "activity"} or {"events": [...]}
+    GET  /health    model and queue status
+    GET  /metrics   latency histograms, batch sizes and counters
+"""
+
+import json
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+
+from .ingestion import LOG_COLUMNS, parse_event
+from .metrics import Counters, LatencyHistogram
+from .scoring import ACTION_LABELS
+from .whitelist import WhitelistWatcher
+
+logger = logging.getLogger("ignisyl.service")
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_MAX_BATCH_SIZE = 64
+DEFAULT_MAX_WAIT_MS = 5.0
+DEFAULT_MAX_QUEUE = 10000
+REQUEST_TIMEOUT_SECONDS = 30
+
+BATCH_SIZE_BUCKETS = [1, 2, 4, 8, 16, 32, 64, 128, 256, 512]
+
+
+class QueueFullError(Exception):
+    """Raised when the batch queue is at capacity"""
+
+
+class MicroBatcher:
+    """
+    Groups individually submitted items into batches for one scoring call
+    score_batch(items) must return one result per item, in order
+    """
+
+    def __init__(self, score_batch, max_batch_size=DEFAULT_MAX_BATCH_SIZE,
+                 max_wait_ms=DEFAULT_MAX_WAIT_MS, max_queue=DEFAULT_MAX_QUEUE):
+        self.score_batch = score_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._submit_lock = threading.Lock()   # makes submit_all all-or-nothing
+        self._stopped = threading.Event()
+        self.queue_wait = LatencyHistogram()
+        self.batch_latency = LatencyHistogram()
+        self.batch_sizes = [0] * (len(BATCH_SIZE_BUCKETS) + 1)
+        self.batches = 0
+        self._thread = threading.Thread(target=self._run, name="ignisyl-batcher", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join(timeout=5)
+
+    def submit(self, item):
+        """Queue one item; returns a Future for its result"""
+        return self.submit_all([item])[0]
+
+    def submit_all(self, items):
+        """
+        Queue every item or none of them; returns a Future per item
+        Raises QueueFullError without queueing anything when they do not all fit
+        """
+        with self._submit_lock:
+            # Only this lock's holder adds items, so the room can only grow meanwhile
+            if self._queue.maxsize - self._queue.qsize() < len(items):
+                raise QueueFullError(f"Scoring queue has no room for {len(items)} event(s)")
+            futures = []
+            enqueued_at = time.perf_counter()
+            for item in items:
+                future = Future()
+                self._queue.put_nowait((item, future, enqueued_at))
+                futures.append(future)
+        return futures
+
+    @property
+    def queue_depth(self):
+        return self._queue.qsize()
+
+    def _collect(self):
+        """Block for the first item, then gather until the batch is full or the wait expires"""
+        try:
+            first = self._queue.get(timeout=0.5)
+        except queue.Empty:
+            return []
+        batch = [first]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _record_size(self, size):
+        for i, bound in enumerate(BATCH_SIZE_BUCKETS):
+            if size <= bound:
+                self.batch_sizes[i] += 1
+                return
+        self.batch_sizes[-1] += 1
+
+    def _run(self):
+        while not self._stopped.is_set():
+            batch = self._collect()
+            if not batch:
+                continue
+
+            started = time.perf_counter()
+            for _, _, enqueued_at in batch:
+                self.queue_wait.record(started - enqueued_at)
+
+            try:
+                results = self.score_batch([item for item, _, _ in batch])
+            except Exception as e:
+                logger.exception("Batch of %d failed", len(batch))
+                for _, future, _ in batch:
+                    future.set_exception(e)
+            else:
+                for (_, future, _), result in zip(batch, results):
+                    future.set_result(result)
+
+            self.batch_latency.record(time.perf_counter() - started)
+            self.batches += 1
+            self._record_size(len(batch))
+
+    def batch_size_histogram(self):
+        histogram = {f"le_{bound}": count for bound, count in zip(BATCH_SIZE_BUCKETS, self.batch_sizes)}
+        histogram[f"gt_{BATCH_SIZE_BUCKETS[-1]}"] = self.batch_sizes[-1]
+        return histogram
+
+
+class ScoringService:
+    """
+    Trained detector and whitelist behind a micro-batcher
+    """
+
+    def __init__(self, detector, whitelist_path=None, action_labels=ACTION_LABELS,
+                 max_batch_size=DEFAULT_MAX_BATCH_SIZE, max_wait_ms=DEFAULT_MAX_WAIT_MS,
+                 max_queue=DEFAULT_MAX_QUEUE):
+        self.detector = detector
+        self.whitelist = WhitelistWatcher(whitelist_path) if whitelist_path else None
+        self.action_labels = action_labels
+        self.request_latency = LatencyHistogram()
+        self.counters = Counters("requests", "events", "errors", "rejected")
+        self.started_at = time.time()
+        self.batcher = MicroBatcher(self.score_batch, max_batch_size, max_wait_ms, max_queue)
+
+    def start(self):
+        self.batcher.start()
+        return self
+
+    def stop(self):
+        self.batcher.stop()
+
+    def score_batch(self, events):
+        """Score parsed events in one vectorised call"""
+        whitelist = self.whitelist.current() if self.whitelist else None
+        df = self.detector.assess(pd.DataFrame(events, columns=LOG_COLUMNS), whitelist,
+                                  self.action_labels)
+        results = [
+            {
+                'date': event['date'].strftime('%Y-%m-%d %H:%M:%S'),
+                'user': event['user'],
+                'pc': event['pc'],
+                'activity': event['activity'],
+                'risk_score': float(risk_score),
+                'risk_level': risk_level,
+                'is_whitelisted': bool(whitelisted),
+                'firewall_action': action
+            }
+            for event, risk_score, risk_level, whitelisted, action in zip(
+                events, df['risk_score'], df['risk_level'], df['is_whitelisted'], df['firewall_action']
+            )
+        ]
+        if 'access_alert' in df.columns:
+            for result, alert in zip(results, df['access_alert']):
+                result['access_alert'] = alert
+        return results
+
+    def score_events(self, raw_events):
+        """
+        Validate, queue and wait for a list of events
+        Raises ValueError for bad input and QueueFullError under overload
+        """
+        events = [parse_event(event) for event in raw_events]
+        futures = self.batcher.submit_all(events)
+        return [future.result(timeout=REQUEST_TIMEOUT_SECONDS) for future in futures]
+
+    def health(self):
+        return {
+            "status": "ok",
+            "uptime_seconds": round(time.time() - self.started_at, 1),
+            "queue_depth": self.batcher.queue_depth,
+            "detector": self.detector.describe()
+        }
+
+    def metrics(self):
+        return {
+            "counters": self.counters.snapshot(),
+            "batches": self.batcher.batches,
+            "max_batch_size": self.batcher.max_batch_size,
+            "max_wait_ms": self.batcher.max_wait * 1000.0,
+            "batch_sizes": self.batcher.batch_size_histogram(),
+            "score_memo": self.detector.memo.stats() if self.detector.memo is not None else None,
+            "peer_groups": self.detector.peer_groups.stats() if self.detector.peer_groups is not None else None,
+            "access_graph": self.detector.access_graph.stats() if self.detector.access_graph is not None else None,
+            "latency": {
+                "request": self.request_latency.snapshot(),
+                "queue_wait": self.batcher.queue_wait.snapshot(),
+                "batch_scoring": self.batcher.batch_latency.snapshot()
+            }
+        }
+
+
+class ScoringRequestHandler(BaseHTTPRequestHandler):
+    """JSON request handler; the server carries the ScoringService"""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        service = self.server.service
+        if self.path == "/health":
+            self._send_json(200, service.health())
+        elif self.path == "/metrics":
+            self._send_json(200, service.metrics())
+        else:
+            self._send_json(404, {"error": f"Unknown path {self.path}"})
+
+    def do_POST(self):
+        service = self.server.service
+        if self.path != "/score":
+            self._send_json(404, {"error": f"Unknown path {self.path}"})
+            return
+
+        started = time.perf_counter()
+        service.counters.add("requests")
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            payload = json.loads(self.rfile.read(length) or b"null")
+            single = isinstance(payload, dict) and "events" not in payload
+            events = [payload] if single else (payload.get("events") if isinstance(payload, dict) else payload)
+            if not isinstance(events, list):
+                raise ValueError("Body must be an event, a list of events or {\"events\": [...]}")
+
+            results = service.score_events(events)
+            service.counters.add("events", len(results))
+            self._send_json(200, results[0] if single else {"results": results})
+        except (ValueError, json.JSONDecodeError) as e:
+            service.counters.add("errors")
+            self._send_json(400, {"error": str(e)})
+        except QueueFullError as e:
+            service.counters.add("rejected")
+            self._send_json(503, {"error": str(e)})
+        except Exception as e:
+            service.counters.add("errors")
+            logger.exception("Scoring request failed")
+            self._send_json(500, {"error": str(e)})
+        finally:
+            service.request_latency.record(time.perf_counter() - started)
+
+
+class ScoringServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256   # listen backlog; the default of 5 drops bursts of clients
+
+    def __init__(self, address, service):
+        super().__init__(address, ScoringRequestHandler)
+        self.service = service
+
+
+def run_service(service, host=DEFAULT_HOST, port=DEFAULT_PORT, ready=None):
+    """
+    Serve until interrupted
+    ready, if given, is called with the bound (host, port) once listening
+    """
+    service.start()
+    server = ScoringServer((host, port), service)
+    if ready:
+        ready(server.server_address)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.stop()
@@ -0,0 +1,278 @@
+"""
+Ignisyl Core - Logon Sessions
+Pairs each user's Logon on a PC with the Logoff that ends it
+
+A session starts at a Logon and ends at the first Logoff by the same user
+on the same PC. Logs are rarely that tidy, so a session also ends when
+
+    replaced   the user logs on to the same PC again with no Logoff between
+    expired    SESSION_TIMEOUT passes without a Logoff
+
+and a Logoff with no open session (a repeated Logoff, or one whose Logon
+is missing or expired) is an orphan. Every event is placed in the
+session open on its PC at that moment, if any, which gives the model
+
+    session_hours        whole hours since the session's Logon
+    concurrent_sessions  the user's sessions open across all PCs
+    sessionless          1 for activity on a PC with no open session
+    off_hours_session    1 inside a session that began at night or at a weekend
+
+sessionize lists the sessions themselves, with their duration and how they
+ended.
+
+add_session_features pairs a whole batch with one stable sort by user and
+time and vectorised scans, and no per-event Python. SessionState keeps each
+user's open sessions for a live feed, so an event only costs a look at that
+user's few open sessions. The two give identical values on a time-ordered
+log.
+"""
+
+import threading
+
+import numpy as np
+import pandas as pd
+
+LOGON_ACTIVITY = "Logon"
+LOGOFF_ACTIVITY = "Logoff"
+SESSION_TIMEOUT = pd.Timedelta(hours=24)
+
+_HOUR = pd.Timedelta(hours=1).value
+
+# Inclusive value range of each session feature
+SESSION_FEATURE_RANGES = {
+    'session_hours': (0, SESSION_TIMEOUT // pd.Timedelta(hours=1) - 1),
+    'concurrent_sessions': (0, 10),
+    'sessionless': (0, 1),
+    'off_hours_session': (0, 1)
+}
+SESSION_FEATURES = list(SESSION_FEATURE_RANGES)
+
+
+def _off_hours(dates):
+    """Night (before 6, after 22) or weekend - the is_night / is_weekend rule"""
+    hours = dates.dt.hour.to_numpy()
+    return ((hours < 6) | (hours > 22) | (dates.dt.dayofweek.to_numpy() >= 5)).astype(np.int64)
+
+
+def _pair_sessions(df):
+    """
+    The pairing behind add_session_features and sessionize, all in user order
+    (rows sorted stably by user and time)
+    """
+    n = len(df)
+    users = pd.factorize(df['user'])[0]
+    pcs = pd.factorize(df['pc'])[0]
+    times = df['date'].to_numpy(dtype='datetime64[ns]').view(np.int64)
+    order = np.lexsort((times, users))   # stable: ties stay in log order
+    users, pcs, times = users[order], pcs[order], times[order]
+    activity = df['activity'].to_numpy(dtype=object)[order]
+    logon = activity == LOGON_ACTIVITY
+    logoff = activity == LOGOFF_ACTIVITY
+    positions = np.arange(n)
+
+    # Same rows grouped by user and PC; positions stay increasing within a group
+    by_pc = np.argsort(users * (pcs.max() + 1) + pcs, kind="stable")
+    pairs = (users * (pcs.max() + 1) + pcs)[by_pc]
+    group_first = np.maximum.accumulate(np.where(np.r_[True, pairs[1:] != pairs[:-1]], positions, 0))
+    group_last = np.minimum.accumulate(np.where(np.r_[pairs[1:] != pairs[:-1], True], positions, n)[::-1])[::-1]
+
+    # Each row's latest Logon on its PC (an index into by_pc), -1 before the first
+    latest = np.maximum.accumulate(np.where(logon[by_pc], positions, -1))
+    session = np.where(latest >= group_first, latest, -1)
+
+    # A session can end at the next Logon on its PC (exclusive), its first
+    # Logoff (inclusive) or the first of the user's rows past the timeout
+    # (exclusive), whichever comes first; n stands for never
+    starts = np.flatnonzero(logon[by_pc])
+    following = np.minimum.accumulate(np.where(logon[by_pc], positions, n)[::-1])[::-1]
+    next_logon = np.r_[following[1:], n][starts]
+    replaced_at = np.where(next_logon <= group_last[starts], by_pc[np.minimum(next_logon, n - 1)], n)
+
+    closing = np.flatnonzero(logoff[by_pc] & (session >= 0))
+    logoff_at = np.full(n, n)
+    if len(closing):
+        first_closing = closing[np.r_[True, session[closing][1:] != session[closing][:-1]]]
+        logoff_at[session[first_closing]] = by_pc[first_closing]
+    logoff_at = logoff_at[starts]
+
+    start_rows = by_pc[starts]
+    all_times = np.sort(times)
+    keys = users * (n + 1) + np.searchsorted(all_times, times, side="left")
+    timeout_ranks = np.searchsorted(all_times, times[start_rows] + SESSION_TIMEOUT.value, side="left")
+    expired_at = np.searchsorted(keys, users[start_rows] * (n + 1) + timeout_ranks, side="left")
+
+    ends = np.minimum.reduce([replaced_at, logoff_at + 1, expired_at])
+    end_of = np.full(n, n)
+    end_of[starts] = ends
+    return {
+        'order': order, 'users': users, 'times': times, 'logon': logon, 'logoff': logoff,
+        'by_pc': by_pc, 'session': session, 'end_of': end_of,
+        'start_rows': start_rows, 'replaced_at': replaced_at, 'logoff_at': logoff_at,
+        'expired_at': expired_at, 'ends': ends
+    }
+
+
+def add_session_features(df):
+    """
+    Session features for a batch (date column already datetime), in place
+    Events with the same user and time keep their order in df
+    """
+    if len(df) == 0:
+        for feature in SESSION_FEATURES:
+            df[feature] = np.empty(0, dtype=np.int64)
+        return df
+
+    paired = _pair_sessions(df)
+    n, by_pc, session, times = len(df), paired['by_pc'], paired['session'], paired['times']
+    off_hours = _off_hours(df['date'])[paired['order']]
+
+    # Whether each row (grouped by PC) falls inside its latest Logon's session
+    rows = by_pc
+    start = by_pc[np.maximum(session, 0)]
+    inside = (session >= 0) & (rows < paired['end_of'][np.maximum(session, 0)])
+
+    hours = np.zeros(n, dtype=np.int64)
+    hours[rows] = np.where(inside, (times[rows] - times[start]) // _HOUR, 0)
+    sessionless = np.ones(n, dtype=np.int64)
+    sessionless[rows] = np.where(inside, 0, 1)
+    off_hours_session = np.zeros(n, dtype=np.int64)
+    off_hours_session[rows] = np.where(inside, off_hours[start], 0)
+
+    # Open sessions at each row: +1 where one starts, -1 where it ends
+    changes = np.bincount(paired['start_rows'], minlength=n + 1) - np.bincount(paired['ends'], minlength=n + 1)
+    concurrent = np.cumsum(changes)[:n]
+
+    values = {
+        'session_hours': hours,
+        'concurrent_sessions': concurrent,
+        'sessionless': sessionless,
+        'off_hours_session': off_hours_session
+    }
+    for feature, sorted_values in values.items():
+        low, high = SESSION_FEATURE_RANGES[feature]
+        column = np.empty(n, dtype=np.int64)
+        column[paired['order']] = np.clip(sorted_values, low, high)
+        df[feature] = column
+    return df
+
+
+def sessionize(df):
+    """
+    Every session in a log (date column already datetime)
+    Returns: frame of user, pc, start, end (the Logoff; NaT when there was
+    none), duration, ended_by (logoff, replaced, expired, open, or no_logon
+    for an orphan Logoff) and off_hours, in order of start
+    """
+    columns = ['user', 'pc', 'start', 'end', 'duration', 'ended_by', 'off_hours']
+    if len(df) == 0:
+        return pd.DataFrame(columns=columns)
+
+    paired = _pair_sessions(df)
+    n, order, times = len(df), paired['order'], paired['times']
+    start_rows, ends = paired['start_rows'], paired['ends']
+    user_end = np.searchsorted(paired['users'], paired['users'][start_rows], side="right")
+
+    # ends is n for a session of the last user still open, so each cause
+    # must also have happened within the log
+    closed = (paired['logoff_at'] < n) & (paired['logoff_at'] + 1 == ends)
+    expired = (paired['expired_at'] == ends) & (paired['expired_at'] < user_end)
+    replaced = (paired['replaced_at'] == ends) & (paired['replaced_at'] < user_end)
+    ended_by = np.select([closed, expired, replaced], ["logoff", "expired", "replaced"], "open")
+
+    # Logoffs outside every session
+    session, by_pc, end_of = paired['session'], paired['by_pc'], paired['end_of']
+    inside = (session >= 0) & (by_pc < end_of[np.maximum(session, 0)])
+    orphans = by_pc[paired['logoff'][by_pc] & ~inside]
+
+    dates = df['date'].iloc[order].reset_index(drop=True)
+    starts = pd.Series(dates.iloc[start_rows].to_numpy())
+    session_ends = pd.Series(dates.iloc[np.minimum(paired['logoff_at'], n - 1)].to_numpy()).where(closed)
+    sessions = pd.DataFrame({
+        'user': df['user'].iloc[order[start_rows]].to_numpy(),
+        'pc': df['pc'].iloc[order[start_rows]].to_numpy(),
+        'start': starts,
+        'end': session_ends,
+        'ended_by': ended_by,
+        'off_hours': _off_hours(starts).astype(bool),
+        '_row': start_rows
+    })
+    orphan_sessions = pd.DataFrame({
+        'user': df['user'].iloc[order[orphans]].to_numpy(),
+        'pc': df['pc'].iloc[order[orphans]].to_numpy(),
+        'start': pd.Series(pd.NaT, index=range(len(orphans)), dtype=dates.dtype),
+        'end': pd.Series(dates.iloc[orphans].to_numpy()),
+        'ended_by': "no_logon",
+        'off_hours': False,
+        '_row': orphans
+    })
+    result = pd.concat([sessions, orphan_sessions], ignore_index=True)
+    result['duration'] = result['end'] - result['start']
+    # Orphans sit where their Logoff was
+    result = result.assign(_time=times[result['_row'].to_numpy()]).sort_values(['_time', '_row'], kind="stable")
+    return result[columns].reset_index(drop=True)
+
+
+class SessionState:
+    """
+    Each user's open sessions for session features on a live feed; thread-safe
+    Events are expected in time order
+    """
+
+    def __init__(self):
+        self._users = {}   # user -> {pc: (Logon time in ns, began off hours)}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        """Open sessions"""
+        return sum(map(len, self._users.values()))
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_history(cls, df):
+        """State as it stands after every event of a log (date column already datetime)"""
+        state = cls()
+        sessions = sessionize(df)
+        still_open = sessions[sessions['ended_by'] == "open"]
+        times = still_open['start'].to_numpy(dtype='datetime64[ns]').view(np.int64).tolist()
+        for user, pc, time, off_hours in zip(still_open['user'].tolist(), still_open['pc'].tolist(), times,
+                                             still_open['off_hours'].tolist()):
+            state._users.setdefault(user, {})[pc] = (time, int(off_hours))
+        return state
+
+    def update(self, df):
+        """Session features for new events, in place, applying them to the state"""
+        times = df['date'].to_numpy(dtype='datetime64[ns]').view(np.int64).tolist()
+        off_hours = _off_hours(df['date']).tolist()
+        columns = {feature: [] for feature in SESSION_FEATURES}
+        with self._lock:
+            for user, pc, activity, time, off in zip(df['user'].tolist(), df['pc'].tolist(),
+                                                     df['activity'].tolist(), times, off_hours):
+                sessions = self._users.get(user)
+                if sessions is None:
+                    sessions = self._users[user] = {}
+                for open_pc in [open_pc for open_pc, (start, _) in sessions.items()
+                                if start <= time - SESSION_TIMEOUT.value]:
+                    del sessions[open_pc]
+                if activity == LOGON_ACTIVITY:
+                    sessions[pc] = (time, off)
+
+                current = sessions.get(pc)
+                columns['concurrent_sessions'].append(len(sessions))
+                columns['session_hours'].append((time - current[0]) // _HOUR if current else 0)
+                columns['sessionless'].append(0 if current else 1)
+                columns['off_hours_session'].append(current[1] if current else 0)
+                if activity == LOGOFF_ACTIVITY and current:
+                    del sessions[pc]
+
+        for feature, values in columns.items():
+            low, high = SESSION_FEATURE_RANGES[feature]
+            df[feature] = np.clip(np.array(values, dtype=np.int64), low, high)
+        return df
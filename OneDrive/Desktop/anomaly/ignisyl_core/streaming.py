@@ -0,0 +1,223 @@
+"""
+Ignisyl Core - Streaming Autoencoder Training
+Trains the autoencoder chunk by chunk, for logs larger than memory
+
+    trainer = StreamingAutoencoderTrainer(checkpoint_path="autoencoder.ckpt")
+    trainer.fit("logs/")                       # first training run
+    trainer = StreamingAutoencoderTrainer.load("autoencoder.ckpt")
+    trainer.fit("logs/2024-11-02.csv")         # continue on a new day
+
+A fresh model first streams the logs twice: once to collect the users,
+PCs and activities for the label encoders, once to fit the scaler. Each
+epoch then streams the chunks through MLPRegressor.partial_fit. A fixed
+share of every chunk is held out for validation; training stops once the
+validation loss has not improved for `patience` epochs and the best
+weights are kept. A checkpoint is written after every epoch.
+
+A resumed model keeps its encoders and scaler so its inputs mean what they
+did when it was trained; users first seen in the new logs encode as -1.
+"""
+
+import copy
+import logging
+import os
+import pickle
+import time
+
+import numpy as np
+import pandas as pd
+
+from .features import FEATURE_SETS, add_time_features, apply_encoders
+from .ingestion import DEFAULT_CHUNK_ROWS, iter_activity_chunks
+from .models import AutoencoderDetector
+
+logger = logging.getLogger("ignisyl.streaming")
+
+CHECKPOINT_VERSION = 1
+
+
+def _label_encoder(values):
+    from sklearn.preprocessing import LabelEncoder
+
+    encoder = LabelEncoder()
+    encoder.classes_ = np.array(sorted(values), dtype=object)
+    return encoder
+
+
+class StreamingAutoencoderTrainer:
+    """
+    Mini-batch autoencoder training with validation early stopping and checkpoints
+    """
+
+    def __init__(self, feature_set="extended", hidden_layers=(10, 5, 10), chunksize=DEFAULT_CHUNK_ROWS,
+                 validation_fraction=0.05, max_validation_rows=100_000, max_epochs=50, patience=3,
+                 tol=1e-4, checkpoint_path=None, seed=42):
+        if feature_set not in FEATURE_SETS:
+            raise ValueError(f"Unknown feature set: {feature_set}")
+        if feature_set == "behavioural":
+            # Rolling and session features need each user's events in order, not independent chunks
+            raise ValueError("The behavioural feature set cannot be trained chunk by chunk")
+        self.feature_set = feature_set
+        self.hidden_layers = hidden_layers
+        self.chunksize = chunksize
+        self.validation_fraction = validation_fraction
+        self.max_validation_rows = max_validation_rows
+        self.max_epochs = max_epochs
+        self.patience = patience
+        self.tol = tol
+        self.checkpoint_path = checkpoint_path
+        self.seed = seed
+
+        self.encoders = None
+        self.autoencoder = None        # weights being trained
+        self.best_autoencoder = None   # weights with the lowest validation loss
+        self.best_loss = np.inf
+        self.epochs_trained = 0
+        self.trained_rows = 0
+        self.history = []              # one dict per epoch, across resumes
+
+    @property
+    def fitted(self):
+        return self.best_autoencoder is not None
+
+    # --- Data ---
+    def _features(self, chunk):
+        add_time_features(chunk, extended=self.feature_set == "extended")
+        apply_encoders(chunk, self.encoders)
+        return chunk[FEATURE_SETS[self.feature_set]]
+
+    def _validation_mask(self, chunk_number, rows):
+        # Seeded per chunk so the same rows are held out in every epoch
+        rng = np.random.default_rng((self.seed, chunk_number))
+        return rng.random(rows) < self.validation_fraction
+
+    def _chunks(self, path):
+        """(training rows, validation rows) per chunk, as feature frames"""
+        for chunk_number, chunk in enumerate(iter_activity_chunks(path, self.chunksize)):
+            X = self._features(chunk)
+            held_out = self._validation_mask(chunk_number, len(X))
+            yield X[~held_out], X[held_out]
+
+    def _prepare(self, path):
+        """First run only: fit the label encoders, then the scaler"""
+        values = {column: set() for column in ('user', 'pc', 'activity')}
+        for chunk in iter_activity_chunks(path, self.chunksize):
+            for column, seen in values.items():
+                seen.update(chunk[column].unique())
+        self.encoders = {column: _label_encoder(seen) for column, seen in values.items()}
+
+        self.autoencoder = AutoencoderDetector(self.hidden_layers)
+        for X_train, _ in self._chunks(path):
+            if len(X_train):
+                self.autoencoder.scaler.partial_fit(X_train)
+
+    def _validation_set(self, path):
+        held_out, rows = [], 0
+        for _, X_valid in self._chunks(path):
+            if rows >= self.max_validation_rows:
+                break
+            held_out.append(X_valid.iloc[:self.max_validation_rows - rows])
+            rows += len(held_out[-1])
+        if not rows:
+            raise ValueError("No rows held out for validation; raise validation_fraction")
+        return pd.concat(held_out, ignore_index=True)
+
+    # --- Training ---
+    def validation_loss(self, autoencoder, X_valid):
+        """Mean reconstruction error on the held-out rows"""
+        return float(autoencoder.predict_anomaly_score(X_valid).mean())
+
+    def fit(self, path, progress=None):
+        """
+        Train on every log under path until the validation loss stops improving
+        or max_epochs more epochs have run; resumes from the current state
+        progress, if given, is called with each epoch's history entry
+        """
+        resumed = self.autoencoder is not None
+        if not resumed:
+            self._prepare(path)
+        X_valid = self._validation_set(path)
+
+        if resumed:
+            # The old best was measured on other data; measure it on this data
+            self.best_loss = self.validation_loss(self.best_autoencoder, X_valid)
+            self.autoencoder = copy.deepcopy(self.best_autoencoder)
+            logger.info("Resuming after %d epochs; validation loss on new data %.5f",
+                        self.epochs_trained, self.best_loss)
+
+        stale_epochs = 0
+        for _ in range(self.max_epochs):
+            started = time.perf_counter()
+            rows, weighted_loss = 0, 0.0
+            for X_train, _ in self._chunks(path):
+                if len(X_train):
+                    weighted_loss += self.autoencoder.partial_fit(X_train) * len(X_train)
+                    rows += len(X_train)
+
+            valid_loss = self.validation_loss(self.autoencoder, X_valid)
+            improved = valid_loss < self.best_loss - self.tol
+            if improved:
+                self.best_loss = valid_loss
+                self.best_autoencoder = copy.deepcopy(self.autoencoder)
+                stale_epochs = 0
+            else:
+                stale_epochs += 1
+
+            self.epochs_trained += 1
+            self.trained_rows = rows
+            elapsed = time.perf_counter() - started
+            entry = {
+                "epoch": self.epochs_trained,
+                "train_loss": weighted_loss / rows if rows else float("nan"),
+                "validation_loss": valid_loss,
+                "improved": improved,
+                "rows": rows,
+                "seconds": elapsed
+            }
+            self.history.append(entry)
+            if progress:
+                progress(entry)
+            if self.checkpoint_path:
+                self.save(self.checkpoint_path)
+            if stale_epochs >= self.patience:
+                logger.info("Validation loss has not improved for %d epochs; stopping", stale_epochs)
+                break
+
+        if self.best_autoencoder is None:
+            self.best_autoencoder = copy.deepcopy(self.autoencoder)
+        return self
+
+    # --- Scoring ---
+    def score(self, df):
+        """Reconstruction error of each event with the best weights"""
+        if not self.fitted:
+            raise RuntimeError("Autoencoder has not been trained")
+        return self.best_autoencoder.predict_anomaly_score(self._features(df.copy()))
+
+    # --- Checkpoints ---
+    def save(self, path):
+        """Write the full training state atomically"""
+        state = {"version": CHECKPOINT_VERSION, **self.__dict__}
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "wb") as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, path)
+        return path
+
+    @classmethod
+    def load(cls, path, **overrides):
+        """
+        Restore a trainer from a checkpoint; overrides replace training
+        settings such as max_epochs or checkpoint_path
+        """
+        with open(path, "rb") as f:
+            state = pickle.load(f)
+        if state.pop("version", None) != CHECKPOINT_VERSION:
+            raise ValueError(f"'{path}' is not a compatible autoencoder checkpoint")
+        trainer = cls.__new__(cls)
+        trainer.__dict__.update(state)
+        trainer.checkpoint_path = trainer.checkpoint_path or path
+        for name, value in overrides.items():
+            if value is not None:
+                setattr(trainer, name, value)
+        return trainer
@@ -0,0 +1,87 @@
+"""
+Ignisyl Core - Whitelist
+Analyst-approved users, activities and pairs that are never blocked
+"""
+
+import json
+import os
+
+WHITELIST_FILE = "whitelist.json"
+WHITELIST_CATEGORIES = ["users", "activities", "user_activity_pairs", "user_pc_pairs"]
+
+
+def empty_whitelist():
+    return {category: [] for category in WHITELIST_CATEGORIES}
+
+
+def load_whitelist(path=WHITELIST_FILE):
+    """Load whitelist from JSON file"""
+    if os.path.exists(path):
+        with open(path, 'r') as f:
+            return json.load(f)
+    return empty_whitelist()
+
+
+def save_whitelist(whitelist, path=WHITELIST_FILE):
+    """Save whitelist to JSON file"""
+    with open(path, 'w') as f:
+        json.dump(whitelist, f, indent=4)
+
+
+class WhitelistWatcher:
+    """
+    Whitelist for long-running processes, re-read whenever the file changes
+    """
+
+    def __init__(self, path=WHITELIST_FILE):
+        self.path = path
+        self._whitelist = None
+        self._mtime = None
+
+    def current(self):
+        mtime = os.path.getmtime(self.path) if os.path.exists(self.path) else None
+        if self._whitelist is None or mtime != self._mtime:
+            self._whitelist = load_whitelist(self.path)
+            self._mtime = mtime
+        return self._whitelist
+
+
+def _values(whitelist, category):
+    return {item["value"] for item in whitelist.get(category, [])}
+
+
+def is_whitelisted(row, whitelist):
+    """Check if a single activity should be whitelisted"""
+    user = row['user']
+    activity = row['activity']
+    pc = row['pc']
+
+    if user in _values(whitelist, "users"):
+        return True
+    if activity in _values(whitelist, "activities"):
+        return True
+    if f"{user}|{activity}" in _values(whitelist, "user_activity_pairs"):
+        return True
+    if f"{user}|{pc}" in _values(whitelist, "user_pc_pairs"):
+        return True
+
+    return False
+
+
+def whitelist_mask(df, whitelist):
+    """
+    Vectorised is_whitelisted over a whole frame
+    Returns: boolean Series aligned with df
+    """
+    mask = df['user'].isin(_values(whitelist, "users"))
+    mask |= df['activity'].isin(_values(whitelist, "activities"))
+
+    pairs = _values(whitelist, "user_activity_pairs")
+    if pairs:
+        mask |= (df['user'].astype(str) + "|" + df['activity'].astype(str)).isin(pairs)
+
+    pairs = _values(whitelist, "user_pc_pairs")
+    if pairs:
+        mask |= (df['user'].astype(str) + "|" + df['pc'].astype(str)).isin(pairs)
+
+    return mask
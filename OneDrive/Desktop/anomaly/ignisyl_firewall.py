@@ -1,14 +1,11 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-from sklearn.ensemble import IsolationForest
-from sklearn.preprocessing import LabelEncoder, MinMaxScaler
 from datetime import datetime
-import json
-import os
-import time
-import subprocess
-import platform
+from alert_paging import alert_filter_controls, current_page, page_navigation, query_alerts
+from warmup import PipelineWarmup, run_splash
+from dashboard_firewall import FirewallController
+from ignisyl_core import WHITELIST_FILE, get_pipeline_cache, load_whitelist, score_file
 
 # --- Page Configuration ---
 st.set_page_config(
@@ -48,131 +45,99 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
-# --- Firewall Controller Class ---
-class FirewallController:
-    """Real firewall integration"""
-    
-    def __init__(self):
-        self.os_type = platform.system()
-        self.test_mode = True  # Set to False for production
-        self.action_log = []
+# --- Action Coalescing ---
+RISK_PRIORITY = {"Low": 0, "Medium": 1, "High": 2}
+
+THREAT_SORT_OPTIONS = {
+    "Escalation priority": ("priority_rank", True),
+    "Risk score (high → low)": ("max_risk_score", False),
+    "Most events": ("event_count", False),
+    "Most recent": ("last_seen", False),
+}
+
+def coalesce_threat_events(df, window_minutes=15):
+    """
+    Group High/Medium events by (user, pc) inside a time window.
+    Each group becomes a single action escalated to the highest risk
+    level seen in it, and keeps the IDs of the events folded into it.
+    """
+    columns = ['user', 'pc', 'risk_level', 'max_risk_score', 'event_count',
+               'first_seen', 'last_seen', 'event_ids']
+    events = df[df['risk_level'].isin(['High', 'Medium']) & (~df['is_whitelisted'])]
+    if events.empty:
+        return pd.DataFrame(columns=columns + ['priority_rank'])
     
-    def block_ip_address(self, ip_address, rule_name="Ignisyl_Block"):
-        """Block an IP address using system firewall"""
-        try:
-            if self.test_mode:
-                # Simulation mode
-                self.action_log.append({
-                    "action": "BLOCK_IP",
-                    "target": ip_address,
-                    "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                    "status": "SIMULATED"
-                })
-                return True, f"[TEST MODE] Would block IP: {ip_address}"
-            
-            if self.os_type == "Windows":
-                cmd = f'netsh advfirewall firewall add rule name="{rule_name}_{ip_address}" dir=in action=block remoteip={ip_address}'
-                result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
-                return result.returncode == 0, result.stdout or result.stderr
-                
-            elif self.os_type == "Linux":
-                cmd = f'sudo iptables -A INPUT -s {ip_address} -j DROP'
-                result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
-                return result.returncode == 0, result.stdout or result.stderr
-                
-        except Exception as e:
-            return False, str(e)
+    events = events.sort_values(by=['user', 'pc', 'date'], kind='mergesort')
+    window = np.timedelta64(int(window_minutes * 60), 's')
     
-    def restrict_port_access(self, port, protocol="TCP"):
-        """Restrict access to specific port"""
-        try:
-            if self.test_mode:
-                self.action_log.append({
-                    "action": "RESTRICT_PORT",
-                    "target": f"{port}/{protocol}",
-                    "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                    "status": "SIMULATED"
-                })
-                return True, f"[TEST MODE] Would restrict port: {port}/{protocol}"
-            
-            if self.os_type == "Windows":
-                cmd = f'netsh advfirewall firewall add rule name="Ignisyl_RestrictPort_{port}" dir=in action=block protocol={protocol} localport={port}'
-                result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
-                return result.returncode == 0, result.stdout or result.stderr
-                
-        except Exception as e:
-            return False, str(e)
+    users = events['user'].to_numpy()
+    pcs = events['pc'].to_numpy()
+    dates = events['date'].to_numpy()
+    ids = events.index.to_numpy()
+    levels = events['risk_level'].to_numpy()
+    scores = events['risk_score'].to_numpy()
     
-    def get_user_ip(self, pc_name):
-        """Get IP address for PC (simulated mapping)"""
-        ip_mapping = {
-            "PC-001": "192.168.1.101", "PC-002": "192.168.1.102",
-            "PC-003": "192.168.1.103", "PC-004": "192.168.1.104",
-            "PC-005": "192.168.1.105", "PC-006": "192.168.1.106",
-            "PC-007": "192.168.1.107", "PC-008": "192.168.1.108",
-        }
-        return ip_mapping.get(pc_name, "192.168.1.100")
+    # Single pass over the sorted events: a window opens at its first event
+    # and absorbs the same user/PC's events until one falls outside it
+    groups = []
+    start = 0
+    for i in range(1, len(events) + 1):
+        if (i < len(events) and users[i] == users[start] and pcs[i] == pcs[start]
+                and dates[i] - dates[start] <= window):
+            continue
+        groups.append({
+            "user": users[start],
+            "pc": pcs[start],
+            "risk_level": max(levels[start:i], key=RISK_PRIORITY.get),
+            "max_risk_score": scores[start:i].max(),
+            "event_count": i - start,
+            "first_seen": dates[start],
+            "last_seen": dates[i - 1],
+            "event_ids": [int(event_id) for event_id in ids[start:i]]
+        })
+        start = i
     
-    def apply_firewall_action(self, user, pc, risk_level):
-        """Apply firewall rules based on risk level"""
-        actions = []
-        user_ip = self.get_user_ip(pc)
-        
-        if risk_level == "High":
-            # BLOCK: Complete isolation
-            success, msg = self.block_ip_address(user_ip, f"Ignisyl_HighRisk_{user}")
-            actions.append({
-                "type": "BLOCK IP",
-                "target": user_ip,
-                "success": success,
-                "message": msg,
-                "user": user,
-                "pc": pc
-            })
-            
-        elif risk_level == "Medium":
-            # RESTRICT: Block high-risk ports
-            high_risk_ports = [445, 3389, 22]  # SMB, RDP, SSH
-            for port in high_risk_ports:
-                success, msg = self.restrict_port_access(port)
-                actions.append({
-                    "type": "RESTRICT PORT",
-                    "target": port,
-                    "success": success,
-                    "message": msg,
-                    "user": user,
-                    "pc": pc
-                })
-        
-        return actions
+    groups_df = pd.DataFrame(groups, columns=columns)
+    groups_df['first_seen'] = pd.to_datetime(groups_df['first_seen']).dt.strftime('%Y-%m-%d %H:%M:%S')
+    groups_df['last_seen'] = pd.to_datetime(groups_df['last_seen']).dt.strftime('%Y-%m-%d %H:%M:%S')
+    groups_df['priority'] = groups_df['risk_level'].map(RISK_PRIORITY)
+    groups_df = groups_df.sort_values(by=['priority', 'max_risk_score'], ascending=False)
+    groups_df = groups_df.drop(columns='priority').reset_index(drop=True)
+    groups_df['priority_rank'] = np.arange(len(groups_df))
+    return groups_df
 
-# --- Whitelist Management ---
-WHITELIST_FILE = "whitelist.json"
+# --- Scoring Pipeline ---
+DEFAULT_DATA_FILE = "logon.csv"
+DEFAULT_CONTAMINATION = 0.01
 
-def load_whitelist():
-    if os.path.exists(WHITELIST_FILE):
-        with open(WHITELIST_FILE, 'r') as f:
-            return json.load(f)
-    return {"users": [], "activities": [], "user_activity_pairs": []}
+def score_activity_logs(file_path, contamination_level, progress=None):
+    """
+    Load, score and whitelist-check a log file with the core pipeline
+    Streamlit-free so it can run on the warm-up thread; raises on bad input
+    """
+    return score_file(
+        file_path, whitelist=load_whitelist(), action_labels=None,
+        contamination=contamination_level, precision=2, progress=progress
+    )
 
-def save_whitelist(whitelist):
-    with open(WHITELIST_FILE, 'w') as f:
-        json.dump(whitelist, f, indent=4)
+def cached_score_activity_logs(file_path, contamination_level, progress=None):
+    """Scoring pipeline behind the shared content-addressed cache (log + whitelist contents)"""
+    return get_pipeline_cache().get_or_compute(
+        "ignisyl_firewall", file_path, (contamination_level,),
+        lambda: score_activity_logs(file_path, contamination_level, progress),
+        depends_on=(WHITELIST_FILE,)
+    )
 
-def is_whitelisted(row, whitelist):
-    user = row['user']
-    activity = row['activity']
-    
-    if any(item["value"] == user for item in whitelist.get("users", [])):
-        return True
-    if any(item["value"] == activity for item in whitelist.get("activities", [])):
-        return True
-    if any(item["value"] == f"{user}|{activity}" for item in whitelist.get("user_activity_pairs", [])):
-        return True
-    
-    return False
+def load_and_process_data(file_path, contamination_level):
+    try:
+        return cached_score_activity_logs(file_path, contamination_level)
+    except FileNotFoundError:
+        st.error(f"❌ Error: File '{file_path}' not found!")
+        return None
 
 # --- Welcome Page ---
+WELCOME_MIN_SECONDS = 2.0
+
 def show_welcome_page():
     st.markdown("""
         <div style="display: flex; flex-direction: column; justify-content: center; align-items: center; height: 80vh; background: linear-gradient(135deg, #000000 0%, #1a1a1a 100%); border-radius: 10px;">
@@ -187,7 +152,16 @@ def show_welcome_page():
             </div>
         </div>
     """, unsafe_allow_html=True)
-    time.sleep(2)
+    
+    # Score the default log file in the background while the splash is up
+    if 'warmup' not in st.session_state:
+        st.session_state.warmup = PipelineWarmup(
+            cached_score_activity_logs, (DEFAULT_DATA_FILE, DEFAULT_CONTAMINATION)
+        ).start()
+    
+    progress_bar = st.progress(0.0)
+    status_text = st.empty()
+    run_splash(st.session_state.warmup, progress_bar, status_text, min_duration=WELCOME_MIN_SECONDS)
     return True
 
 # --- Main Application ---
@@ -197,6 +171,8 @@ def main():
         st.session_state.welcome_shown = False
     if 'firewall' not in st.session_state:
         st.session_state.firewall = FirewallController()
+    if 'applied_groups' not in st.session_state:
+        st.session_state.applied_groups = set()
     
     # Show welcome page
     if not st.session_state.welcome_shown:
@@ -237,65 +213,21 @@ def main():
         st.divider()
         
         st.subheader("📁 Data Source")
-        data_file = st.text_input("Log File", value="logon.csv")
+        data_file = st.text_input("Log File", value=DEFAULT_DATA_FILE,
+                                  help="A CSV log file (optionally .gz), a folder of logs, or a glob such as logs/*.csv")
         
         st.divider()
         
         st.subheader("⚙️ Detection Settings")
-        contamination = st.slider("Sensitivity", 0.01, 0.10, 0.01, 0.01)
+        contamination = st.slider("Sensitivity", 0.01, 0.10, DEFAULT_CONTAMINATION, 0.01)
         auto_firewall = st.checkbox("Auto-Apply Firewall Rules", value=True,
                                    help="Automatically apply firewall rules for high-risk threats")
-
-    # Load data
-    @st.cache_data
-    def load_and_process_data(file_path, contamination_level):
-        try:
-            df = pd.read_csv(file_path)
-        except FileNotFoundError:
-            st.error(f"❌ Error: File '{file_path}' not found!")
-            return None
-
-        df['date'] = pd.to_datetime(df['date'])
-        df['hour_of_day'] = df['date'].dt.hour
-        df['day_of_week'] = df['date'].dt.dayofweek
-        
-        le_user = LabelEncoder()
-        le_pc = LabelEncoder()
-        le_activity = LabelEncoder()
-        df['user_encoded'] = le_user.fit_transform(df['user'])
-        df['pc_encoded'] = le_pc.fit_transform(df['pc'])
-        df['activity_encoded'] = le_activity.fit_transform(df['activity'])
-
-        features_for_model = ['user_encoded', 'pc_encoded', 'activity_encoded', 'hour_of_day', 'day_of_week']
-        X = df[features_for_model]
-        
-        model = IsolationForest(contamination=contamination_level, random_state=42)
-        model.fit(X)
-        df['anomaly_score'] = model.decision_function(X)
-        
-        scaler = MinMaxScaler(feature_range=(0, 100))
-        scores = df['anomaly_score'].values.reshape(-1, 1)
-        inverted_scores = -scores + max(scores)
-        df['risk_score'] = scaler.fit_transform(inverted_scores).round(2)
-
-        def assign_risk_level(score):
-            if score > 85:
-                return 'High'
-            elif score > 60:
-                return 'Medium'
-            else:
-                return 'Low'
-        
-        df['risk_level'] = df['risk_score'].apply(assign_risk_level)
-        df['timestamp'] = df['date'].dt.strftime('%Y-%m-%d %H:%M:%S')
-        
-        whitelist = load_whitelist()
-        df['is_whitelisted'] = df.apply(lambda row: is_whitelisted(row, whitelist), axis=1)
-        
-        return df
+        coalesce_window = st.slider("Coalescing Window (minutes)", 1, 120, 15,
+                                    help="High/Medium events for the same user and PC inside this window share one firewall action")
 
     with st.spinner("🔄 Analyzing threats and preparing firewall..."):
         df_processed = load_and_process_data(data_file, contamination)
+    st.sidebar.caption(get_pipeline_cache().summary())
 
     if df_processed is not None:
         # Firewall Status Panel
@@ -317,37 +249,58 @@ def main():
 
         st.divider()
 
-        # High-Risk Threats with Firewall Actions
-        if high_risk > 0:
+        # Coalesced Threats with Firewall Actions
+        threat_groups = coalesce_threat_events(df_processed, coalesce_window)
+        
+        if not threat_groups.empty:
             st.header("🔴 Critical Threats - Firewall Actions Applied")
+            st.caption(f"{int(threat_groups['event_count'].sum())} High/Medium events coalesced into "
+                       f"{len(threat_groups)} firewall actions ({coalesce_window} min window)")
             
-            high_risk_df = df_processed[
-                (df_processed['risk_level'] == 'High') & (~df_processed['is_whitelisted'])
-            ].sort_values(by='risk_score', ascending=False).head(10)
+            search, sort_by, ascending, page_size = alert_filter_controls(
+                "threat_groups", THREAT_SORT_OPTIONS, default_page_size=10
+            )
+            groups_page, total_groups, page = query_alerts(
+                threat_groups,
+                search=search,
+                sort_by=sort_by,
+                ascending=ascending,
+                page=current_page("threat_groups"),
+                page_size=page_size
+            )
             
-            for idx, row in high_risk_df.iterrows():
-                with st.expander(f"🚨 THREAT #{idx+1}: {row['user']} on {row['pc']} - Risk: {row['risk_score']}/100"):
+            # Widgets are created for the visible page of groups only
+            for position, (_, group) in enumerate(groups_page.iterrows(), start=page * page_size + 1):
+                group_key = (group['user'], group['pc'], group['first_seen'], coalesce_window)
+                event_refs = ", ".join(f"#{event_id + 1}" for event_id in group['event_ids'])
+                
+                with st.expander(f"🚨 THREAT #{position}: {group['user']} on {group['pc']} - "
+                                 f"{group['event_count']} event(s) - Risk: {group['max_risk_score']}/100"):
                     col1, col2 = st.columns([2, 1])
                     
                     with col1:
                         st.markdown(f"""
                         **Threat Details:**
-                        - 👤 **User:** {row['user']}
-                        - 💻 **Computer:** {row['pc']}
-                        - 📋 **Activity:** {row['activity']}
-                        - 🕐 **Time:** {row['timestamp']}
-                        - 🔢 **Risk Score:** {row['risk_score']}/100
-                        - 🌐 **IP Address:** {st.session_state.firewall.get_user_ip(row['pc'])}
+                        - 👤 **User:** {group['user']}
+                        - 💻 **Computer:** {group['pc']}
+                        - ⚠️ **Escalated Level:** {group['risk_level']}
+                        - 🕐 **Window:** {group['first_seen']} → {group['last_seen']}
+                        - 🔢 **Max Risk Score:** {group['max_risk_score']}/100
+                        - 🧾 **Folded Events:** {event_refs}
+                        - 🌐 **IP Address:** {st.session_state.firewall.get_user_ip(group['pc'])}
                         """)
                     
                     with col2:
                         st.markdown("**🔥 Firewall Response:**")
                         
                         if auto_firewall:
-                            if st.button(f"🚫 Apply Firewall Block", key=f"fw_{idx}"):
+                            if group_key in st.session_state.applied_groups:
+                                st.info("Firewall action already applied for this window")
+                            elif st.button(f"🚫 Apply Firewall Block", key=f"fw_{group['user']}_{group['pc']}_{group['first_seen']}"):
                                 actions = st.session_state.firewall.apply_firewall_action(
-                                    row['user'], row['pc'], row['risk_level']
+                                    group['user'], group['pc'], group['risk_level'], group['event_ids']
                                 )
+                                st.session_state.applied_groups.add(group_key)
                                 
                                 for action in actions:
                                     if action['success']:
@@ -357,12 +310,16 @@ def main():
                         else:
                             st.info("Enable 'Auto-Apply Firewall Rules' in sidebar")
             
+            page_navigation("threat_groups", page, total_groups, page_size)
+            
             st.divider()
 
         # Firewall Action Log
         with st.expander("📋 View Firewall Action Log"):
             if st.session_state.firewall.action_log:
-                log_df = pd.DataFrame(st.session_state.firewall.action_log)
+                log_df = st.session_state.firewall.action_log_frame()
+                st.caption(f"Showing the {len(log_df)} most recent actions (newest first, "
+                           f"capacity {st.session_state.firewall.action_log.maxlen})")
                 st.dataframe(log_df, use_container_width=True)
             else:
                 st.info("No firewall actions logged yet")
@@ -383,6 +340,9 @@ def main():
             **Firewall Status:**  
             {"🟡 Simulation Mode" if st.session_state.firewall.test_mode else "🟢 Active & Blocking"}
             """)
+            if st.session_state.firewall.test_mode:
+                simulator = st.session_state.firewall.simulator
+                st.caption(f"Simulated {simulator.strategy} table: {simulator.rule_count} rules")
         
         with col3:
             st.markdown(f"""
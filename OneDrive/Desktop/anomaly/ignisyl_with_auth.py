@@ -9,15 +9,10 @@ Guide: Dr. Divya Mohan
 """
 
 import streamlit as st
-import pandas as pd
-import numpy as np
-from sklearn.ensemble import IsolationForest
-from sklearn.preprocessing import LabelEncoder, MinMaxScaler
 from datetime import datetime
 import json
 import sqlite3
 import hashlib
-import plotly.express as px
 
 # ==========================================
 # AUTHENTICATION SYSTEM
@@ -253,9 +248,21 @@ def show_user_info():
     st.sidebar.markdown("---")
 
 
+ACTION_LABELS = {
+    "High": "🚫 BLOCK",
+    "Medium": "⚠️ RESTRICT",
+    "Low": "✅ ALLOW"
+}
+
 def main_dashboard():
     """Main application dashboard"""
     
+    # Pandas, plotly and the scoring pipeline load here rather than at import,
+    # so the login page renders without them
+    import pandas as pd
+    import plotly.express as px
+    from ignisyl_core import get_pipeline_cache, score_file
+    
     show_user_info()
     
     user = st.session_state.user_data
@@ -282,7 +289,8 @@ def main_dashboard():
     with st.sidebar:
         st.subheader("⚙️ System Settings")
         
-        data_file = st.text_input("Log File", value="logon.csv")
+        data_file = st.text_input("Log File", value="logon.csv",
+                                  help="A CSV log file (optionally .gz), a folder of logs, or a glob such as logs/*.csv")
         
         # Settings (locked for non-admins)
         if auth.has_permission(user, 'all'):
@@ -293,53 +301,22 @@ def main_dashboard():
         
         show_timeline = st.checkbox("Show Timeline", value=True)
     
-    # Load and process data
-    @st.cache_data
+    # Load and process data (cached by file contents in the shared pipeline cache)
     def load_data(file_path, sens):
         try:
-            df = pd.read_csv(file_path)
-            df['date'] = pd.to_datetime(df['date'])
-            df['hour_of_day'] = df['date'].dt.hour
-            df['day_of_week'] = df['date'].dt.dayofweek
-            df['is_weekend'] = df['day_of_week'].isin([5, 6]).astype(int)
-            df['is_night'] = df['hour_of_day'].apply(lambda x: 1 if x < 6 or x > 22 else 0)
-            
-            le_user = LabelEncoder()
-            le_pc = LabelEncoder()
-            le_activity = LabelEncoder()
-            df['user_encoded'] = le_user.fit_transform(df['user'])
-            df['pc_encoded'] = le_pc.fit_transform(df['pc'])
-            df['activity_encoded'] = le_activity.fit_transform(df['activity'])
-            
-            features = ['user_encoded', 'pc_encoded', 'activity_encoded', 
-                       'hour_of_day', 'day_of_week', 'is_weekend', 'is_night']
-            X = df[features]
-            
-            model = IsolationForest(contamination=sens, random_state=42)
-            model.fit(X)
-            scores = model.decision_function(X)
-            
-            scaler = MinMaxScaler(feature_range=(0, 100))
-            inverted = -scores.reshape(-1, 1) + max(scores)
-            df['risk_score'] = scaler.fit_transform(inverted).flatten()
-            
-            df['risk_level'] = df['risk_score'].apply(
-                lambda x: 'High' if x > 85 else ('Medium' if x > 60 else 'Low')
-            )
-            
-            df['firewall_action'] = df['risk_level'].apply(
-                lambda x: "🚫 BLOCK" if x == 'High' else ("⚠️ RESTRICT" if x == 'Medium' else "✅ ALLOW")
+            return get_pipeline_cache().get_or_compute(
+                "ignisyl_with_auth", file_path, (sens,), lambda: score_data(file_path, sens)
             )
-            
-            df['timestamp'] = df['date'].dt.strftime('%Y-%m-%d %H:%M:%S')
-            
-            return df
         except Exception as e:
             st.error(f"Error loading data: {e}")
             return None
     
+    def score_data(file_path, sens):
+        return score_file(file_path, action_labels=ACTION_LABELS, contamination=sens, feature_set="extended")
+    
     with st.spinner("🔄 AI analyzing threats..."):
         df = load_data(data_file, sensitivity)
+    st.sidebar.caption(get_pipeline_cache().summary())
     
     if df is not None:
         # Metrics
@@ -381,7 +358,7 @@ def main_dashboard():
         # Risky users
         if high > 0:
             st.header("⚠️ High-Risk Users")
-            risky = df[df['risk_level'] == 'High'].groupby('user').agg({
+            risky = df[df['risk_level'] == 'High'].groupby('user', observed=True).agg({
                 'risk_level': 'count',
                 'risk_score': 'mean'
             }).reset_index()
@@ -0,0 +1,22 @@
+import numpy as np
+import pandas as pd
+
+from ignisyl_core.detector import Detector
+
+
+def wide_log(rng, rows=3000, users=1500, pcs=1500):
+    times = pd.Timestamp("2024-10-01") + pd.to_timedelta(np.sort(rng.integers(0, 30 * 86400, rows)), unit="s")
+    return pd.DataFrame({
+        'date': times,
+        'user': np.r_[np.arange(users), rng.integers(0, users, rows - users)].astype(str),
+        'pc': np.r_[np.arange(pcs), rng.integers(0, pcs, rows - pcs)].astype(str),
+        'activity': rng.choice(['Logon', 'Logoff', 'File_Access', 'Email_Sent'], rows)
+    })
+
+
+def test_behavioural_scores_with_wide_vocabularies():
+    df = wide_log(np.random.default_rng(0))
+    detector = Detector(feature_set="behavioural").fit(df)
+    assert detector.memo is None
+    scored = detector.score(df.iloc[:100])
+    assert scored['risk_score'].between(0, 100).all()
@@ -0,0 +1,36 @@
+import numpy as np
+import pandas as pd
+
+from ignisyl_core.detector import Detector
+from ignisyl_core.features import transform_features
+from ignisyl_core.forest import CompiledForest
+
+
+def training_log(rng, rows=2000):
+    times = pd.Timestamp("2024-10-01") + pd.to_timedelta(np.sort(rng.integers(0, 14 * 86400, rows)), unit="s")
+    return pd.DataFrame({
+        'date': times,
+        'user': rng.choice([f"user{i:03d}" for i in range(40)], rows),
+        'pc': rng.choice([f"PC-{i:03d}" for i in range(30)], rows),
+        'activity': rng.choice(['Logon', 'Logoff', 'File_Access', 'Email_Sent'], rows)
+    })
+
+
+def test_compiled_scores_equal_the_estimator():
+    df = training_log(np.random.default_rng(0))
+    detector = Detector().fit(df)
+    assert detector.compiled_forest is not None
+    X = transform_features(df.copy(), detector.encoders, detector.feature_set)
+    np.testing.assert_array_equal(detector.compiled_forest.decision_function(X),
+                                  detector.iso_forest.decision_function(X))
+
+
+def test_falls_back_to_the_estimator_without_sklearn_internals(monkeypatch):
+    def missing(cls, model):
+        raise AttributeError("_decision_path_lengths")
+
+    monkeypatch.setattr(CompiledForest, "from_isolation_forest", classmethod(missing))
+    df = training_log(np.random.default_rng(1))
+    detector = Detector().fit(df)
+    assert detector.compiled_forest is None
+    assert detector.score(df.iloc[:10])['risk_score'].between(0, 100).all()
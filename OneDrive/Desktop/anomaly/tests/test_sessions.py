@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+
+from ignisyl_core.sessions import SESSION_FEATURES, SessionState, add_session_features, sessionize
+
+
+def make_log(rows):
+    return pd.DataFrame(rows, columns=['date', 'user', 'pc', 'activity']).assign(
+        date=lambda df: pd.to_datetime(df['date']))
+
+
+def random_log(rng, rows=400):
+    times = pd.Timestamp("2024-10-01") + pd.to_timedelta(np.sort(rng.integers(0, 5 * 86400, rows)), unit="s")
+    return pd.DataFrame({
+        'date': times,
+        'user': rng.choice(['a', 'b', 'c'], rows),
+        'pc': rng.choice(['p1', 'p2', 'p3'], rows),
+        'activity': rng.choice(['Logon', 'Logoff', 'File_Access'], rows, p=[0.2, 0.2, 0.6])
+    })
+
+
+def test_logons_without_logoffs():
+    df = make_log([("2024-10-01 08:00", "a", "p1", "Logon"),
+                   ("2024-10-01 09:00", "a", "p2", "Logon")])
+    features = add_session_features(df.copy())
+    assert features['concurrent_sessions'].tolist() == [1, 2]
+    assert features['sessionless'].tolist() == [0, 0]
+    assert sessionize(df)['ended_by'].tolist() == ["open", "open"]
+
+
+def test_orphan_logoffs_only():
+    df = make_log([("2024-10-01 08:00", "a", "p1", "Logoff"),
+                   ("2024-10-01 09:00", "b", "p2", "Logoff")])
+    assert add_session_features(df.copy())['sessionless'].tolist() == [1, 1]
+    assert sessionize(df)['ended_by'].tolist() == ["no_logon", "no_logon"]
+
+
+def test_last_users_open_session_is_open():
+    df = make_log([("2024-10-01 08:00", "a", "p1", "Logon"),
+                   ("2024-10-01 09:00", "b", "p2", "Logon"),
+                   ("2024-10-01 10:00", "a", "p1", "Logoff")])
+    sessions = sessionize(df)
+    assert sessions[['user', 'ended_by']].values.tolist() == [["a", "logoff"], ["b", "open"]]
+
+
+def test_batch_matches_stream():
+    rng = np.random.default_rng(0)
+    for _ in range(10):
+        df = random_log(rng)
+        batch = add_session_features(df.copy())
+        stream = SessionState().update(df.copy())
+        for feature in SESSION_FEATURES:
+            np.testing.assert_array_equal(batch[feature].to_numpy(), stream[feature].to_numpy())
+
+
+def test_history_then_stream_matches_full_stream():
+    rng = np.random.default_rng(1)
+    for _ in range(30):
+        df = random_log(rng)
+        half = len(df) // 2
+        full = SessionState().update(df.copy())
+        resumed = SessionState.from_history(df.iloc[:half]).update(df.iloc[half:].copy())
+        for feature in SESSION_FEATURES:
+            np.testing.assert_array_equal(full[feature].to_numpy()[half:], resumed[feature].to_numpy())
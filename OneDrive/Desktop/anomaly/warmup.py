@@ -0,0 +1,80 @@
+"""
+Ignisyl Background Warm-up
+Runs the scoring pipeline on a background thread while the welcome screen
+is displayed. The pipeline stores its result in the shared pipeline cache,
+so the first dashboard render picks up the finished result from there.
+"""
+
+import threading
+import time
+
+
+class PipelineWarmup:
+    """
+    Background run of a pipeline function with stage progress
+
+    The pipeline is called as pipeline(*args, progress=callback) and must not
+    touch Streamlit: it runs outside the script thread. The callback takes
+    (fraction, message) and may be called from any stage.
+    """
+
+    def __init__(self, pipeline, args):
+        self.pipeline = pipeline
+        self.args = tuple(args)
+        self.fraction = 0.0
+        self.message = "Starting..."
+        self.result = None
+        self.error = None
+        self.started_at = None
+        self.finished_at = None
+        self._done = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="ignisyl-warmup", daemon=True)
+
+    def start(self):
+        self.started_at = time.perf_counter()
+        self._thread.start()
+        return self
+
+    def _report(self, fraction, message):
+        self.fraction = max(0.0, min(1.0, fraction))
+        self.message = message
+
+    def _run(self):
+        try:
+            self.result = self.pipeline(*self.args, progress=self._report)
+            self._report(1.0, "System Ready!")
+        except Exception as e:
+            self.error = e
+            self._report(1.0, f"Warm-up failed: {e}")
+        finally:
+            self.finished_at = time.perf_counter()
+            self._done.set()
+
+    def done(self):
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        return self._done.wait(timeout)
+
+    @property
+    def elapsed(self):
+        """Seconds the pipeline took (or has taken so far)"""
+        if self.started_at is None:
+            return 0.0
+        end = self.finished_at if self.finished_at is not None else time.perf_counter()
+        return end - self.started_at
+
+
+def run_splash(warmup, progress_bar, status_text, min_duration=2.0, poll_interval=0.1):
+    """
+    Drive a splash screen's progress widgets until the warm-up finishes
+    and the splash has been shown for at least min_duration seconds,
+    so the wait is max(splash, pipeline) rather than their sum
+    """
+    shown_at = time.perf_counter()
+    while True:
+        progress_bar.progress(warmup.fraction)
+        status_text.markdown(f"`{warmup.message}`")
+        if warmup.done() and time.perf_counter() - shown_at >= min_duration:
+            break
+        time.sleep(poll_interval)